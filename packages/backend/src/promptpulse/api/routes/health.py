@@ -1,7 +1,7 @@
 """Health check endpoints."""
 from fastapi import APIRouter
 
-from promptpulse.infrastructure.database import check_database_connection
+from promptpulse.infrastructure.database import check_database_connection, get_pool_stats
 
 router = APIRouter(prefix="", tags=["health"])
 
@@ -14,4 +14,11 @@ async def read_health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@router.get("/health/db-pool", summary="Database connection pool usage")
+async def read_db_pool() -> dict[str, dict[str, float]]:
+    """Return connections in use, queued checkouts and checkout latency per pool."""
+
+    return get_pool_stats()
+
+
 __all__ = ["router"]
@@ -29,6 +29,15 @@ class Settings(BaseSettings):
             "POSTGRES_URL_NON_POOLING",
         ),
     )
+    database_read_url: Optional[str] = Field(
+        default=None,
+        description="Read-replica URL for read-only queries; unset sends reads to database_url.",
+        validation_alias=AliasChoices("PROMPTPULSE_DATABASE_READ_URL", "DATABASE_READ_URL"),
+    )
+    db_pool_size: int = Field(default=5, description="Connections kept open per engine.")
+    db_max_overflow: int = Field(default=10, description="Extra connections allowed under load.")
+    db_pool_timeout: float = Field(default=30.0, description="Seconds to wait for a free connection.")
+    db_pool_recycle: int = Field(default=1800, description="Reconnect connections older than this (seconds).")
     redis_url: str = Field(
         default="redis://localhost:6379/0",
         description="Redis connection URL used for caching or task coordination.",
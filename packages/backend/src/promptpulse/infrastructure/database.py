@@ -1,30 +1,96 @@
 """Database engine and session management."""
 from __future__ import annotations
 
+import time
 from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
 from typing import AsyncIterator
 
 from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession, async_sessionmaker,
                                    create_async_engine)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from promptpulse.core.config import get_settings
 
 _settings = get_settings()
 
-_engine: AsyncEngine = create_async_engine(
-    _settings.database_url,
-    echo=False,
-    pool_pre_ping=True,
-)
+
+@dataclass
+class PoolCheckoutStats:
+    """Running totals of connection checkouts for one pool.
+
+    ``checkouts`` and the wait times cover successful checkouts only; checkouts that
+    gave up after ``pool_timeout`` are counted in ``timeouts``.
+    """
+
+    checkouts: int = 0
+    waiting: int = 0
+    timeouts: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Queue pool that records checkout latency, queued checkouts and timeouts."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = PoolCheckoutStats()
+
+    def _do_get(self):
+        stats = self.checkout_stats
+        stats.waiting += 1
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            stats.timeouts += 1
+            raise
+        finally:
+            stats.waiting -= 1
+        elapsed = time.perf_counter() - start
+        stats.checkouts += 1
+        stats.total_wait_seconds += elapsed
+        stats.max_wait_seconds = max(stats.max_wait_seconds, elapsed)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.checkout_stats = self.checkout_stats
+        return pool
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=False,
+        pool_pre_ping=True,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=_settings.db_pool_size,
+        max_overflow=_settings.db_max_overflow,
+        pool_timeout=_settings.db_pool_timeout,
+        pool_recycle=_settings.db_pool_recycle,
+    )
+
+
+_engine: AsyncEngine = _create_engine(_settings.database_url)
 _session_factory = async_sessionmaker(_engine, expire_on_commit=False)
 
+# Read-only queries go to the replica when one is configured.
+_read_engine: AsyncEngine = (
+    _create_engine(_settings.database_read_url) if _settings.database_read_url else _engine
+)
+_read_session_factory = async_sessionmaker(_read_engine, expire_on_commit=False)
+
 
 async def check_database_connection() -> None:
     """Verify that the database connection is healthy."""
 
-    async with _engine.connect() as connection:
-        await connection.execute(text("SELECT 1"))
+    for engine in dict.fromkeys((_engine, _read_engine)):
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
 
 
 @asynccontextmanager
@@ -35,15 +101,55 @@ async def get_session() -> AsyncIterator[AsyncSession]:
         yield session
 
 
+@asynccontextmanager
+async def get_read_session(use_primary: bool = False) -> AsyncIterator[AsyncSession]:
+    """Provide a session for read-only queries, bound to the read replica if configured.
+
+    Pass ``use_primary=True`` when the caller must see its own recent writes
+    (read-your-writes), since the replica may lag behind the primary.
+    """
+
+    factory = _session_factory if use_primary else _read_session_factory
+    async with factory() as session:
+        yield session
+
+
+def get_pool_stats() -> dict[str, dict[str, float]]:
+    """Return connection usage and checkout statistics for each engine's pool."""
+
+    engines = {"primary": _engine}
+    if _read_engine is not _engine:
+        engines["replica"] = _read_engine
+    stats = {}
+    for name, engine in engines.items():
+        pool = engine.pool
+        checkout = asdict(pool.checkout_stats)
+        checkout["mean_wait_seconds"] = (
+            checkout["total_wait_seconds"] / checkout["checkouts"] if checkout["checkouts"] else 0.0
+        )
+        stats[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": pool.overflow(),
+            **checkout,
+        }
+    return stats
+
+
 async def dispose_engine() -> None:
-    """Dispose of the underlying engine (used during shutdown)."""
+    """Dispose of the underlying engines (used during shutdown)."""
 
     await _engine.dispose()
+    if _read_engine is not _engine:
+        await _read_engine.dispose()
 
 
 __all__ = [
     "AsyncSession",
     "check_database_connection",
     "dispose_engine",
+    "get_pool_stats",
+    "get_read_session",
     "get_session",
 ]
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the response-analysis hot path.
+
+Runs each analysis function over a fixed, seeded corpus of realistic model
+responses (short to ~4k tokens, 1 to 50 competitors) and reports ns per call
+and peak bytes allocated per call. Compare against a saved baseline to catch
+regressions:
+
+    python benchmarks/bench_analysis.py --save-baseline benchmarks/analysis_baseline.json
+    python benchmarks/bench_analysis.py --baseline benchmarks/analysis_baseline.json --max-regression 0.15
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.services.openrouter_service import OpenRouterService  # noqa: E402
+from src.services.brand_intelligence import BrandIntelligenceEngine  # noqa: E402
+
+BRAND = "Tesla"
+COMPETITOR_POOL = [
+    "Ford", "GM", "Rivian", "Mercedes", "BMW", "Audi", "Volkswagen", "Hyundai", "Kia", "Lucid",
+    "Polestar", "Volvo", "Nissan", "Toyota", "Honda", "Porsche", "Jaguar", "Chevrolet", "Cadillac", "Lexus",
+    "Subaru", "Mazda", "Fisker", "Nio", "BYD", "Xpeng", "Li Auto", "Genesis", "Mini", "Fiat",
+    "Jeep", "Ram", "Dodge", "Chrysler", "Lincoln", "Buick", "GMC", "Acura", "Infiniti", "Mitsubishi",
+    "Land Rover", "Bentley", "Ferrari", "Lamborghini", "Maserati", "Alfa Romeo", "Peugeot", "Renault", "Skoda", "Seat",
+]
+SIZES = {"short": 60, "medium": 600, "long": 3000}  # words; ~1.3 tokens per word, so "long" is ~4k tokens
+COMPETITOR_COUNTS = [1, 10, 50]
+
+SENTENCES = [
+    "{brand} is widely considered one of the best options for buyers who value range and software.",
+    "{competitor} offers a strong alternative with a reliable dealer network and competitive pricing.",
+    "According to Consumer Reports, {competitor} scored well on reliability but lags on charging.",
+    "Owners report issues with service wait times for {brand}, though satisfaction remains high.",
+    "Research from the EPA shows efficiency varies by up to 20% between {competitor} and {brand} models.",
+    "{competitor} is an innovative newcomer, but production problems have limited availability.",
+    "Source: https://www.example.com/reviews/{slug} compares charging speeds across 12 vehicles.",
+    "Critics say {competitor} is expensive compared to {brand}, with limited range in cold weather.",
+    "{brand} leads in charging infrastructure with more than 50,000 fast chargers worldwide.",
+    "Study by J.D. Power found {competitor} owners were pleased with build quality in 2024.",
+]
+
+def build_response(words: int, competitors, seed: int) -> str:
+    """A deterministic model-style response of roughly `words` words in short paragraphs"""
+    rng = random.Random(seed)
+    paragraphs, current, count = [], [], 0
+    while count < words:
+        sentence = rng.choice(SENTENCES).format(
+            brand=BRAND,
+            competitor=rng.choice(competitors),
+            slug=rng.randint(1000, 9999)
+        )
+        current.append(sentence)
+        count += len(sentence.split())
+        if len(current) >= rng.randint(2, 5):
+            paragraphs.append(" ".join(current))
+            current = []
+    if current:
+        paragraphs.append(" ".join(current))
+    return "\n\n".join(paragraphs)
+
+def run_coroutine(coro):
+    """Drive a coroutine that never awaits I/O without an event loop"""
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("coroutine suspended; cannot benchmark synchronously")
+
+def build_cases():
+    service = OpenRouterService()
+    engine = BrandIntelligenceEngine()
+    keywords = ["electric vehicles", "charging", "range"]
+    cases = []
+
+    for size_name, words in SIZES.items():
+        for n in COMPETITOR_COUNTS:
+            competitors = COMPETITOR_POOL[:n]
+            text = build_response(words, competitors, seed=words * 100 + n)
+            label = f"{size_name}/c{n}"
+            # Uncached work, so baselines stay comparable; the memo hit is timed separately
+            cases.append((f"_analyze_response[{label}]",
+                          lambda t=text, c=competitors: service._compute_analysis(t, BRAND, c)))
+            cases.append((f"_analyze_response_memo_hit[{label}]",
+                          lambda t=text, c=competitors: run_coroutine(service._analyze_response("best ev", t, BRAND, c, "CHATGPT"))))
+            cases.append((f"_estimate_ranking_position[{label}]",
+                          lambda t=text, c=competitors: service._estimate_ranking_position(t, BRAND, c)))
+
+        # These do not depend on the competitor set
+        text = build_response(words, COMPETITOR_POOL[:10], seed=words)
+        mentions = engine._extract_mentions_from_response(text, BRAND, keywords, "openai")
+        distribution = {"very_positive": 0, "positive": 0, "neutral": 0, "negative": 0, "very_negative": 0}
+        for mention in mentions:
+            distribution[mention.sentiment_label] += 1
+        cases.append((f"_extract_citations[{size_name}]", lambda t=text: service._extract_citations(t)))
+        cases.append((f"_extract_mentions_from_response[{size_name}]",
+                      lambda t=text: engine._extract_mentions_from_response(t, BRAND, keywords, "openai")))
+        cases.append((f"_analyze_sentiment[{size_name}]", lambda t=text: engine._analyze_sentiment(t)))
+        cases.append((f"_calculate_visibility_score[{size_name}]",
+                      lambda m=mentions, d=distribution: engine._calculate_visibility_score(m, d)))
+    return cases
+
+def time_case(fn, min_time: float, repeats: int) -> float:
+    """Best-of-`repeats` ns per call, with the loop count calibrated to `min_time` seconds"""
+    number = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_time * 1e9 or number >= 1_000_000:
+            break
+        number *= 2
+
+    best = elapsed / number
+    for _ in range(repeats - 1):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter_ns() - start) / number)
+    return best
+
+def peak_allocation(fn) -> int:
+    """Peak bytes allocated during one call"""
+    fn()  # warm caches (regex compilation, etc.)
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - baseline)
+
+def main():
+    parser = argparse.ArgumentParser(description="Analysis hot-path microbenchmarks")
+    parser.add_argument("--filter", help="Only run cases whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=0.1, help="Seconds per timing loop")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", help="Compare against this baseline JSON")
+    parser.add_argument("--save-baseline", help="Write results to this baseline JSON")
+    parser.add_argument("--max-regression", type=float, default=0.20,
+                        help="Fail when ns/call or allocations grow by more than this fraction")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    print(f"{'case':<52}{'ns/call':>14}{'alloc B':>12}{'vs base':>10}")
+    for name, fn in build_cases():
+        if args.filter and args.filter not in name:
+            continue
+        alloc = peak_allocation(fn)
+        ns = time_case(fn, args.min_time, args.repeats)
+        results[name] = {"ns_per_call": round(ns, 1), "peak_alloc_bytes": alloc}
+
+        change = ""
+        if name in baseline:
+            base = baseline[name]
+            ratio = ns / base["ns_per_call"] - 1 if base["ns_per_call"] else 0.0
+            change = f"{ratio:+.1%}"
+            alloc_ratio = alloc / base["peak_alloc_bytes"] - 1 if base["peak_alloc_bytes"] else 0.0
+            if ratio > args.max_regression:
+                regressions.append(f"{name}: {ratio:+.1%} ns/call")
+            if alloc_ratio > args.max_regression:
+                regressions.append(f"{name}: {alloc_ratio:+.1%} allocated bytes")
+        print(f"{name:<52}{ns:>14,.0f}{alloc:>12,}{change:>10}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if regressions:
+        print(f"\nRegressions beyond {args.max_regression:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
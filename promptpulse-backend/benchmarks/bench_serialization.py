@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Serialization time and payload size for large mention responses.
+
+Builds N BrandMention rows (default 10k, seeded), then times each way the API
+can turn them into a response body:
+
+- orm+jsonable_encoder+json: what get_brand_mentions did when it returned raw
+  ORM objects.
+- schema+json: the pydantic response model with FastAPI's default JSONResponse.
+- schema+orjson: the same model rendered by ORJSONResponse.
+- schema dump_json: pydantic-core writes the JSON bytes directly.
+
+It then reports the body size raw, gzipped and (if the brotli package is
+installed) brotli-compressed, with the time each compression takes.
+
+    python benchmarks/bench_serialization.py
+    python benchmarks/bench_serialization.py --mentions 50000 --repeat 3 --json results.json
+"""
+
+import argparse
+import gzip
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from src.models import user  # noqa: E402,F401  register the User mapper
+from src.models.mention import BrandMention  # noqa: E402
+from src.responses import ORJSONResponse  # noqa: E402
+from src.routes.brands import BrandMentionsResponse, brand_mentions_json  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PROVIDERS = ["openai", "anthropic", "google", "meta-llama", "mistralai"]
+LABELS = ["very_positive", "positive", "neutral", "negative", "very_negative"]
+WORDS = ("Tesla leads the EV market with its Supercharger network while Ford and GM compete on price "
+         "range reliability and dealer support according to recent reviews").split()
+
+def make_mentions(count: int, seed: int) -> List[BrandMention]:
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    mentions = []
+    for i in range(count):
+        created = start + timedelta(minutes=i)
+        mentions.append(BrandMention(
+            id=i + 1, brand_id=1,
+            content=" ".join(rng.choices(WORDS, k=rng.randint(12, 40))),
+            context=" ".join(rng.choices(WORDS, k=rng.randint(20, 60))),
+            provider=rng.choice(PROVIDERS),
+            sentiment_score=rng.randint(1, 5), sentiment_label=rng.choice(LABELS),
+            confidence=round(rng.random(), 3),
+            source_urls=[f"https://example.com/review/{rng.randint(1, 500)}" for _ in range(rng.randint(0, 3))],
+            keywords_found=rng.sample(WORDS, 3),
+            occurrence_count=rng.randint(1, 4), seen_providers=rng.sample(PROVIDERS, 2),
+            created_at=created, last_seen_at=created + timedelta(hours=1),
+        ))
+    return mentions
+
+def legacy_body(mentions) -> bytes:
+    return JSONResponse(jsonable_encoder({"brand_name": "Tesla", "total_mentions": len(mentions), "mentions": mentions})).body
+
+def schema_json_body(mentions) -> bytes:
+    model = BrandMentionsResponse(brand_name="Tesla", total_mentions=len(mentions), mentions=mentions)
+    return JSONResponse(model.model_dump(mode="json")).body
+
+def schema_orjson_body(mentions) -> bytes:
+    model = BrandMentionsResponse(brand_name="Tesla", total_mentions=len(mentions), mentions=mentions)
+    return ORJSONResponse(model.model_dump(mode="json")).body
+
+def dump_json_body(mentions) -> bytes:
+    return brand_mentions_json("Tesla", mentions)
+
+CASES = {
+    "orm+jsonable_encoder+json": legacy_body,
+    "schema+json": schema_json_body,
+    "schema+orjson": schema_orjson_body,
+    "schema dump_json": dump_json_body,
+}
+
+def best_of(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON serialization and compression of mention responses")
+    parser.add_argument("--mentions", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5, help="Best of this many runs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    mentions = make_mentions(args.mentions, args.seed)
+    results = {"mentions": args.mentions, "serialization": [], "compression": []}
+
+    print(f"{args.mentions} mentions, best of {args.repeat}")
+    print(f"{'serializer':<28}{'ms':>10}{'bytes':>12}{'speedup':>9}")
+    baseline = None
+    for name, fn in CASES.items():
+        seconds, body = best_of(lambda: fn(mentions), args.repeat)
+        baseline = baseline or seconds
+        json.loads(body)  # every case must produce valid JSON
+        results["serialization"].append({"case": name, "ms": round(seconds * 1000, 2), "bytes": len(body)})
+        print(f"{name:<28}{seconds * 1000:>10.1f}{len(body):>12}{baseline / seconds:>8.1f}x")
+
+    body = dump_json_body(mentions)
+    compressors = {"gzip-5": lambda: gzip.compress(body, compresslevel=5), "gzip-9": lambda: gzip.compress(body, compresslevel=9)}
+    if brotli is not None:
+        compressors["brotli-4"] = lambda: brotli.compress(body, quality=4)
+        compressors["brotli-11"] = lambda: brotli.compress(body, quality=11)
+    print(f"\n{'encoding':<28}{'ms':>10}{'bytes':>12}{'ratio':>9}")
+    print(f"{'identity':<28}{0.0:>10.1f}{len(body):>12}{1.0:>8.1f}x")
+    for name, fn in compressors.items():
+        seconds, compressed = best_of(fn, args.repeat)
+        results["compression"].append({"encoding": name, "ms": round(seconds * 1000, 2), "bytes": len(compressed)})
+        print(f"{name:<28}{seconds * 1000:>10.1f}{len(compressed):>12}{len(body) / len(compressed):>8.1f}x")
+    if brotli is None:
+        print("(install brotli to include it)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
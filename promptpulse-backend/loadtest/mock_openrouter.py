@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenRouter chat completions API.
+
+Implements POST /api/v1/chat/completions (plain JSON and `stream: true` SSE)
+with per-model latency distributions, error rates, 429 responses and canned
+response corpora, so load tests run offline and reproducibly.
+
+Usage:
+    python loadtest/mock_openrouter.py --port 8099 --config loadtest/mock_config.example.json
+    OPENROUTER_BASE_URL=http://127.0.0.1:8099/api/v1 uvicorn src.main:app
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+DEFAULT_CORPUS = [
+    "When it comes to the best electric vehicles, Tesla is the top choice for most buyers thanks to its Supercharger network and over-the-air updates.\n\n"
+    "Ford offers a strong alternative with the Mustang Mach-E and F-150 Lightning, while GM is catching up with the Ultium platform.\n\n"
+    "According to Consumer Reports, Rivian leads in adventure-oriented trucks but has limited service coverage. Source: https://www.consumerreports.org/cars/electric-vehicles/",
+    "Ford leads the electric truck segment with the F-150 Lightning, which offers impressive towing capacity.\n\n"
+    "Tesla's Cybertruck is innovative but has faced production delays and concerns about build quality.\n\n"
+    "GM and Rivian remain popular choices; research from the EPA shows range varies by 20% in cold weather. https://www.fueleconomy.gov/",
+    "There is no single best option. Mercedes and BMW deliver luxury EVs with excellent interiors, while Tesla is known for efficient drivetrains.\n\n"
+    "Buyers frequently report issues with dealer availability for Rivian. According to J.D. Power, charging reliability is the top concern for 2024 buyers.",
+]
+
+DEFAULT_GRADE = json.dumps({
+    "overall_grade": "B",
+    "numerical_score": 78,
+    "authority_score": 72,
+    "relevance_score": 84,
+    "completeness_score": 70,
+    "strengths": ["Clear structure", "Relevant examples", "Concise language"],
+    "weaknesses": ["Few citations", "Limited competitor comparison", "No data points"],
+    "recommendations": ["Cite authoritative sources", "Add a comparison table", "Include 2024 statistics"],
+    "keyword_analysis": {"primary_keywords": ["electric vehicle"], "missing_keywords": ["charging cost"]},
+    "competitive_analysis": "Positions well against Ford and GM but omits pricing."
+})
+
+@dataclass
+class ModelProfile:
+    """Behaviour of one mocked model"""
+    latency: Dict = field(default_factory=lambda: {"type": "lognormal", "median_ms": 800, "p95_ms": 2500})
+    error_rate: float = 0.0  # fraction of requests answered with a 500
+    rate_limit_rate: float = 0.0  # fraction of requests answered with a 429
+    retry_after: float = 1.0  # seconds, sent with every 429
+    corpus: List[str] = field(default_factory=lambda: list(DEFAULT_CORPUS))
+    stream_chunks: int = 20
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """Latency in seconds drawn from the configured distribution"""
+        kind = self.latency.get("type", "lognormal")
+        if kind == "fixed":
+            return self.latency["ms"] / 1000.0
+        if kind == "uniform":
+            return rng.uniform(self.latency["min_ms"], self.latency["max_ms"]) / 1000.0
+        # Lognormal parameterised by its median and 95th percentile
+        mu = math.log(self.latency["median_ms"])
+        sigma = max(0.0, (math.log(self.latency["p95_ms"]) - mu) / 1.645)
+        return rng.lognormvariate(mu, sigma) / 1000.0
+
+def load_profiles(config: Optional[Dict]) -> Dict[str, ModelProfile]:
+    """Build model profiles from a config dict; the "*" profile is the fallback"""
+    config = config or {}
+    profiles = {"*": ModelProfile()}
+    for model, options in config.get("models", {}).items():
+        options = dict(options)
+        corpus_file = options.pop("corpus_file", None)
+        if corpus_file:
+            with open(corpus_file) as f:
+                options["corpus"] = [line for line in f.read().split("\n---\n") if line.strip()]
+        profiles[model] = ModelProfile(**options)
+    return profiles
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, int(len(text.split()) * 1.3))
+
+class MockOpenRouter:
+    def __init__(self, profiles: Dict[str, ModelProfile], seed: Optional[int] = None):
+        self.profiles = profiles
+        self.rng = random.Random(seed)
+        self.requests_served = 0
+
+    def profile_for(self, model: str) -> ModelProfile:
+        return self.profiles.get(model) or self.profiles["*"]
+
+    def _pick_content(self, profile: ModelProfile, messages: List[Dict]) -> str:
+        prompt = messages[-1]["content"] if messages else ""
+        if "JSON response" in prompt or "JSON object" in prompt:
+            return DEFAULT_GRADE
+        return self.rng.choice(profile.corpus)
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        model = body.get("model", "unknown")
+        profile = self.profile_for(model)
+        self.requests_served += 1
+
+        roll = self.rng.random()
+        if roll < profile.rate_limit_rate:
+            return web.json_response(
+                {"error": {"code": 429, "message": "Rate limit exceeded"}},
+                status=429,
+                headers={"Retry-After": str(profile.retry_after)}
+            )
+        if roll < profile.rate_limit_rate + profile.error_rate:
+            await asyncio.sleep(profile.sample_latency(self.rng) / 4)
+            return web.json_response({"error": {"code": 500, "message": "Upstream error"}}, status=500)
+
+        content = self._pick_content(profile, body.get("messages", []))
+        prompt_tokens = sum(_estimate_tokens(m.get("content", "")) for m in body.get("messages", []))
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": _estimate_tokens(content),
+            "total_tokens": prompt_tokens + _estimate_tokens(content),
+        }
+        latency = profile.sample_latency(self.rng)
+        completion_id = f"gen-{uuid.uuid4().hex[:16]}"
+
+        if body.get("stream"):
+            return await self._stream(request, model, content, usage, latency, profile, completion_id)
+
+        await asyncio.sleep(latency)
+        return web.json_response({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    async def _stream(self, request, model, content, usage, latency, profile, completion_id):
+        """Server-sent events in OpenAI delta format; a third of the latency is time to first token"""
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+
+        words = content.split(" ")
+        chunk_count = max(1, min(profile.stream_chunks, len(words)))
+        per_chunk = math.ceil(len(words) / chunk_count)
+        await asyncio.sleep(latency / 3)
+
+        for i in range(0, len(words), per_chunk):
+            piece = " ".join(words[i:i + per_chunk]) + (" " if i + per_chunk < len(words) else "")
+            event = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+            }
+            await response.write(f"data: {json.dumps(event)}\n\n".encode())
+            await asyncio.sleep(latency * 2 / 3 / chunk_count)
+
+        final = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+        await response.write(f"data: {json.dumps(final)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+def create_app(config: Optional[Dict] = None, seed: Optional[int] = None) -> web.Application:
+    mock = MockOpenRouter(load_profiles(config), seed=seed)
+    app = web.Application()
+    app["mock"] = mock
+    app.router.add_post("/api/v1/chat/completions", mock.chat_completions)
+    return app
+
+async def start_server(config: Optional[Dict] = None, host: str = "127.0.0.1", port: int = 0, seed: Optional[int] = None):
+    """Start the mock in the running loop; returns (runner, base_url)"""
+    runner = web.AppRunner(create_app(config, seed=seed))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}/api/v1"
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenRouter server for offline load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--config", help="JSON file with per-model profiles")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = None
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+
+    web.run_app(create_app(config, seed=args.seed), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the OpenRouter-backed endpoints.
+
+Starts loadtest/mock_openrouter.py in-process, points the API at it through
+OPENROUTER_BASE_URL and drives /test-prompt, /search and /realtime-mentions
+through the ASGI app, then reports throughput and p50/p95/p99 latency. The API
+writes to a throwaway SQLite database unless --database-url is given, and the
+run fails if the app logs any errors.
+
+Usage:
+    python loadtest/run_load_test.py --requests 50 --concurrency 10
+    python loadtest/run_load_test.py --config loadtest/mock_config.example.json --json results.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_openrouter import start_server  # noqa: E402
+
+PROMPTS = [
+    "best electric vehicle",
+    "EV charging network",
+    "electric vehicle reliability",
+    "EV truck comparison",
+    "electric vehicle value",
+]
+
+SCENARIOS = {
+    "test-prompt": lambda i: ("POST", "/api/brands/test-prompt", {
+        "params": {"prompt": PROMPTS[i % len(PROMPTS)], "brand_name": "Tesla"}
+    }),
+    # Unique brand names keep the brand analysis cache from serving repeats
+    "search": lambda i: ("POST", "/api/brands/search", {
+        "json": {"brand_name": f"Tesla{i}", "keywords": ["electric vehicles", "charging"], "save_to_db": False}
+    }),
+    "realtime-mentions": lambda i: ("GET", "/api/brands/realtime-mentions", {
+        "params": {"brand_name": "Tesla"}
+    }),
+}
+
+class ErrorCounter(logging.Handler):
+    """Counts ERROR and above logged while the load runs; a request can succeed while its usage write fails"""
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+async def run_scenario(client, name, total_requests, concurrency):
+    build_request = SCENARIOS[name]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        method, path, kwargs = build_request(i)
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(total_requests)])
+    elapsed = time.perf_counter() - started
+
+    return {
+        "scenario": name,
+        "requests": total_requests,
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(total_requests / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+async def main_async(args):
+    config = None
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+
+    runner, base_url = await start_server(config, seed=args.seed)
+    os.environ.update({"OPENROUTER_BASE_URL": base_url, "DATABASE_URL": args.database_url})
+
+    # Import after the environment is set so settings pick up the mock and the database
+    import httpx
+    from src.database import upgrade_schema
+    from src.main import app
+    from src.models import brand, mention, prompt, usage, user  # noqa: F401  register every mapper
+    from src.services.brand_intelligence import brand_intelligence
+
+    upgrade_schema()
+    errors = ErrorCounter()
+    logging.getLogger().addHandler(errors)
+
+    # The engine's 10 calls/minute guard would turn most /search calls into rate-limited stubs
+    brand_intelligence.max_calls_per_minute = 10 ** 9
+
+    results = []
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=300) as client:
+            for name in args.scenarios:
+                results.append(await run_scenario(client, name, args.requests, args.concurrency))
+    finally:
+        logging.getLogger().removeHandler(errors)
+        await runner.cleanup()
+
+    header = f"{'scenario':<20}{'requests':>9}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['scenario']:<20}{r['requests']:>9}{r['errors']:>8}{r['throughput_rps']:>9}"
+              f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if errors.messages:
+        print(f"\n{len(errors.messages)} errors logged during the run, first: {errors.messages[0]}")
+        return 1
+    worst = max((r["errors"] / r["requests"] for r in results if r["requests"]), default=0.0)
+    return 1 if worst > args.max_error_rate else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test against a mock OpenRouter")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=30, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--database-url", help="Defaults to a throwaway SQLite file")
+    parser.add_argument("--config", help="Mock model profiles (see mock_config.example.json)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--max-error-rate", type=float, default=1.0,
+                        help="Exit non-zero if any scenario's HTTP error rate exceeds this")
+    args = parser.parse_args()
+    if not args.database_url:
+        args.database_url = f"sqlite:///{tempfile.mkdtemp(prefix='load-')}/load.db"
+    sys.exit(asyncio.run(main_async(args)))
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,148 @@
-from sqlalchemy import create_engine, MetaData
+import threading
+import time
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import create_engine, MetaData, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from .config import settings
+from .metrics import observe_pool_checkout, record_pool_timeout
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports checkout latency, queued checkouts and timeouts"""
+
+    label = "primary"
+
+    def _do_get(self):
+        with observe_pool_checkout(self.label):
+            try:
+                return super()._do_get()
+            except PoolTimeoutError:
+                record_pool_timeout(self.label)
+                raise
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.label = self.label
+        return pool
+
+def _create_engine(url: str, label: str):
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return create_engine(url)  # in-memory SQLite keeps its single-connection pool
+    created = create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    created.pool.label = label
+    return created
 
-engine = create_engine(settings.database_url)
+engine = _create_engine(settings.database_url, "primary")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Read-only endpoints use the replica when DATABASE_READ_URL is set, otherwise the primary
+read_engine = _create_engine(settings.database_read_url, "replica") if settings.database_read_url else engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Read-your-writes: a client that just wrote, or a brand whose analysis was just
+# saved in this process, reads from the primary until the replica has caught up
+READ_PRIMARY_COOKIE = "pp_read_primary_until"
+_recent_writes: Dict[int, float] = {}
+_recent_writes_lock = threading.Lock()
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+def get_read_db(request: Request):
+    """Session for GET endpoints: the read replica unless this request must see a recent write"""
+    factory = ReadSessionLocal if read_engine is not engine and not _needs_primary(request) else SessionLocal
+    db = factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def _needs_primary(request: Request) -> bool:
+    try:
+        if float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    try:
+        brand_id = int(request.path_params.get("brand_id") or request.query_params["brand_id"])
+    except (KeyError, ValueError):
+        return False
+    with _recent_writes_lock:
+        return _recent_writes.get(brand_id, 0.0) > time.monotonic()
+
+def mark_written(response: Optional[Response] = None, brand_id: Optional[int] = None):
+    """Route the writer's next reads to the primary for READ_YOUR_WRITES_SECONDS
+
+    `response` tags the calling client with a cookie; `brand_id` covers writes that
+    finish later, in a background task or the scheduler, for every client of this process.
+    """
+    window = settings.read_your_writes_seconds
+    if read_engine is engine or window <= 0:
+        return
+    if response is not None:
+        response.set_cookie(
+            READ_PRIMARY_COOKIE, f"{time.time() + window:.0f}", max_age=int(window) + 1, httponly=True, samesite="lax"
+        )
+    if brand_id is not None:
+        now = time.monotonic()
+        with _recent_writes_lock:
+            _recent_writes[brand_id] = now + window
+            for stale in [key for key, until in _recent_writes.items() if until <= now]:
+                del _recent_writes[stale]
+
+def add_missing_columns(model, bind=None):
+    """ALTER TABLE ... ADD COLUMN for nullable columns a model gained after its table was created
+
+    There is no migration tool; this runs at startup and before jobs that depend
+    on a new column. A text server_default also fills existing rows. Indexes the
+    model declares are created if missing.
+    Returns the names of the columns added.
+    """
+    bind = bind or engine
+    table = model.__table__
+    existing = {column["name"] for column in inspect(bind).get_columns(table.name)}
+    added = []
+    with bind.begin() as conn:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable:
+                raise RuntimeError(f"{table.name}.{column.name} is NOT NULL; add it with a migration")
+            column_sql = f"{column.name} {column.type.compile(dialect=bind.dialect)}"
+            if column.server_default is not None:
+                column_sql += f" DEFAULT {column.server_default.arg.text}"
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_sql}"))
+            added.append(column.name)
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    return added
+
+def upgrade_schema():
+    """Create missing tables and add columns that models gained since their tables were created"""
+    from .models import brand, mention, prompt, usage, user  # noqa: F401  register every model
+    Base.metadata.create_all(engine)
+    added = {}
+    for model in (mention.BrandMention, prompt.PromptTestRecord, prompt.TrackedPrompt):
+        columns = add_missing_columns(model)
+        if columns:
+            added[model.__tablename__] = columns
+    return added
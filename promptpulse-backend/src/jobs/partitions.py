@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Manage the monthly created_at partitions of brand_mentions and prompt_test_results (Postgres).
+
+--convert turns the plain tables into partitioned ones. It takes an exclusive lock
+on each table while it indexes the existing rows, so run it once in a maintenance
+window. Afterwards the app creates upcoming months at startup, and so does the
+retention job. Running this without flags does the same and lists the partitions.
+
+    python -m src.jobs.partitions --convert
+    python -m src.jobs.partitions --months-ahead 6
+    python -m src.jobs.partitions --detach-before 2026-01-01 --table prompt_test_results
+"""
+
+import argparse
+import logging
+from datetime import datetime, timezone
+
+from ..config import settings
+from ..database import upgrade_schema
+from ..services.partition_manager import PARTITIONED_TABLES, PartitionManager
+
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="Create, convert and detach monthly table partitions")
+    parser.add_argument("--convert", action="store_true", help="Partition tables that are not partitioned yet")
+    parser.add_argument("--months-ahead", type=int, default=settings.partition_months_ahead)
+    parser.add_argument("--detach-before", type=datetime.fromisoformat,
+                        help="Detach (not drop) partitions that end on or before this date")
+    parser.add_argument("--table", choices=PARTITIONED_TABLES, action="append",
+                        help="Limit --convert/--detach-before to these tables")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    manager = PartitionManager(months_ahead=args.months_ahead)
+    if not manager.supported:
+        parser.exit(1, "Partitioning needs PostgreSQL; DATABASE_URL points elsewhere\n")
+
+    upgrade_schema()
+    tables = args.table or PARTITIONED_TABLES
+    if args.convert:
+        for table in tables:
+            if not manager.convert(table):
+                logger.info(f"{table} is already partitioned")
+    manager.ensure_partitions()
+    if args.detach_before:
+        cutoff = args.detach_before
+        if cutoff.tzinfo is None:
+            cutoff = cutoff.replace(tzinfo=timezone.utc)
+        for table in tables:
+            manager.detach_expired(table, cutoff)
+
+    for table, partitions in manager.describe().items():
+        logger.info(f"{table}: {', '.join(partitions)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Re-score stored prompt test responses with the current analyzer.
+
+Changing the ranking or sentiment heuristics means bumping ANALYZER_VERSION
+(src/services/analysis_memo.py). This job then streams every stored response
+scored by an older version out of prompt_test_results in id order. It re-scores
+them on a process pool and writes the scores back in bulk, with no API calls.
+Progress is checkpointed after every chunk, so an interrupted run picks up where
+it stopped:
+
+    python -m src.jobs.reanalyze
+    python -m src.jobs.reanalyze --workers 8 --chunk-size 10000
+    python -m src.jobs.reanalyze --restart  # ignore the checkpoint
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import or_, select, update
+
+from ..database import SessionLocal, add_missing_columns
+from ..models import mention, user  # noqa: F401  Brand's relationships need every mapper registered
+from ..models.brand import Brand
+from ..models.prompt import PromptTestRecord, TrackedPrompt
+from ..services.analysis_memo import ANALYZER_VERSION
+
+logger = logging.getLogger(__name__)
+
+# (id, response, brand name, tracked prompt competitors)
+Row = Tuple[int, str, str, Optional[List[str]]]
+
+_analyzer = None
+
+def _score_batch(rows: List[Row]) -> List[Dict[str, Any]]:
+    """Worker: analyze a batch of stored responses; returns bulk-update mappings"""
+    global _analyzer
+    if _analyzer is None:
+        from ..services.openrouter_service import OpenRouterService
+        _analyzer = OpenRouterService()
+    from ..services.openrouter_service import DEFAULT_COMPETITORS
+
+    mappings = []
+    for record_id, response, brand_name, competitors in rows:
+        analysis = _analyzer._compute_analysis(response, brand_name, competitors or DEFAULT_COMPETITORS)
+        mappings.append({
+            "id": record_id,
+            "rank_position": analysis["rank_position"],
+            "sentiment_score": analysis["sentiment_score"],
+            "confidence": analysis["confidence"],
+            "brand_mentions": analysis["brand_mentions"],
+            "competitor_mentions": analysis["competitor_mentions"],
+            "citations": analysis["citations"],
+            "analyzer_version": ANALYZER_VERSION
+        })
+    return mappings
+
+class Checkpoint:
+    """Last fully written id for the current analyzer version, kept in a JSON file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.last_id = 0
+        self.rescored = 0
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            state = json.load(f)
+        # A checkpoint from an older analyzer says nothing about this run
+        if state.get("analyzer_version") == ANALYZER_VERSION:
+            self.last_id = state["last_id"]
+            self.rescored = state["rescored"]
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"analyzer_version": ANALYZER_VERSION, "last_id": self.last_id, "rescored": self.rescored}, f)
+        os.replace(tmp_path, self.path)
+
+def _fetch_chunk(db, after_id: int, chunk_size: int) -> List[Row]:
+    query = (
+        select(PromptTestRecord.id, PromptTestRecord.response, Brand.name, TrackedPrompt.competitors)
+        .join(Brand, Brand.id == PromptTestRecord.brand_id)
+        .outerjoin(TrackedPrompt, TrackedPrompt.id == PromptTestRecord.tracked_prompt_id)
+        .where(
+            PromptTestRecord.id > after_id,
+            PromptTestRecord.response.is_not(None),
+            ~PromptTestRecord.response.startswith("Error: "),  # failed calls have nothing to score
+            or_(PromptTestRecord.analyzer_version.is_(None), PromptTestRecord.analyzer_version < ANALYZER_VERSION)
+        )
+        .order_by(PromptTestRecord.id)
+        .limit(chunk_size)
+    )
+    return [tuple(row) for row in db.execute(query)]
+
+def reanalyze(
+    chunk_size: int = 5000,
+    batch_size: int = 500,
+    workers: Optional[int] = None,
+    checkpoint_path: str = "reanalyze.checkpoint.json",
+    restart: bool = False
+) -> int:
+    """Re-score every stale row; returns the number re-scored in this run"""
+    added = add_missing_columns(PromptTestRecord)
+    if added:
+        logger.info(f"Added columns to prompt_test_results: {added}")
+
+    checkpoint = Checkpoint(checkpoint_path)
+    if not restart:
+        checkpoint.load()
+    start_id, start_count = checkpoint.last_id, checkpoint.rescored
+    started = time.monotonic()
+
+    db = SessionLocal()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunk = _fetch_chunk(db, checkpoint.last_id, chunk_size)
+            while chunk:
+                futures = [pool.submit(_score_batch, chunk[i:i + batch_size]) for i in range(0, len(chunk), batch_size)]
+                # Read the next chunk while the pool scores this one
+                next_chunk = _fetch_chunk(db, chunk[-1][0], chunk_size)
+
+                mappings = [mapping for future in futures for mapping in future.result()]
+                db.execute(update(PromptTestRecord), mappings)
+                db.commit()
+
+                checkpoint.last_id = chunk[-1][0]
+                checkpoint.rescored += len(mappings)
+                checkpoint.save()
+                rate = (checkpoint.rescored - start_count) / max(time.monotonic() - started, 1e-9)
+                logger.info(f"Re-scored {checkpoint.rescored} rows (through id {checkpoint.last_id}, {rate:,.0f} rows/s)")
+                chunk = next_chunk
+    finally:
+        db.close()
+
+    logger.info(f"Analyzer v{ANALYZER_VERSION} backfill complete from id {start_id}: "
+                f"{checkpoint.rescored - start_count} rows in {time.monotonic() - started:.1f}s")
+    return checkpoint.rescored - start_count
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score stored responses with the current analyzer version")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows read and written per transaction")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per process pool task")
+    parser.add_argument("--workers", type=int, help="Worker processes (defaults to the CPU count)")
+    parser.add_argument("--checkpoint", default="reanalyze.checkpoint.json")
+    parser.add_argument("--restart", action="store_true", help="Ignore any existing checkpoint")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    reanalyze(args.chunk_size, args.batch_size, args.workers, args.checkpoint, args.restart)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Roll old brand mentions into daily aggregates and move their raw text to cold storage.
+
+Mentions not seen for MENTION_RETENTION_DAYS are processed in small batches, in id order:
+
+1. The batch is appended to a gzip JSONL archive, one gzip member per batch,
+   and fsynced.
+2. In one short transaction, its counts are added to
+   brand_mention_daily_aggregates and its rows are deleted.
+
+Each transaction touches one batch, so locks are held only briefly. A pause
+between batches lets replication and autovacuum keep up.
+Aggregates and deletes commit together and are never double counted. The archive
+is written first, so a crash between the two can leave a batch archived twice;
+dedupe on "id" when restoring.
+
+On Postgres with a partitioned brand_mentions (python -m src.jobs.partitions --convert),
+monthly partitions that end before the cutoff are first detached whole. Rows in them
+that were merged into since the cutoff are moved back into brand_mentions (its DEFAULT
+partition), where the batches above retire them once they go quiet. The rest are
+archived and rolled up, and the partition is dropped in the same transaction as its
+aggregates, so nothing else is deleted row by row.
+
+    python -m src.jobs.retention
+    python -m src.jobs.retention --days 180 --batch-size 500 --pause 0.5
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, or_, select, text
+
+from ..config import settings
+from ..database import SessionLocal, upgrade_schema
+from ..models.mention import BrandMention, BrandMentionDailyAggregate
+from ..services.partition_manager import partition_manager
+
+logger = logging.getLogger(__name__)
+
+_ARCHIVED_COLUMNS = [
+    "id", "brand_id", "content", "context", "provider", "sentiment_score", "sentiment_label", "confidence",
+    "source_urls", "keywords_found", "occurrence_count", "seen_providers", "created_at", "last_seen_at"
+]
+
+def _fetch_batch(db, cutoff: datetime, after_id: int, batch_size: int) -> List[Dict[str, Any]]:
+    columns = [getattr(BrandMention, name) for name in _ARCHIVED_COLUMNS]
+    query = (
+        select(*columns)
+        .where(
+            BrandMention.id > after_id,
+            BrandMention.created_at < cutoff,
+            # Merged copies keep a mention alive while it is still being returned
+            or_(BrandMention.last_seen_at.is_(None), BrandMention.last_seen_at < cutoff)
+        )
+        .order_by(BrandMention.id)
+        .limit(batch_size)
+    )
+    return [dict(row._mapping) for row in db.execute(query)]
+
+def _archive(path: str, rows: List[Dict[str, Any]]):
+    lines = "".join(json.dumps(row, default=_json_default, separators=(",", ":")) + "\n" for row in rows)
+    with open(path, "ab") as raw:
+        # Each batch is its own gzip member; gzip readers stream them back as one file
+        with gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            f.write(lines.encode("utf-8"))
+        raw.flush()
+        os.fsync(raw.fileno())
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot archive {type(value).__name__}")
+
+def _rollup(rows: List[Dict[str, Any]]) -> Dict[Tuple[int, date, str], Dict[str, Any]]:
+    totals = defaultdict(lambda: {
+        "mention_count": 0, "row_count": 0, "sentiment_sum": 0.0, "confidence_sum": 0.0,
+        "sentiment_distribution": defaultdict(int)
+    })
+    for row in rows:
+        count = row["occurrence_count"] or 1
+        bucket = totals[(row["brand_id"], row["created_at"].date(), row["provider"])]
+        bucket["mention_count"] += count
+        bucket["row_count"] += 1
+        bucket["sentiment_sum"] += row["sentiment_score"] * count
+        bucket["confidence_sum"] += row["confidence"] * count
+        bucket["sentiment_distribution"][row["sentiment_label"]] += count
+    return totals
+
+def _apply_rollup(db, totals: Dict[Tuple[int, date, str], Dict[str, Any]]):
+    for (brand_id, day, provider), bucket in totals.items():
+        aggregate = db.query(BrandMentionDailyAggregate).filter_by(
+            brand_id=brand_id, day=day, provider=provider
+        ).with_for_update().first()
+        if aggregate is None:
+            aggregate = BrandMentionDailyAggregate(
+                brand_id=brand_id, day=day, provider=provider,
+                mention_count=0, row_count=0, sentiment_sum=0.0, confidence_sum=0.0, sentiment_distribution={}
+            )
+            db.add(aggregate)
+        aggregate.mention_count += bucket["mention_count"]
+        aggregate.row_count += bucket["row_count"]
+        aggregate.sentiment_sum += bucket["sentiment_sum"]
+        aggregate.confidence_sum += bucket["confidence_sum"]
+        distribution = dict(aggregate.sentiment_distribution or {})
+        for label, count in bucket["sentiment_distribution"].items():
+            distribution[label] = distribution.get(label, 0) + count
+        aggregate.sentiment_distribution = distribution  # reassign so the JSON change is flushed
+
+def _merge_totals(into, totals):
+    for key, bucket in totals.items():
+        target = into[key]
+        for field in ("mention_count", "row_count", "sentiment_sum", "confidence_sum"):
+            target[field] += bucket[field]
+        for label, count in bucket["sentiment_distribution"].items():
+            target["sentiment_distribution"][label] += count
+
+def _retire_partitions(db, cutoff: datetime, archive_path: str, batch_size: int) -> int:
+    """Archive, roll up and drop the brand_mentions partitions that end before `cutoff`"""
+    table = BrandMention.__tablename__
+    partition_manager.detach_expired(table, cutoff)
+    # Also picks up partitions detached by an earlier run that stopped before dropping them
+    retired = partition_manager.detached(db.connection(), table)
+    db.commit()
+
+    removed = 0
+    columns = ", ".join(column.name for column in BrandMention.__table__.columns)
+    for name in retired:
+        # Same rule as _fetch_batch: a mention seen since the cutoff stays. Move and delete in
+        # one transaction so a rerun neither loses nor duplicates it
+        partition_manager.ensure_default(db.connection(), table)
+        kept = db.execute(text(
+            f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {name} WHERE last_seen_at >= :cutoff"
+        ), {"cutoff": cutoff}).rowcount
+        db.execute(text(f"DELETE FROM {name} WHERE last_seen_at >= :cutoff"), {"cutoff": cutoff})
+        db.commit()
+        if kept:
+            logger.info(f"Retention: kept {kept} recently seen mentions from {name}")
+
+        totals = _rollup([])
+        last_id = 0
+        while True:
+            rows = [dict(row._mapping) for row in db.execute(
+                text(f"SELECT {', '.join(_ARCHIVED_COLUMNS)} FROM {name} WHERE id > :after ORDER BY id LIMIT :limit")
+                # Typed like the row path, so JSON and timestamps decode on every backend
+                .columns(*(BrandMention.__table__.c[column] for column in _ARCHIVED_COLUMNS)),
+                {"after": last_id, "limit": batch_size}
+            )]
+            db.commit()
+            if not rows:
+                break
+            _archive(archive_path, rows)
+            _merge_totals(totals, _rollup(rows))
+            last_id = rows[-1]["id"]
+            removed += len(rows)
+        _apply_rollup(db, totals)
+        db.execute(text(f"DROP TABLE {name}"))
+        db.commit()
+        logger.info(f"Retention: dropped partition {name}")
+    return removed
+
+def run_retention(
+    days: int = settings.mention_retention_days,
+    batch_size: int = 1000,
+    archive_dir: str = settings.mention_archive_dir,
+    pause: float = 0.1,
+    max_batches: Optional[int] = None
+) -> int:
+    """Archive, roll up and delete mentions older than `days`; returns the number of rows removed"""
+    upgrade_schema()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    os.makedirs(archive_dir, exist_ok=True)
+    archive_path = os.path.join(
+        archive_dir, f"brand_mentions-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}.jsonl.gz"
+    )
+
+    removed = batches = last_id = 0
+    started = time.monotonic()
+    db = SessionLocal()
+    try:
+        if partition_manager.supported:
+            removed += _retire_partitions(db, cutoff, archive_path, batch_size)
+            partition_manager.ensure_partitions()
+        while max_batches is None or batches < max_batches:
+            rows = _fetch_batch(db, cutoff, last_id, batch_size)
+            db.commit()  # end the read transaction before the slow archive write
+            if not rows:
+                break
+            _archive(archive_path, rows)
+
+            _apply_rollup(db, _rollup(rows))
+            db.execute(delete(BrandMention).where(BrandMention.id.in_([row["id"] for row in rows])))
+            db.commit()
+
+            last_id = rows[-1]["id"]
+            removed += len(rows)
+            batches += 1
+            logger.info(f"Retention: removed {removed} mentions (through id {last_id})")
+            if pause:
+                time.sleep(pause)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    if removed:
+        logger.info(f"Retention complete: {removed} mentions older than {days} days archived to "
+                    f"{archive_path} in {time.monotonic() - started:.1f}s")
+    else:
+        logger.info(f"Retention complete: no mentions older than {days} days")
+    return removed
+
+def main():
+    parser = argparse.ArgumentParser(description="Roll up, archive and delete old brand mentions")
+    parser.add_argument("--days", type=int, default=settings.mention_retention_days)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows archived and deleted per transaction")
+    parser.add_argument("--archive-dir", default=settings.mention_archive_dir)
+    parser.add_argument("--pause", type=float, default=0.1, help="Seconds to sleep between batches")
+    parser.add_argument("--max-batches", type=int, help="Stop after this many batches")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    run_retention(args.days, args.batch_size, args.archive_dir, args.pause, args.max_batches)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,44 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from .routes import auth, brands
+from .routes import auth, brands, usage, providers
+from .config import settings
+from .database import upgrade_schema
+from .services.mention_search import ensure_search_index
+from .services.partition_manager import partition_manager
+from .services.monitoring_scheduler import monitoring_scheduler
+from .services.cassette import cassette
+from .services.circuit_breaker import circuit_breakers
+from .metrics import HTTP_IN_FLIGHT
+from .responses import ORJSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy.exc import SQLAlchemyError
+import asyncio
+import logging
 import os
 from dotenv import load_dotenv
 load_dotenv()
 
-app = FastAPI(title="PromptPulse", version="1.0.0")
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # optional; gzip alone covers every client
+    BrotliMiddleware = None
+
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="PromptPulse", version="1.0.0", default_response_class=ORJSONResponse)
+
+# Compress bodies above the threshold: Brotli when installed and accepted, otherwise gzip
+if BrotliMiddleware is not None:
+    app.add_middleware(
+        BrotliMiddleware, quality=settings.brotli_quality, minimum_size=settings.compression_minimum_size,
+        gzip_fallback=True
+    )
+else:
+    app.add_middleware(
+        GZipMiddleware, minimum_size=settings.compression_minimum_size, compresslevel=settings.gzip_level
+    )
 
 # Enable CORS
 app.add_middleware(
@@ -17,9 +49,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def track_in_flight_requests(request: Request, call_next):
+    with HTTP_IN_FLIGHT.track_inprogress():
+        return await call_next(request)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(brands.router)
+app.include_router(usage.router)
+app.include_router(providers.router)
+
+@app.on_event("startup")
+async def upgrade_database_schema():
+    try:
+        added = upgrade_schema()
+        ensure_search_index()
+        partition_manager.ensure_partitions()
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not check the database schema: {e}")
+        return
+    for table, columns in added.items():
+        logger.info(f"Added columns to {table}: {columns}")
+
+@app.on_event("startup")
+async def start_monitoring_scheduler():
+    if settings.monitoring_enabled:
+        monitoring_scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_monitoring_scheduler():
+    await monitoring_scheduler.stop()
+
+@app.on_event("shutdown")
+async def close_cassette():
+    await asyncio.to_thread(cassette.close)
 
 # Mount static files for frontend
 if os.path.exists("../promptpulse-frontend/dist"):
@@ -31,7 +95,17 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "PromptPulse"}
+    # Degraded, not down: requests still succeed against the remaining models
+    return {
+        "status": "degraded" if circuit_breakers.any_open() else "healthy",
+        "service": "PromptPulse",
+        "circuits": circuit_breakers.states()
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 @app.get("/api/demo")
 async def demo_data():
@@ -0,0 +1,202 @@
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+
+# OpenRouter upstream calls
+OPENROUTER_LATENCY = Histogram(
+    "promptpulse_openrouter_request_seconds",
+    "Wall-clock latency of OpenRouter chat completion calls",
+    ["provider", "model", "endpoint"],
+    buckets=(0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+)
+OPENROUTER_ERRORS = Counter(
+    "promptpulse_openrouter_errors_total",
+    "Failed OpenRouter calls by error kind (http_<status> or exception)",
+    ["provider", "model", "endpoint", "kind"]
+)
+OPENROUTER_TIMEOUTS = Counter(
+    "promptpulse_openrouter_timeouts_total",
+    "OpenRouter calls that timed out",
+    ["provider", "model", "endpoint"]
+)
+OPENROUTER_RETRIES = Counter(
+    "promptpulse_openrouter_retries_total",
+    "OpenRouter calls retried after a retryable failure",
+    ["provider", "model", "endpoint", "reason"]
+)
+OPENROUTER_HEDGES = Counter(
+    "promptpulse_openrouter_hedged_requests_total",
+    "Hedge requests sent after a model exceeded its p95 latency, by which request won",
+    ["provider", "model", "winner"]
+)
+OPENROUTER_CIRCUIT_STATE = Gauge(
+    "promptpulse_openrouter_circuit_state",
+    "Per-model circuit breaker state (0 closed, 1 half-open, 2 open)",
+    ["provider", "model"]
+)
+OPENROUTER_CIRCUIT_REJECTIONS = Counter(
+    "promptpulse_openrouter_circuit_rejections_total",
+    "Calls failed fast because the model's circuit was open",
+    ["provider", "model"]
+)
+OPENROUTER_IN_FLIGHT = Gauge(
+    "promptpulse_openrouter_in_flight_requests",
+    "OpenRouter calls currently awaiting a response",
+    ["provider", "model"]
+)
+
+# Our own request handling
+HTTP_IN_FLIGHT = Gauge(
+    "promptpulse_http_requests_in_flight",
+    "API requests currently being served"
+)
+CACHE_REQUESTS = Counter(
+    "promptpulse_cache_requests_total",
+    "Cache lookups by cache name and result (hit or miss)",
+    ["cache", "result"]
+)
+MENTIONS_STORED = Counter(
+    "promptpulse_mentions_stored_total",
+    "Mentions saved, by whether they became a new row or were merged into a near-duplicate",
+    ["result"]
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "promptpulse_db_pool_checkout_seconds",
+    "Time to get a connection from the pool, including waiting for a free one",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+)
+DB_POOL_WAITING = Gauge(
+    "promptpulse_db_pool_checkouts_waiting",
+    "Checkouts in progress, i.e. callers queued for a connection",
+    ["pool"]
+)
+DB_POOL_TIMEOUTS = Counter(
+    "promptpulse_db_pool_timeouts_total",
+    "Checkouts that gave up after DB_POOL_TIMEOUT (the QueuePool limit error)",
+    ["pool"]
+)
+STRUCTURED_OUTPUT_RESULTS = Counter(
+    "promptpulse_structured_output_results_total",
+    "JSON replies by outcome: valid first time, repaired by re-asking for bad fields, or still invalid",
+    ["endpoint", "result"]
+)
+STRUCTURED_OUTPUT_INVALID_FIELDS = Counter(
+    "promptpulse_structured_output_invalid_fields_total",
+    "Fields that were missing or failed validation in a JSON reply, including repair attempts",
+    ["endpoint", "field"]
+)
+ANALYSIS_CPU_SECONDS = Histogram(
+    "promptpulse_analysis_cpu_seconds",
+    "CPU time spent analysing model responses",
+    ["stage"],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+)
+
+def provider_of(model: str) -> str:
+    """OpenRouter model ids are vendor-prefixed, e.g. openai/gpt-4"""
+    return model.split("/", 1)[0]
+
+@contextmanager
+def observe_openrouter_call(model: str, endpoint: str):
+    """Time one OpenRouter call and keep the in-flight gauge current"""
+    provider = provider_of(model)
+    in_flight = OPENROUTER_IN_FLIGHT.labels(provider=provider, model=model)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        OPENROUTER_LATENCY.labels(provider=provider, model=model, endpoint=endpoint).observe(time.perf_counter() - start)
+        in_flight.dec()
+
+def record_openrouter_error(model: str, endpoint: str, kind: str):
+    OPENROUTER_ERRORS.labels(provider=provider_of(model), model=model, endpoint=endpoint, kind=kind).inc()
+
+def record_openrouter_timeout(model: str, endpoint: str):
+    OPENROUTER_TIMEOUTS.labels(provider=provider_of(model), model=model, endpoint=endpoint).inc()
+
+def record_openrouter_retry(model: str, endpoint: str, reason: str):
+    OPENROUTER_RETRIES.labels(provider=provider_of(model), model=model, endpoint=endpoint, reason=reason).inc()
+
+def record_openrouter_hedge(model: str, winner: str):
+    OPENROUTER_HEDGES.labels(provider=provider_of(model), model=model, winner=winner).inc()
+
+_CIRCUIT_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+def set_circuit_state(model: str, state: str):
+    OPENROUTER_CIRCUIT_STATE.labels(provider=provider_of(model), model=model).set(_CIRCUIT_STATE_VALUES[state])
+
+def record_circuit_rejection(model: str):
+    OPENROUTER_CIRCUIT_REJECTIONS.labels(provider=provider_of(model), model=model).inc()
+
+def record_mention_dedupe(added: int, merged: int):
+    MENTIONS_STORED.labels(result="added").inc(added)
+    MENTIONS_STORED.labels(result="merged").inc(merged)
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+def record_structured_output(endpoint: str, result: str):
+    STRUCTURED_OUTPUT_RESULTS.labels(endpoint=endpoint, result=result).inc()
+
+def record_invalid_fields(endpoint: str, fields):
+    for field in fields:
+        STRUCTURED_OUTPUT_INVALID_FIELDS.labels(endpoint=endpoint, field=field).inc()
+
+@contextmanager
+def observe_analysis_cpu(stage: str):
+    """Measure CPU (not wall) time of a synchronous analysis step on this thread"""
+    start = time.thread_time()
+    try:
+        yield
+    finally:
+        ANALYSIS_CPU_SECONDS.labels(stage=stage).observe(time.thread_time() - start)
+
+@contextmanager
+def observe_pool_checkout(pool: str):
+    """Time one pool checkout and count it as waiting while it runs"""
+    waiting = DB_POOL_WAITING.labels(pool=pool)
+    waiting.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        DB_POOL_CHECKOUT_SECONDS.labels(pool=pool).observe(time.perf_counter() - start)
+        waiting.dec()
+
+def record_pool_timeout(pool: str):
+    DB_POOL_TIMEOUTS.labels(pool=pool).inc()
+
+class DatabasePoolCollector:
+    """Reads SQLAlchemy pool usage at scrape time"""
+
+    stats = {
+        "size": "Configured pool size",
+        "checkedout": "Connections currently checked out",
+        "checkedin": "Idle connections in the pool",
+        "overflow": "Connections opened beyond the pool size",
+    }
+
+    def describe(self):
+        # Lets the registry check names without importing the engines (database imports this module)
+        for name, documentation in self.stats.items():
+            yield GaugeMetricFamily(f"promptpulse_db_pool_{name}", documentation, labels=["pool"])
+
+    def collect(self):
+        from .database import engine, read_engine
+
+        pools = {"primary": engine.pool}
+        if read_engine is not engine:
+            pools["replica"] = read_engine.pool
+        for name, documentation in self.stats.items():
+            gauge = GaugeMetricFamily(f"promptpulse_db_pool_{name}", documentation, labels=["pool"])
+            for label, pool in pools.items():
+                reader = getattr(pool, name, None)
+                if reader is not None:
+                    gauge.add_metric([label], reader())
+            yield gauge
+
+REGISTRY.register(DatabasePoolCollector())
@@ -28,3 +28,4 @@ class Brand(Base):
     trend_analyses = relationship("BrandTrendAnalysis", back_populates="brand")
     alerts = relationship("BrandAlert", back_populates="brand")
     source_tracking = relationship("BrandSourceTracking", back_populates="brand")
+    tracked_prompts = relationship("TrackedPrompt", back_populates="brand")
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float, JSON
-from sqlalchemy.sql import func
+from sqlalchemy import (Column, Integer, SmallInteger, BigInteger, String, Date, DateTime, ForeignKey, Text, Float,
+                        JSON, Index, UniqueConstraint)
+from sqlalchemy.sql import func, text
 from sqlalchemy.orm import relationship
 from ..database import Base
 
@@ -16,12 +17,51 @@ class BrandMention(Base):
     context = Column(Text)  # Shortened context
     provider = Column(String(50), nullable=False)  # openai, anthropic, google
     keywords_found = Column(JSON)  # List of keywords found
+    # Near-duplicate detection (see services/mention_dedupe.py): a 64-bit SimHash of the
+    # content, stored signed, plus its six 10-11 bit bands for exact-match candidate lookup
+    simhash = Column(BigInteger)
+    simhash_band_0 = Column(SmallInteger)
+    simhash_band_1 = Column(SmallInteger)
+    simhash_band_2 = Column(SmallInteger)
+    simhash_band_3 = Column(SmallInteger)
+    simhash_band_4 = Column(SmallInteger)
+    simhash_band_5 = Column(SmallInteger)
+    occurrence_count = Column(Integer, server_default=text("1"))  # copies merged into this row
+    seen_providers = Column(JSON)  # every provider that returned this mention
+    last_seen_at = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationship to brand
     brand = relationship("Brand", back_populates="mentions")
 
+    __table_args__ = tuple(
+        Index(f"ix_brand_mentions_simhash_band_{band}", "brand_id", f"simhash_band_{band}")
+        for band in range(6)
+    ) + (
+        Index("ix_brand_mentions_created_at", "created_at"),  # retention scans
+    )
+
+class BrandMentionDailyAggregate(Base):
+    """Per-day rollup of mentions, kept after the retention job removes the raw rows"""
+    __tablename__ = "brand_mention_daily_aggregates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    brand_id = Column(Integer, ForeignKey("brands.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    provider = Column(String(50), nullable=False)
+    mention_count = Column(Integer, nullable=False, default=0)  # including merged near-duplicates
+    row_count = Column(Integer, nullable=False, default=0)  # distinct stored mentions rolled up
+    sentiment_sum = Column(Float, nullable=False, default=0.0)  # over mention_count; divide for the mean
+    confidence_sum = Column(Float, nullable=False, default=0.0)
+    sentiment_distribution = Column(JSON, nullable=False)  # label -> mention count
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("brand_id", "day", "provider", name="uq_brand_mention_daily_aggregates"),
+    )
+
 class BrandAnalysisReport(Base):
     __tablename__ = "brand_analysis_reports"
     
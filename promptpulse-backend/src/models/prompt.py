@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float, JSON
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from ..database import Base
+
+class TrackedPrompt(Base):
+    __tablename__ = "tracked_prompts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    brand_id = Column(Integer, ForeignKey("brands.id"), nullable=False, index=True)
+    prompt = Column(Text, nullable=False)
+    competitors = Column(JSON)  # List of competitor names to rank against
+    interval_hours = Column(Float)  # Overrides the global monitoring cadence when set
+    is_active = Column(Integer, default=1)  # 1 = active, 0 = paused
+    last_run_at = Column(DateTime(timezone=True))
+    next_run_at = Column(DateTime(timezone=True), index=True)  # set by the monitoring scheduler
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationships
+    brand = relationship("Brand", back_populates="tracked_prompts")
+    results = relationship("PromptTestRecord", back_populates="tracked_prompt")
+
+class PromptTestRecord(Base):
+    __tablename__ = "prompt_test_results"
+
+    id = Column(Integer, primary_key=True, index=True)
+    brand_id = Column(Integer, ForeignKey("brands.id"), nullable=False, index=True)
+    tracked_prompt_id = Column(Integer, ForeignKey("tracked_prompts.id"), index=True)
+    prompt = Column(Text, nullable=False)
+    provider = Column(String(50), nullable=False)  # CHATGPT, CLAUDE, GEMINI
+    model = Column(String(100))  # OpenRouter model id
+    response = Column(Text)  # Raw model response
+    rank_position = Column(Integer)
+    sentiment_score = Column(Float)
+    confidence = Column(Float)
+    response_time = Column(Float)  # Seconds
+    brand_mentions = Column(JSON)
+    competitor_mentions = Column(JSON)
+    citations = Column(JSON)
+    analyzer_version = Column(Integer, index=True)  # ANALYZER_VERSION that produced the scores above
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    # Relationships
+    brand = relationship("Brand")
+    tracked_prompt = relationship("TrackedPrompt", back_populates="results")
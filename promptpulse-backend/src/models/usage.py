@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, UniqueConstraint
+from sqlalchemy.sql import func
+from ..database import Base
+
+class UsageDaily(Base):
+    """OpenRouter calls, tokens and cost per day, brand, model and endpoint, shared by every worker"""
+    __tablename__ = "usage_daily"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    brand = Column(String(255), nullable=False)  # brand name, or _unattributed
+    model = Column(String(100), nullable=False)
+    endpoint = Column(String(100), nullable=False)
+    calls = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    cost = Column(Float, nullable=False, default=0.0)  # USD
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Leading (day, brand) also serves the daily budget lookup
+        UniqueConstraint("day", "brand", "model", "endpoint", name="uq_usage_daily"),
+    )
@@ -0,0 +1,17 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson: several times faster than json.dumps on large payloads
+
+    Defined here on purpose rather than imported from fastapi.responses: newer
+    FastAPI releases deprecate their ORJSONResponse, and this one does not warn.
+
+    Like FastAPI's own JSONResponse it receives content that jsonable_encoder has
+    already reduced to plain types; non-string dict keys are allowed.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -1,7 +1,20 @@
-from fastapi import APIRouter
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+
+from ..config import settings
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 
+def require_admin_token(authorization: Optional[str] = Header(None)):
+    """Dependency for operational endpoints: `Authorization: Bearer <ADMIN_API_TOKEN>`; refused when unset"""
+    if not settings.admin_api_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_API_TOKEN to enable them")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.admin_api_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
 @router.post("/login")
 async def login():
     return {
@@ -1,15 +1,24 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
+import asyncio
 import json
+import time
 
-from ..database import get_db
+from ..database import get_db, get_read_db, mark_written
 from ..models.brand import Brand
 from ..models.mention import BrandMention, BrandAnalysisReport
+from ..models.prompt import TrackedPrompt
 from ..services.brand_intelligence import brand_intelligence
 from ..services.openrouter_service import openrouter_service
+from ..services.deadline import Deadline
+from ..services.mention_dedupe import store_mentions
+from ..services.mention_search import search_mentions
+from ..services.usage_tracker import usage_tracker
+from ..services.http_cache import response_cache
+from ..services.request_timing import timing_scope, apply_server_timing
 
 router = APIRouter(prefix="/api/brands", tags=["brands"])
 
@@ -39,6 +48,46 @@ class BrandResponse(BaseModel):
     last_analysis_date: Optional[datetime]
     created_at: datetime
 
+class MentionResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    brand_id: int
+    content: str
+    context: Optional[str]
+    provider: str
+    sentiment_score: int
+    sentiment_label: str
+    confidence: float
+    source_urls: Optional[List[str]]
+    keywords_found: Optional[List[str]]
+    occurrence_count: Optional[int]
+    seen_providers: Optional[List[str]]
+    created_at: Optional[datetime]
+    last_seen_at: Optional[datetime]
+
+class BrandMentionsResponse(BaseModel):
+    brand_name: str
+    total_mentions: int
+    mentions: List[MentionResponse]
+
+class AnalysisReportResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    brand_id: int
+    total_mentions: int
+    sentiment_distribution: dict
+    visibility_score: float
+    analysis_metadata: Optional[dict]
+    search_keywords: Optional[List[str]]
+    providers_used: Optional[List[str]]
+    created_at: Optional[datetime]
+
+class BrandAnalysisResponse(BaseModel):
+    brand_name: str
+    analysis: AnalysisReportResponse
+
 class BrandSearchResponse(BaseModel):
     brand_name: str
     total_mentions: int
@@ -80,15 +129,46 @@ class BrandInfoResponse(BaseModel):
     name: str
     industry: str
     description: str
+    defaulted_fields: List[str] = []  # fields the model never got right, filled with placeholders
+
+class BulkBrandEntry(BaseModel):
+    brand_name: str
+    competitors: Optional[List[str]] = None
+
+class BulkPromptTestRequest(BaseModel):
+    prompt: str
+    brands: List[BulkBrandEntry]
+    timeout: Optional[float] = None
+
+class TrackedPromptCreate(BaseModel):
+    prompt: str
+    competitors: Optional[List[str]] = None
+    interval_hours: Optional[float] = None
+
+class TrackedPromptResponse(BaseModel):
+    id: int
+    brand_id: int
+    prompt: str
+    competitors: Optional[List[str]]
+    interval_hours: Optional[float]
+    is_active: int
+    last_run_at: Optional[datetime]
+
+_MENTION_COLUMNS = [getattr(BrandMention, name) for name in MentionResponse.model_fields]
+
+def brand_mentions_json(brand_name: str, mentions) -> bytes:
+    """Render a BrandMentionsResponse from ORM objects or rows; pydantic-core writes the JSON bytes directly"""
+    response = BrandMentionsResponse(brand_name=brand_name, total_mentions=len(mentions), mentions=mentions)
+    return response.__pydantic_serializer__.to_json(response)
 
 @router.get("/", response_model=List[BrandResponse])
-async def get_brands(db: Session = Depends(get_db)):
+def get_brands(db: Session = Depends(get_read_db)):
     """Get all brands for the user"""
     brands = db.query(Brand).filter(Brand.is_active == 1).all()
     return brands
 
 @router.post("/", response_model=BrandResponse)
-async def create_brand(brand: BrandCreate, db: Session = Depends(get_db)):
+def create_brand(brand: BrandCreate, response: Response, db: Session = Depends(get_db)):
     """Create a new brand"""
     db_brand = Brand(
         name=brand.name,
@@ -102,11 +182,12 @@ async def create_brand(brand: BrandCreate, db: Session = Depends(get_db)):
     db.add(db_brand)
     db.commit()
     db.refresh(db_brand)
+    mark_written(response, db_brand.id)
     
     return db_brand
 
-@router.get("/{brand_id}", response_model=BrandResponse)
-async def get_brand(brand_id: int, db: Session = Depends(get_db)):
+@router.get("/{brand_id:int}", response_model=BrandResponse)
+def get_brand(brand_id: int, db: Session = Depends(get_read_db)):
     """Get a specific brand by ID"""
     brand = db.query(Brand).filter(Brand.id == brand_id, Brand.is_active == 1).first()
     
@@ -119,15 +200,20 @@ async def get_brand(brand_id: int, db: Session = Depends(get_db)):
 async def search_brand_mentions(
     search_request: BrandSearchRequest, 
     background_tasks: BackgroundTasks,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """Search for brand mentions across AI platforms"""
+    if await usage_tracker.should_defer_async(search_request.brand_name):
+        raise HTTPException(status_code=429, detail=f"Daily budget exhausted for {search_request.brand_name}")
+    
     try:
-        # Perform the brand intelligence search
-        analysis = await brand_intelligence.search_brand_mentions(
-            search_request.brand_name, 
-            search_request.keywords
-        )
+        with timing_scope() as timings:
+            # Perform the brand intelligence search
+            analysis = await brand_intelligence.search_brand_mentions(
+                search_request.brand_name, 
+                search_request.keywords
+            )
         
         # Save to database if requested
         if search_request.save_to_db:
@@ -138,6 +224,7 @@ async def search_brand_mentions(
                 analysis,
                 search_request.keywords
             )
+            mark_written(response)
         
         # Convert mentions to dict format for response
         mentions_dict = []
@@ -154,6 +241,7 @@ async def search_brand_mentions(
                 "keywords_found": mention.keywords_found
             })
         
+        apply_server_timing(response, timings)
         return BrandSearchResponse(
             brand_name=analysis.brand_name,
             total_mentions=analysis.total_mentions,
@@ -166,46 +254,86 @@ async def search_brand_mentions(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
-@router.get("/{brand_id}/mentions")
-async def get_brand_mentions(brand_id: int, db: Session = Depends(get_db)):
-    """Get all mentions for a specific brand"""
+@router.get("/{brand_id}/mentions", response_model=BrandMentionsResponse)
+def get_brand_mentions(
+    brand_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Get all mentions for a specific brand, optionally limited to a created_at range"""
+    brand = db.query(Brand).filter(Brand.id == brand_id, Brand.is_active == 1).first()
+    
+    if not brand:
+        raise HTTPException(status_code=404, detail="Brand not found")
+    
+    # Plain rows of just the response columns; no ORM objects to hydrate
+    query = db.query(*_MENTION_COLUMNS).filter(BrandMention.brand_id == brand_id)
+    # created_at bounds let Postgres skip monthly partitions outside the range
+    if since:
+        query = query.filter(BrandMention.created_at >= since)
+    if until:
+        query = query.filter(BrandMention.created_at < until)
+    
+    return Response(content=brand_mentions_json(brand.name, query.all()), media_type="application/json")
+
+@router.get("/{brand_id}/mentions/search")
+def search_stored_mentions(
+    brand_id: int,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Full-text search over a brand's mentions, best matches first
+
+    `q` takes web-search syntax: words (all required), "quoted phrases", `or`, and `-word` to exclude.
+    """
     brand = db.query(Brand).filter(Brand.id == brand_id, Brand.is_active == 1).first()
     
     if not brand:
         raise HTTPException(status_code=404, detail="Brand not found")
     
-    mentions = db.query(BrandMention).filter(BrandMention.brand_id == brand_id).all()
+    total, results = search_mentions(db, brand_id, q, limit, offset, since, until)
     
     return {
         "brand_name": brand.name,
-        "total_mentions": len(mentions),
-        "mentions": mentions
+        "query": q,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "results": results
     }
 
-@router.get("/{brand_id}/analysis")
-async def get_brand_analysis(brand_id: int, db: Session = Depends(get_db)):
+@router.get("/{brand_id}/analysis", response_model=BrandAnalysisResponse)
+def get_brand_analysis(brand_id: int, request: Request, db: Session = Depends(get_read_db)):
     """Get latest analysis report for a brand"""
     brand = db.query(Brand).filter(Brand.id == brand_id, Brand.is_active == 1).first()
     
     if not brand:
         raise HTTPException(status_code=404, detail="Brand not found")
     
-    latest_analysis = db.query(BrandAnalysisReport).filter(
+    # Reports are never updated, so the latest id versions the response; the full row
+    # is only loaded when it changed
+    latest_id = db.query(BrandAnalysisReport.id).filter(
         BrandAnalysisReport.brand_id == brand_id
-    ).order_by(BrandAnalysisReport.created_at.desc()).first()
+    ).order_by(BrandAnalysisReport.created_at.desc(), BrandAnalysisReport.id.desc()).limit(1).scalar()
     
-    if not latest_analysis:
+    if latest_id is None:
         raise HTTPException(status_code=404, detail="No analysis found for this brand")
     
-    return {
-        "brand_name": brand.name,
-        "analysis": latest_analysis
-    }
+    return response_cache.respond(request, ("analysis", brand_id), (brand.name, latest_id), lambda: BrandAnalysisResponse(
+        brand_name=brand.name,
+        analysis=db.get(BrandAnalysisReport, latest_id)
+    ))
 
 @router.post("/{brand_id}/analyze")
-async def analyze_brand(
+def analyze_brand(
     brand_id: int, 
     background_tasks: BackgroundTasks,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """Trigger a new analysis for a specific brand"""
@@ -220,9 +348,47 @@ async def analyze_brand(
         db,
         brand
     )
+    mark_written(response)
     
     return {"message": f"Analysis started for {brand.name}", "brand_id": brand_id}
 
+@router.get("/{brand_id}/tracked-prompts", response_model=List[TrackedPromptResponse])
+def get_tracked_prompts(brand_id: int, db: Session = Depends(get_read_db)):
+    """List the prompts the monitoring scheduler re-tests for a brand"""
+    brand = db.query(Brand).filter(Brand.id == brand_id, Brand.is_active == 1).first()
+    
+    if not brand:
+        raise HTTPException(status_code=404, detail="Brand not found")
+    
+    return db.query(TrackedPrompt).filter(TrackedPrompt.brand_id == brand_id).all()
+
+@router.post("/{brand_id}/tracked-prompts", response_model=TrackedPromptResponse)
+def create_tracked_prompt(
+    brand_id: int,
+    tracked_prompt: TrackedPromptCreate,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    """Add a prompt to a brand's scheduled monitoring"""
+    brand = db.query(Brand).filter(Brand.id == brand_id, Brand.is_active == 1).first()
+    
+    if not brand:
+        raise HTTPException(status_code=404, detail="Brand not found")
+    
+    db_tracked_prompt = TrackedPrompt(
+        brand_id=brand_id,
+        prompt=tracked_prompt.prompt,
+        competitors=tracked_prompt.competitors,
+        interval_hours=tracked_prompt.interval_hours
+    )
+    
+    db.add(db_tracked_prompt)
+    db.commit()
+    db.refresh(db_tracked_prompt)
+    mark_written(response, brand_id)
+    
+    return db_tracked_prompt
+
 async def save_brand_analysis_to_db(
     db: Session, 
     brand_name: str, 
@@ -261,22 +427,11 @@ async def save_brand_analysis_to_db(
         )
         db.add(analysis_report)
         
-        # Save individual mentions
-        for mention in analysis.mentions:
-            db_mention = BrandMention(
-                brand_id=brand.id,
-                content=mention.content,
-                sentiment_score=mention.sentiment_score,
-                sentiment_label=mention.sentiment_label,
-                confidence=mention.confidence,
-                source_urls=mention.source_urls,
-                context=mention.context,
-                provider=mention.provider,
-                keywords_found=mention.keywords_found
-            )
-            db.add(db_mention)
+        # Save individual mentions, folding near-duplicates into existing rows
+        store_mentions(db, brand.id, analysis.mentions)
         
         db.commit()
+        mark_written(brand_id=brand.id)
         
     except Exception as e:
         db.rollback()
@@ -285,12 +440,12 @@ async def save_brand_analysis_to_db(
 async def run_brand_analysis(db: Session, brand: Brand):
     """Background task to run brand analysis"""
     try:
-        analysis = await brand_intelligence.search_brand_mentions(
-            brand.name, 
-            brand.keywords or []
-        )
+        brand_name, keywords = brand.name, brand.keywords or []
+        # End the read transaction so the connection goes back to the pool during the model calls
+        db.rollback()
+        analysis = await brand_intelligence.search_brand_mentions(brand_name, keywords)
         
-        await save_brand_analysis_to_db(db, brand.name, analysis, brand.keywords or [])
+        await save_brand_analysis_to_db(db, brand_name, analysis, keywords)
         
     except Exception as e:
         print(f"Error running brand analysis: {e}")
@@ -435,7 +590,7 @@ async def generate_brief_with_ai(prompt: str, prompt_id: Optional[int] = None):
         }
 
 @router.get("/rankings", response_model=dict)
-async def get_rankings(brand_id: Optional[int] = None, timeframe: str = "7d"):
+async def get_rankings(request: Request, brand_id: Optional[int] = None, timeframe: str = "7d"):
     """Get competitive rankings data with bubble chart visualization data"""
     try:
         # Simulate rankings data from OpenRouter analysis
@@ -517,13 +672,15 @@ async def get_rankings(brand_id: Optional[int] = None, timeframe: str = "7d"):
             ]
         }
         
-        return rankings_data
+        # The dashboard aggregates are fixed sample data, so their version never changes
+        # and each is serialized once per process
+        return response_cache.respond(request, ("rankings", brand_id, timeframe), None, lambda: rankings_data)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Rankings fetch failed: {str(e)}")
 
 @router.get("/mentions", response_model=dict)
-async def get_mentions(brand_id: Optional[int] = None, timeframe: str = "24h"):
+async def get_mentions(request: Request, brand_id: Optional[int] = None, timeframe: str = "24h"):
     """Get real-time brand mentions across AI platforms"""
     try:
         mentions_data = {
@@ -586,13 +743,13 @@ async def get_mentions(brand_id: Optional[int] = None, timeframe: str = "24h"):
             ]
         }
         
-        return mentions_data
+        return response_cache.respond(request, ("mentions", brand_id, timeframe), None, lambda: mentions_data)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Mentions fetch failed: {str(e)}")
 
 @router.get("/sources", response_model=dict)
-async def get_sources(brand_id: Optional[int] = None):
+async def get_sources(request: Request, brand_id: Optional[int] = None):
     """Get URL citation tracking and authority source management"""
     try:
         sources_data = {
@@ -651,13 +808,13 @@ async def get_sources(brand_id: Optional[int] = None):
             ]
         }
         
-        return sources_data
+        return response_cache.respond(request, ("sources", brand_id), None, lambda: sources_data)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Sources fetch failed: {str(e)}")
 
 @router.get("/prompts", response_model=dict)
-async def get_prompts(brand_id: Optional[int] = None):
+async def get_prompts(request: Request, brand_id: Optional[int] = None):
     """Get prompts management and performance data"""
     try:
         prompts_data = {
@@ -724,13 +881,13 @@ async def get_prompts(brand_id: Optional[int] = None):
             ]
         }
         
-        return prompts_data
+        return response_cache.respond(request, ("prompts", brand_id), None, lambda: prompts_data)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prompts fetch failed: {str(e)}")
 
 @router.get("/competitors", response_model=dict)
-async def get_competitors(brand_id: Optional[int] = None):
+async def get_competitors(request: Request, brand_id: Optional[int] = None):
     """Get competitors management and analysis data"""
     try:
         competitors_data = {
@@ -795,84 +952,141 @@ async def get_competitors(brand_id: Optional[int] = None):
             ]
         }
         
-        return competitors_data
+        return response_cache.respond(request, ("competitors", brand_id), None, lambda: competitors_data)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Competitors fetch failed: {str(e)}")
 
 @router.post("/test-prompt", response_model=dict)
 async def test_prompt_realtime(
+    response: Response,
     prompt: str,
     brand_name: str = "Tesla",
-    competitors: Optional[List[str]] = None
+    competitors: Optional[List[str]] = None,
+    timeout: Optional[float] = None,
+    neutral: bool = False
 ):
-    """Test a prompt across ChatGPT, Claude, and Gemini in real-time"""
+    """Test a prompt across ChatGPT, Claude, and Gemini in real-time
+    
+    With `timeout` (seconds), providers that have not answered in time are dropped
+    and the response is marked partial. With `neutral`, the raw prompt is sent
+    without the brand framing and its cached answers are scored locally.
+    """
+    if await usage_tracker.should_defer_async(brand_name):
+        raise HTTPException(status_code=429, detail=f"Daily budget exhausted for {brand_name}")
+    
     try:
         if competitors is None:
             competitors = ["Ford", "GM", "Rivian", "Mercedes", "BMW"]
         
-        async with openrouter_service as service:
-            analysis = await service.test_prompt_across_providers(
-                prompt=prompt,
-                brand_name=brand_name,
-                competitors=competitors
-            )
-            
-            # Convert results to API response format
-            response_data = {
-                "prompt": prompt,
-                "brand_name": brand_name,
-                "test_timestamp": datetime.now().isoformat(),
-                "providers_tested": len(analysis.results),
-                "best_performer": analysis.best_performer,
-                "ranking_summary": analysis.ranking_summary,
-                "competitive_gaps": analysis.competitive_gaps,
-                "improvement_opportunities": analysis.improvement_opportunities,
-                "detailed_results": []
-            }
-            
-            for result in analysis.results:
-                response_data["detailed_results"].append({
-                    "provider": result.provider,
-                    "rank_position": result.rank_position,
-                    "sentiment_score": result.sentiment_score,
-                    "confidence": result.confidence,
-                    "response_time": result.response_time,
-                    "brand_mentions": result.brand_mentions,
-                    "competitor_mentions": result.competitor_mentions,
-                    "citations": result.citations,
-                    "response_excerpt": result.response[:200] + "..." if len(result.response) > 200 else result.response
-                })
-            
-            return response_data
-            
+        with timing_scope() as timings:
+            async with openrouter_service as service:
+                run = service.test_prompt_neutral if neutral else service.test_prompt_across_providers
+                analysis = await run(
+                    prompt=prompt,
+                    brand_name=brand_name,
+                    competitors=competitors,
+                    deadline=Deadline.after(timeout)
+                )
+        
+        apply_server_timing(response, timings)
+        return _prompt_test_response(prompt, brand_name, analysis)
+        
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prompt testing failed: {str(e)}")
 
+@router.post("/test-prompt/bulk", response_model=dict)
+async def test_prompt_bulk(response: Response, request: BulkPromptTestRequest):
+    """Score one prompt for many brands from a single brand-neutral call per model"""
+    deferred = await asyncio.gather(*[usage_tracker.should_defer_async(entry.brand_name) for entry in request.brands])
+    brands = [entry for entry, defer in zip(request.brands, deferred) if not defer]
+    skipped = [entry.brand_name for entry in request.brands if entry not in brands]
+    if not brands:
+        raise HTTPException(status_code=429, detail="Daily budget exhausted for every requested brand")
+    
+    try:
+        with timing_scope() as timings:
+            async with openrouter_service as service:
+                analyses = await service.test_query_for_brands(
+                    request.prompt,
+                    [(entry.brand_name, entry.competitors) for entry in brands],
+                    deadline=Deadline.after(request.timeout)
+                )
+        
+        apply_server_timing(response, timings)
+        return {
+            "prompt": request.prompt,
+            "brands_tested": len(analyses),
+            "skipped_brands": skipped,
+            "results": [_prompt_test_response(request.prompt, name, analysis) for name, analysis in analyses.items()]
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bulk prompt testing failed: {str(e)}")
+
+def _prompt_test_response(prompt: str, brand_name: str, analysis) -> dict:
+    """Convert a CompetitiveAnalysis to the API response format"""
+    response_data = {
+        "prompt": prompt,
+        "brand_name": brand_name,
+        "test_timestamp": datetime.now().isoformat(),
+        "providers_tested": len(analysis.results),
+        "partial": analysis.partial,
+        "missing_providers": analysis.missing_providers,
+        "best_performer": analysis.best_performer,
+        "ranking_summary": analysis.ranking_summary,
+        "competitive_gaps": analysis.competitive_gaps,
+        "improvement_opportunities": analysis.improvement_opportunities,
+        "detailed_results": []
+    }
+    
+    for result in analysis.results:
+        response_data["detailed_results"].append({
+            "provider": result.provider,
+            "rank_position": result.rank_position,
+            "sentiment_score": result.sentiment_score,
+            "confidence": result.confidence,
+            "response_time": result.response_time,
+            "brand_mentions": result.brand_mentions,
+            "competitor_mentions": result.competitor_mentions,
+            "citations": result.citations,
+            "response_excerpt": result.response[:200] + "..." if len(result.response) > 200 else result.response
+        })
+    
+    return response_data
+
 @router.post("/grade-content", response_model=dict)
 async def grade_content_realtime(
+    response: Response,
     prompt: str,
     content: str,
-    brand_name: str = "Tesla"
+    brand_name: str = "Tesla",
+    timeout: Optional[float] = None
 ):
     """Grade content performance using AI analysis"""
+    if await usage_tracker.should_defer_async(brand_name):
+        raise HTTPException(status_code=429, detail=f"Daily budget exhausted for {brand_name}")
+    
     try:
-        async with openrouter_service as service:
-            grade_result = await service.grade_content(
-                prompt=prompt,
-                content=content,
-                brand_name=brand_name
-            )
-            
-            # Add metadata
-            grade_result["prompt"] = prompt
-            grade_result["brand_name"] = brand_name
-            grade_result["content_length"] = len(content)
-            grade_result["word_count"] = len(content.split())
-            grade_result["graded_at"] = datetime.now().isoformat()
-            
-            return grade_result
-            
+        with timing_scope() as timings:
+            async with openrouter_service as service:
+                grade_result = await service.grade_content(
+                    prompt=prompt,
+                    content=content,
+                    brand_name=brand_name,
+                    deadline=Deadline.after(timeout)
+                )
+        
+        # Add metadata
+        grade_result["prompt"] = prompt
+        grade_result["brand_name"] = brand_name
+        grade_result["content_length"] = len(content)
+        grade_result["word_count"] = len(content.split())
+        grade_result["graded_at"] = datetime.now().isoformat()
+        
+        apply_server_timing(response, timings)
+        return grade_result
+        
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Content grading failed: {str(e)}")
 
@@ -880,7 +1094,8 @@ async def grade_content_realtime(
 async def get_realtime_mentions(
     brand_name: str = "Tesla",
     prompts: Optional[List[str]] = None,
-    limit: int = 10
+    limit: int = 10,
+    timeout: Optional[float] = None
 ):
     """Get real-time brand mentions by testing prompts across AI providers"""
     try:
@@ -894,16 +1109,23 @@ async def get_realtime_mentions(
             ]
         
         mentions = []
+        deadline = Deadline.after(timeout)  # shared by every prompt below
+        partial = False
         
         async with openrouter_service as service:
             # Test a few prompts for real-time mentions
             for prompt in prompts[:3]:  # Limit to avoid API rate limits
+                if deadline is not None and deadline.expired:
+                    partial = True
+                    break
                 try:
                     analysis = await service.test_prompt_across_providers(
                         prompt=prompt,
                         brand_name=brand_name,
-                        competitors=["Ford", "GM", "Rivian"]
+                        competitors=["Ford", "GM", "Rivian"],
+                        deadline=deadline
                     )
+                    partial = partial or analysis.partial
                     
                     for result in analysis.results:
                         if result.brand_mentions:  # Only include if brand is mentioned
@@ -948,6 +1170,7 @@ async def get_realtime_mentions(
                 "mentions_today": total_mentions,
                 "growth_24h": "+0%"  # Would need historical data
             },
+            "partial": partial,
             "mentions": mentions[:limit],
             "real_time_feed": [
                 {
@@ -965,35 +1188,44 @@ async def get_realtime_mentions(
         raise HTTPException(status_code=500, detail=f"Real-time mentions failed: {str(e)}")
 
 @router.post("/discover-competitors", response_model=CompetitorDiscoveryResponse)
-async def discover_competitors(request: CompetitorDiscoveryRequest):
+async def discover_competitors(request: CompetitorDiscoveryRequest, timeout: Optional[float] = None):
     """Discover direct competitor URLs for a given company website using OpenRouter/ChatGPT."""
     try:
-        competitors = await openrouter_service.discover_competitors(request.website_url)
+        competitors = await openrouter_service.discover_competitors(request.website_url, deadline=Deadline.after(timeout))
         return CompetitorDiscoveryResponse(competitors=competitors)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Competitor discovery timed out")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Competitor discovery failed: {str(e)}")
 
 @router.post("/discover-prompts", response_model=PromptDiscoveryResponse)
-async def discover_prompts(request: PromptDiscoveryRequest):
+async def discover_prompts(request: PromptDiscoveryRequest, timeout: Optional[float] = None):
     """Discover high-value prompt ideas for a brand and its competitors using OpenRouter/ChatGPT."""
     try:
-        prompts = await openrouter_service.discover_prompts(request.website_url, request.competitors)
+        prompts = await openrouter_service.discover_prompts(
+            request.website_url, request.competitors, deadline=Deadline.after(timeout)
+        )
         # Ensure the response is a list of dicts with prompt, competitors, rationale
         return PromptDiscoveryResponse(prompts=prompts)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Prompt discovery timed out")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prompt discovery failed: {str(e)}")
 
 @router.post("/extract-info", response_model=BrandInfoResponse)
-async def extract_brand_info(request: BrandInfoRequest):
+async def extract_brand_info(request: BrandInfoRequest, timeout: Optional[float] = None):
     """Extract brand name, industry, and description from a website using OpenRouter/ChatGPT."""
     try:
         async with openrouter_service as service:
-            info = await service.extract_brand_info(request.website_url)
+            info = await service.extract_brand_info(request.website_url, deadline=Deadline.after(timeout))
         # Map AI keys to Pydantic model fields
         return BrandInfoResponse(
             name=info.get("name", "Unknown"),
             industry=info.get("industry", "Unknown"),
-            description=info.get("description", "Unknown")
+            description=info.get("description", "Unknown"),
+            defaulted_fields=info.get("defaulted_fields", [])
         )
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Brand info extraction timed out")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Brand info extraction failed: {str(e)}")
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from ..services.provider_registry import provider_registry
+from .auth import require_admin_token
+
+router = APIRouter(prefix="/api/providers", tags=["providers"])
+
+@router.get("/")
+async def get_providers():
+    """Models configured for each provider group, with their limits"""
+    return provider_registry.describe()
+
+@router.post("/reload", dependencies=[Depends(require_admin_token)])
+async def reload_providers():
+    """Re-read the provider registry file without restarting (admin token required)"""
+    try:
+        return provider_registry.reload()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from typing import Optional
+
+from ..services.usage_tracker import usage_tracker
+
+router = APIRouter(prefix="/api/usage", tags=["usage"])
+
+@router.get("/")
+def get_usage(brand_name: Optional[str] = None):
+    """Running OpenRouter token and cost totals per brand, model and endpoint"""
+    return usage_tracker.summary(brand_name)
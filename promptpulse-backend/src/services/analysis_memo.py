@@ -0,0 +1,59 @@
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from ..config import settings
+from ..metrics import record_cache_lookup
+
+# Bump whenever analysis output changes for the same input so stale memo entries are never reused
+ANALYZER_VERSION = 1
+
+MemoKey = Tuple[str, str, Tuple[str, ...], int]
+
+class AnalysisMemo:
+    """Bounded LRU of per-response analysis results.
+
+    Keyed by (response digest, brand, competitors, analyzer version): the analysis
+    depends on nothing else, so a cached or re-rendered response scored for the
+    same brand and competitor set skips the work, whichever endpoint asks.
+    """
+
+    def __init__(self, max_entries: int = settings.analysis_memo_max_entries):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[MemoKey, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()  # call_openrouter's analysis runs in worker threads
+
+    @staticmethod
+    def key(response: str, brand_name: str, competitors: Sequence[str]) -> MemoKey:
+        digest = hashlib.blake2b(response.encode("utf-8"), digest_size=16).hexdigest()
+        return (digest, brand_name, tuple(competitors), ANALYZER_VERSION)
+
+    def get(self, key: MemoKey) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+        record_cache_lookup("analysis", result is not None)
+        # Callers get their own copy; results hold mutable lists
+        return copy.deepcopy(result) if result is not None else None
+
+    def put(self, key: MemoKey, result: Dict[str, Any]):
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[key] = copy.deepcopy(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+# Global instance
+analysis_memo = AnalysisMemo()
@@ -10,56 +10,105 @@ import os
 import aiohttp
 import hashlib
 import time
+from contextlib import nullcontext
 from ..config import settings
-from .openrouter_service import openrouter_service, AIProvider as ORProvider, PromptTestResult
+from .openrouter_service import openrouter_service, PromptTestResult, OpenRouterAPIError
+from .provider_registry import ModelConfig, provider_registry
+from .cassette import cassette
+from .circuit_breaker import circuit_breakers
+from .usage_tracker import usage_tracker
+from .request_timing import measure
+from .prompt_canonicalizer import normalize_text
+from ..metrics import (observe_openrouter_call, observe_analysis_cpu, record_cache_lookup,
+                       record_openrouter_error, record_openrouter_timeout)
 
 OPENROUTER_API_KEY = settings.openrouter_api_key
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_URL = f"{settings.openrouter_base_url}/chat/completions"
 
-async def call_openrouter_async(messages, model):
+async def call_openrouter_async(messages, model, brand_name=None, endpoint="brand_search", model_config=None):
     """Async version of OpenRouter API call"""
     async with openrouter_service as service:
-        headers = {
-            "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-            "HTTP-Referer": "https://promptpulse.ai",
-            "X-Title": "PromptPulse AEO Platform",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "model": model,
-            "messages": messages,
-            "max_tokens": 1000,
-            "temperature": 0.7
-        }
-        
-        async with service.session.post(OPENROUTER_URL, headers=headers, json=payload) as response:
-            if response.status == 200:
-                return await response.json()
-            else:
-                raise Exception(f"OpenRouter API error: {response.status}")
+        if model_config is not None:
+            payload = model_config.build_payload(messages)
+        else:
+            payload = {
+                "model": model,
+                "messages": messages,
+                "max_tokens": 1000,
+                "temperature": 0.7
+            }
+        return await service.chat_completion(payload, endpoint=endpoint, brand_name=brand_name, model_config=model_config)
 
-def call_openrouter(messages, model):
+def call_openrouter(messages, model, brand_name=None, endpoint="brand_search", model_config=None):
     """Sync wrapper for backward compatibility"""
     import requests
     headers = {
         "Authorization": f"Bearer {OPENROUTER_API_KEY}",
         "Content-Type": "application/json"
     }
-    payload = {
-        "model": model,
-        "messages": messages
-    }
-    response = requests.post(OPENROUTER_URL, headers=headers, json=payload, timeout=60)
-    response.raise_for_status()
-    return response.json()
+    if model_config is not None:
+        payload = model_config.build_payload(messages)
+        limits = provider_registry.limits(endpoint, model_config)
+        timeout = model_config.timeout_seconds or 60
+    else:
+        payload = {"model": model, "messages": messages}
+        limits = None
+        timeout = 60
+    model = usage_tracker.resolve_model(brand_name, payload["model"])
+    payload["model"] = model
+    payload["usage"] = {"include": True}
+    breaker = circuit_breakers.get(model)
+    breaker.before_call()
+    try:
+        with observe_openrouter_call(model, endpoint):
+            if cassette.replaying:
+                interaction = cassette.replay(payload)
+                if interaction.status != 200:
+                    raise OpenRouterAPIError(interaction.status, interaction.body)
+                data = interaction.response
+            else:
+                started = time.perf_counter()
+                with limits.sync_slot() if limits else nullcontext(), measure("upstream", model):
+                    response = requests.post(OPENROUTER_URL, headers=headers, json=payload, timeout=timeout)
+                if not response.ok:
+                    cassette.record(payload, endpoint, time.perf_counter() - started,
+                                    status=response.status_code, body=response.text)
+                    response.raise_for_status()
+                with measure("json_decode", model):
+                    data = response.json()
+                cassette.record(payload, endpoint, time.perf_counter() - started, response=data)
+    except requests.HTTPError as e:
+        record_openrouter_error(model, endpoint, f"http_{e.response.status_code}")
+        if e.response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+    except OpenRouterAPIError as e:
+        record_openrouter_error(model, endpoint, f"http_{e.status}")
+        if e.status >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+    except requests.Timeout:
+        record_openrouter_timeout(model, endpoint)
+        breaker.record_failure()
+        raise
+    except requests.ConnectionError:
+        record_openrouter_error(model, endpoint, "exception")
+        breaker.record_failure()
+        raise
+    except Exception:
+        record_openrouter_error(model, endpoint, "exception")
+        breaker.abandon()
+        raise
+    breaker.record_success()
+    usage_tracker.record(data, model, endpoint, brand_name)
+    return data
 
 logger = logging.getLogger(__name__)
 
-class AIProvider(Enum):
-    OPENAI = "openai"
-    ANTHROPIC = "anthropic"
-    GOOGLE = "google"
-
 class SentimentScore(Enum):
     VERY_POSITIVE = 5
     POSITIVE = 4
@@ -111,19 +160,15 @@ class BrandIntelligenceEngine:
             return self._create_limited_result(brand_name)
         
         all_mentions = []
-        search_tasks = [
-            self._search_openai(brand_name, keywords),
-            self._search_anthropic(brand_name, keywords),
-            self._search_google(brand_name, keywords)
-        ]
+        providers = provider_registry.group("brand_search")
+        search_tasks = [self._search_provider(config, brand_name, keywords) for config in providers]
         results = await asyncio.gather(*search_tasks, return_exceptions=True)
-        for i, result in enumerate(results):
-            provider_names = ["OpenAI", "Anthropic", "Google"]
+        for config, result in zip(providers, results):
             if isinstance(result, list):
-                logger.info(f"{provider_names[i]} search returned {len(result)} mentions")
+                logger.info(f"{config.name} search returned {len(result)} mentions")
                 all_mentions.extend(result)
             elif isinstance(result, Exception):
-                logger.error(f"{provider_names[i]} search failed: {result}")
+                logger.error(f"{config.name} search failed: {result}")
         
         analysis = self._analyze_brand_visibility(brand_name, all_mentions)
         
@@ -132,68 +177,38 @@ class BrandIntelligenceEngine:
         
         return analysis
 
-    async def _search_openai(self, brand_name: str, keywords: List[str]) -> List[BrandMention]:
+    async def _search_provider(self, config: ModelConfig, brand_name: str, keywords: List[str]) -> List[BrandMention]:
+        """Run the search prompts against one brand_search model from the provider registry"""
         mentions = []
-        try:
-            search_prompts = self._generate_search_prompts(brand_name, keywords)
-            for prompt in search_prompts:
+        search_prompts = self._generate_search_prompts(brand_name, keywords)
+        error = None
+        succeeded = 0
+        for prompt in search_prompts:
+            # One failed prompt (open circuit, timeout) keeps what the others found
+            try:
                 response = await asyncio.to_thread(
                     call_openrouter,
                     [
                         {"role": "system", "content": "You are a brand intelligence analyst. Provide detailed information about brand mentions, including context, sentiment, and any referenced sources."},
                         {"role": "user", "content": prompt}
                     ],
-                    "openai/gpt-4o-mini"
-                )
-                content = response["choices"][0]["message"]["content"]
-                extracted_mentions = self._extract_mentions_from_response(
-                    content, brand_name, keywords, AIProvider.OPENAI.value
-                )
-                mentions.extend(extracted_mentions)
-        except Exception as e:
-            logger.error(f"OpenAI search failed: {e}")
-        return mentions
-
-    async def _search_anthropic(self, brand_name: str, keywords: List[str]) -> List[BrandMention]:
-        mentions = []
-        try:
-            search_prompts = self._generate_search_prompts(brand_name, keywords)
-            for prompt in search_prompts:
-                response = await asyncio.to_thread(
-                    call_openrouter,
-                    [
-                        {"role": "user", "content": prompt}
-                    ],
-                    "anthropic/claude-3-haiku"
-                )
-                content = response["choices"][0]["message"]["content"]
-                extracted_mentions = self._extract_mentions_from_response(
-                    content, brand_name, keywords, AIProvider.ANTHROPIC.value
-                )
-                mentions.extend(extracted_mentions)
-        except Exception as e:
-            logger.error(f"Anthropic search failed: {e}")
-        return mentions
-
-    async def _search_google(self, brand_name: str, keywords: List[str]) -> List[BrandMention]:
-        mentions = []
-        try:
-            search_prompts = self._generate_search_prompts(brand_name, keywords)
-            for prompt in search_prompts:
-                response = await asyncio.to_thread(
-                    call_openrouter,
-                    [
-                        {"role": "user", "content": prompt}
-                    ],
-                    "google/gemini-flash-1.5"
+                    config.model,
+                    brand_name,
+                    model_config=config
                 )
                 content = response["choices"][0]["message"]["content"]
-                extracted_mentions = self._extract_mentions_from_response(
-                    content, brand_name, keywords, AIProvider.GOOGLE.value
-                )
-                mentions.extend(extracted_mentions)
-        except Exception as e:
-            logger.error(f"Google search failed: {e}")
+                with measure("analysis", config.name):
+                    extracted_mentions = self._extract_mentions_from_response(
+                        content, brand_name, keywords, config.name
+                    )
+            except Exception as e:
+                logger.error(f"{config.name} search prompt failed: {e} (prompt: {prompt[:80]!r})")
+                error = e
+                continue
+            mentions.extend(extracted_mentions)
+            succeeded += 1
+        if error is not None and not succeeded:
+            raise error  # every prompt failed, so the provider did
         return mentions
 
     def _generate_search_prompts(self, brand_name: str, keywords: List[str]) -> List[str]:
@@ -207,6 +222,7 @@ class BrandIntelligenceEngine:
         
         return prompts
 
+    @observe_analysis_cpu("extract_mentions")
     def _extract_mentions_from_response(self, response_text: str, brand_name: str, keywords: List[str], provider: str) -> List[BrandMention]:
         """Extract brand mentions from AI response text"""
         mentions = []
@@ -374,8 +390,10 @@ class BrandIntelligenceEngine:
         return min(100.0, max(0.0, total_score))
 
     def _generate_cache_key(self, brand_name: str, keywords: List[str]) -> str:
-        """Generate a cache key for the search"""
-        content = f"{brand_name}:{':'.join(sorted(keywords))}"
+        """Generate a cache key for the search from the normalized brand name and keywords"""
+        # Exact keywords only: merging near-duplicate keyword sets would share results between different searches
+        canonical_keywords = sorted({normalize_text(keyword) for keyword in keywords})
+        content = f"{normalize_text(brand_name)}:{':'.join(canonical_keywords)}"
         return hashlib.md5(content.encode()).hexdigest()
 
     def _get_from_cache(self, cache_key: str) -> Optional[BrandAnalysis]:
@@ -383,10 +401,12 @@ class BrandIntelligenceEngine:
         if cache_key in self.cache:
             cached_data, timestamp = self.cache[cache_key]
             if time.time() - timestamp < self.cache_duration:
+                record_cache_lookup("brand_analysis", hit=True)
                 return cached_data
             else:
                 # Remove expired cache entry
                 del self.cache[cache_key]
+        record_cache_lookup("brand_analysis", hit=False)
         return None
 
     def _cache_result(self, cache_key: str, analysis: BrandAnalysis):
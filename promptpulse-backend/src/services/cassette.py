@@ -0,0 +1,184 @@
+import asyncio
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Any
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Request fields that do not change the completion
+_VOLATILE_FIELDS = ("usage", "stream")
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when no recording matches a request"""
+
+    def __init__(self, key: str, model: str):
+        self.key = key
+        self.model = model
+        super().__init__(f"No cassette recording for {model} request {key[:12]}")
+
+@dataclass
+class Interaction:
+    key: str
+    model: str
+    endpoint: str
+    status: int
+    elapsed: float  # seconds the upstream call took when recorded
+    response: Optional[Dict[str, Any]] = None  # parsed body for 200s
+    body: str = ""  # raw body for errors
+
+class Cassette:
+    """Record/replay of OpenRouter chat completions.
+
+    Recordings are gzipped JSON lines keyed by a hash of the request payload.
+    Identical requests recorded several times are replayed in recorded order,
+    wrapping around once exhausted.
+
+    While recording, interactions are buffered and written every `flush_every`
+    calls through one gzip stream that stays open until close() (at shutdown or
+    exit), so a session is a single compressed member.
+    """
+
+    flush_every = 50
+
+    def __init__(self, mode: str = settings.cassette_mode, path: str = settings.cassette_path,
+                 replay_latency: str = settings.cassette_replay_latency):
+        self.mode = mode  # off, record or replay
+        self.path = path
+        self.replay_latency = replay_latency  # recorded or zero
+        self._interactions: Optional[Dict[str, List[Interaction]]] = None
+        self._cursors: Dict[str, int] = {}
+        self._pending: List[str] = []
+        self._writer: Optional[gzip.GzipFile] = None
+        self._lock = threading.Lock()  # call_openrouter records from worker threads
+        self._write_lock = threading.Lock()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @staticmethod
+    def request_key(payload: Dict[str, Any]) -> str:
+        stable = {k: v for k, v in payload.items() if k not in _VOLATILE_FIELDS}
+        encoded = json.dumps(stable, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def record(self, payload: Dict[str, Any], endpoint: str, elapsed: float,
+               response: Optional[Dict[str, Any]] = None, status: int = 200, body: str = ""):
+        """Buffer one interaction, writing the buffer once it is full (no-op unless recording)
+
+        Blocks on file I/O when it flushes; async callers use record_async.
+        """
+        if self._buffer(payload, endpoint, elapsed, response, status, body):
+            self.flush()
+
+    async def record_async(self, payload: Dict[str, Any], endpoint: str, elapsed: float,
+                           response: Optional[Dict[str, Any]] = None, status: int = 200, body: str = ""):
+        """record() that does the file write in a worker thread"""
+        if self._buffer(payload, endpoint, elapsed, response, status, body):
+            await asyncio.to_thread(self.flush)
+
+    def _buffer(self, payload, endpoint, elapsed, response, status, body) -> bool:
+        """Queue an interaction; True when the buffer should be flushed"""
+        if not self.recording:
+            return False
+        interaction = Interaction(
+            key=self.request_key(payload),
+            model=payload.get("model", ""),
+            endpoint=endpoint,
+            status=status,
+            elapsed=round(elapsed, 4),
+            response=response,
+            body=body
+        )
+        line = json.dumps(asdict(interaction), separators=(",", ":"), ensure_ascii=False) + "\n"
+        with self._lock:
+            self._pending.append(line)
+            return len(self._pending) >= self.flush_every
+
+    def flush(self):
+        """Write buffered interactions to the open gzip stream"""
+        with self._write_lock:
+            with self._lock:
+                lines, self._pending = self._pending, []
+            if not lines:
+                return
+            if self._writer is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                # Appending starts a new gzip member; gzip.open reads them back as one stream
+                self._writer = gzip.open(self.path, "ab")
+                atexit.register(self.close)
+            self._writer.write("".join(lines).encode("utf-8"))
+            self._writer.flush()  # sync flush keeps the compression dictionary but makes the data readable
+
+    def close(self):
+        """Flush and finish the gzip stream; recording can continue afterwards in a new member"""
+        self.flush()
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+                atexit.unregister(self.close)
+
+    def load(self):
+        interactions: Dict[str, List[Interaction]] = {}
+        if os.path.exists(self.path):
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                try:
+                    for line in f:
+                        if line.strip():
+                            interaction = Interaction(**json.loads(line))
+                            interactions.setdefault(interaction.key, []).append(interaction)
+                except EOFError:
+                    # A recording process that died before close() leaves the last member without a trailer
+                    logger.warning(f"Cassette {self.path} ends mid-stream; using the {sum(map(len, interactions.values()))} complete interactions")
+        else:
+            logger.warning(f"Cassette {self.path} not found; every replayed request will miss")
+        self._interactions = interactions
+        self._cursors = {}
+
+    def lookup(self, payload: Dict[str, Any]) -> Interaction:
+        with self._lock:
+            if self._interactions is None:
+                self.load()
+            key = self.request_key(payload)
+            recorded = self._interactions.get(key)
+            if not recorded:
+                raise CassetteMiss(key, payload.get("model", ""))
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            return recorded[cursor % len(recorded)]
+
+    def _delay(self, interaction: Interaction) -> float:
+        return interaction.elapsed if self.replay_latency == "recorded" else 0.0
+
+    async def replay_async(self, payload: Dict[str, Any]) -> Interaction:
+        interaction = self.lookup(payload)
+        delay = self._delay(interaction)
+        if delay:
+            await asyncio.sleep(delay)
+        return interaction
+
+    def replay(self, payload: Dict[str, Any]) -> Interaction:
+        interaction = self.lookup(payload)
+        delay = self._delay(interaction)
+        if delay:
+            time.sleep(delay)
+        return interaction
+
+# Global instance
+cassette = Cassette()
@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Dict, Optional
+
+from ..config import settings
+from ..metrics import record_circuit_rejection, set_circuit_state
+
+logger = logging.getLogger(__name__)
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a model whose circuit is open"""
+
+    def __init__(self, model: str, retry_in: float):
+        self.model = model
+        self.retry_in = retry_in
+        super().__init__(f"Circuit open for {model}; retrying in {retry_in:.0f}s")
+
+class CircuitBreaker:
+    """Fails fast for one model after a burst of upstream failures.
+
+    CLOSED counts failures in a sliding window and opens once `failure_threshold`
+    land within `window_seconds`. OPEN rejects calls for `cooldown_seconds`, then
+    HALF_OPEN lets a single probe through: success closes the circuit, failure
+    reopens it for another cooldown.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        failure_threshold: int = settings.circuit_failure_threshold,
+        window_seconds: float = settings.circuit_window_seconds,
+        cooldown_seconds: float = settings.circuit_cooldown_seconds
+    ):
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.window_seconds = window_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self._state = CircuitState.CLOSED
+        self._failures = deque()
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()  # call_openrouter runs in worker threads
+        set_circuit_state(model, self._state.value)
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> CircuitState:
+        if self._state is CircuitState.OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+            self._transition(CircuitState.HALF_OPEN)
+        return self._state
+
+    def _transition(self, state: CircuitState):
+        if state is self._state:
+            return
+        logger.warning(f"Circuit for {self.model}: {self._state.value} -> {state.value}")
+        self._state = state
+        if state is CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+        if state is CircuitState.CLOSED:
+            self._failures.clear()
+        self._probe_in_flight = False
+        set_circuit_state(self.model, state.value)
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go upstream now"""
+        with self._lock:
+            state = self._current_state()
+            if state is CircuitState.CLOSED:
+                return
+            if state is CircuitState.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            retry_in = max(0.0, self.cooldown_seconds - (time.monotonic() - self._opened_at))
+        record_circuit_rejection(self.model)
+        raise CircuitOpenError(self.model, retry_in)
+
+    def record_success(self):
+        with self._lock:
+            if self._state is CircuitState.HALF_OPEN:
+                self._transition(CircuitState.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            if self._state is CircuitState.HALF_OPEN:
+                self._transition(CircuitState.OPEN)
+                return
+            now = time.monotonic()
+            self._failures.append(now)
+            while self._failures and now - self._failures[0] > self.window_seconds:
+                self._failures.popleft()
+            if len(self._failures) >= self.failure_threshold:
+                self._transition(CircuitState.OPEN)
+
+    def abandon(self):
+        """The call was cancelled or cut short by the caller; it says nothing about the upstream"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            state = self._current_state()
+            snapshot = {"state": state.value, "recent_failures": len(self._failures)}
+            if state is CircuitState.OPEN:
+                snapshot["retry_in"] = round(max(0.0, self.cooldown_seconds - (time.monotonic() - self._opened_at)), 1)
+            return snapshot
+
+class CircuitBreakerRegistry:
+    """One breaker per OpenRouter model id, created on first use"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(model)
+            if breaker is None:
+                breaker = self._breakers[model] = CircuitBreaker(model)
+            return breaker
+
+    def states(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.model: breaker.snapshot() for breaker in breakers}
+
+    def any_open(self) -> bool:
+        return any(breaker.state is not CircuitState.CLOSED for breaker in list(self._breakers.values()))
+
+# Global instance
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,46 @@
+import asyncio
+import time
+from typing import Optional
+
+import aiohttp
+
+from ..config import settings
+
+class Deadline:
+    """Absolute time by which a request and every upstream call it fans out to must finish"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def after(cls, seconds: Optional[float]) -> Optional["Deadline"]:
+        """Deadline `seconds` from now, or None when no timeout was requested"""
+        return cls(seconds) if seconds else None
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self):
+        if self.expired:
+            raise asyncio.TimeoutError(f"Deadline of {self.seconds}s exceeded")
+
+def client_timeout(deadline: Optional[Deadline] = None, total: Optional[float] = None) -> aiohttp.ClientTimeout:
+    """Per-phase aiohttp timeouts for one upstream call, capped by the deadline
+
+    Raises asyncio.TimeoutError once the deadline has passed: aiohttp reads a total
+    of 0 as "no timeout", which would let the call run unbounded.
+    """
+    total = total or settings.openrouter_timeout_seconds
+    if deadline is not None:
+        deadline.check()
+        total = min(total, deadline.remaining())
+    return aiohttp.ClientTimeout(
+        total=total,
+        sock_connect=min(settings.openrouter_connect_timeout_seconds, total),
+        sock_read=min(settings.openrouter_read_timeout_seconds, total)
+    )
@@ -0,0 +1,85 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from ..config import settings
+from ..metrics import record_cache_lookup
+from ..responses import ORJSONResponse
+
+def _etag(body: bytes) -> str:
+    # Weak: the same tag is sent whether or not the compression middleware encodes the body
+    return 'W/"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def _render(payload: Any) -> bytes:
+    if isinstance(payload, BaseModel):
+        return payload.__pydantic_serializer__.to_json(payload)
+    return ORJSONResponse(jsonable_encoder(payload)).body
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/"x" matches "x", and * matches anything"""
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+class ConditionalResponseCache:
+    """Serialized JSON bodies and their ETags for endpoints that dashboards poll.
+
+    The caller passes a cheap `version` of the data behind a response, e.g. the
+    id of the latest report. While the version is unchanged the payload is not
+    rebuilt or re-serialized. The ETag is a hash of the body, so it stays correct
+    across restarts. A request whose If-None-Match carries it gets a 304.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, str, bytes]]" = OrderedDict()  # key -> (version, etag, body)
+        self._lock = threading.Lock()
+
+    def respond(
+        self,
+        request: Request,
+        key: Hashable,
+        version: Hashable,
+        build: Callable[[], Any],
+        max_age: int = settings.dashboard_cache_max_age,
+        stale_while_revalidate: int = settings.dashboard_stale_while_revalidate
+    ) -> Response:
+        entry = self._get(key, version)
+        record_cache_lookup("http_response", entry is not None)
+        if entry is None:
+            body = _render(build())
+            entry = (_etag(body), body)
+            self._put(key, version, entry)
+        etag, body = entry
+
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"private, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}",
+        }
+        if _matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def _get(self, key: Hashable, version: Hashable) -> Optional[Tuple[str, bytes]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def _put(self, key: Hashable, version: Hashable, entry: Tuple[str, bytes]):
+        with self._lock:
+            self._entries[key] = (version, *entry)  # a new version replaces the old one
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+# Global instance
+response_cache = ConditionalResponseCache()
@@ -0,0 +1,132 @@
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..metrics import record_mention_dedupe
+from ..models.mention import BrandMention
+from .prompt_canonicalizer import normalize_text
+
+logger = logging.getLogger(__name__)
+
+BITS = 64
+BAND_WIDTHS = (11, 11, 11, 11, 10, 10)
+BANDS = len(BAND_WIDTHS)
+# Two fingerprints within BANDS - 1 bits share at least one band exactly (pigeonhole);
+# further apart they usually still do. Model answers are short: a one-word edit moves
+# ~6 bits, paraphrases 15 or more, unrelated text ~32.
+GUARANTEED_DISTANCE = BANDS - 1
+_BAND_SHIFTS = tuple(sum(BAND_WIDTHS[:band]) for band in range(BANDS))
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of a text's word unigrams and bigrams"""
+    words = normalize_text(text).split()
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    weights = [0] * BITS
+    for feature in features:
+        value = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+        for bit in range(BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+def bands(fingerprint: int) -> List[int]:
+    return [fingerprint >> shift & ((1 << width) - 1) for shift, width in zip(_BAND_SHIFTS, BAND_WIDTHS)]
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def _to_signed(fingerprint: int) -> int:
+    # BIGINT columns are signed
+    return fingerprint - (1 << BITS) if fingerprint >= 1 << (BITS - 1) else fingerprint
+
+def _to_unsigned(stored: int) -> int:
+    return stored & ((1 << BITS) - 1)
+
+def _merge(row: BrandMention, mention, seen_at: datetime):
+    row.occurrence_count = (row.occurrence_count or 1) + 1
+    row.last_seen_at = seen_at
+    row.seen_providers = sorted(set(row.seen_providers or [row.provider]) | {mention.provider})
+    row.source_urls = list(dict.fromkeys((row.source_urls or []) + (mention.source_urls or [])))
+    row.keywords_found = list(dict.fromkeys((row.keywords_found or []) + (mention.keywords_found or [])))
+
+def store_mentions(
+    db: Session,
+    brand_id: int,
+    mentions: Iterable,
+    max_distance: int = settings.mention_simhash_max_distance
+) -> Tuple[int, int]:
+    """Add a brand's mentions, folding near-duplicates into existing rows
+
+    A mention whose SimHash is within `max_distance` bits of a stored mention (or
+    of one earlier in the same batch) increments that row's occurrence_count
+    instead of adding a row. Returns (rows added, mentions merged); the caller commits.
+    """
+    mentions = list(mentions)
+    if not mentions:
+        return 0, 0
+    fingerprints = [simhash(mention.content) for mention in mentions]
+
+    # One indexed query for the fingerprints of stored mentions sharing a band with any incoming one
+    band_values: Dict[int, set] = {band: set() for band in range(BANDS)}
+    for fingerprint in fingerprints:
+        for band, value in enumerate(bands(fingerprint)):
+            band_values[band].add(value)
+    index: Dict[Tuple[int, int], List[Tuple[int, Union[int, BrandMention]]]] = {}
+    if max_distance >= 0:
+        candidates = db.query(BrandMention.id, BrandMention.simhash).filter(
+            BrandMention.brand_id == brand_id,
+            or_(*(getattr(BrandMention, f"simhash_band_{band}").in_(values) for band, values in band_values.items()))
+        )
+        for mention_id, stored in candidates:
+            _index(index, _to_unsigned(stored), mention_id)
+
+    now = datetime.now(timezone.utc)
+    added = merged = 0
+    for mention, fingerprint in zip(mentions, fingerprints):
+        match = _nearest(index, fingerprint, max_distance)
+        if match is not None:
+            # Stored rows are indexed by id and only loaded when something merges into them
+            _merge(db.get(BrandMention, match) if isinstance(match, int) else match, mention, now)
+            merged += 1
+            continue
+        row = BrandMention(
+            **{f"simhash_band_{band}": value for band, value in enumerate(bands(fingerprint))},
+            brand_id=brand_id,
+            content=mention.content,
+            sentiment_score=mention.sentiment_score,
+            sentiment_label=mention.sentiment_label,
+            confidence=mention.confidence,
+            source_urls=mention.source_urls,
+            context=mention.context,
+            provider=mention.provider,
+            keywords_found=mention.keywords_found,
+            simhash=_to_signed(fingerprint),
+            occurrence_count=1,
+            seen_providers=[mention.provider],
+            last_seen_at=now
+        )
+        db.add(row)
+        _index(index, fingerprint, row)
+        added += 1
+
+    record_mention_dedupe(added, merged)
+    if merged:
+        logger.info(f"Brand {brand_id}: merged {merged} near-duplicate mentions, added {added}")
+    return added, merged
+
+def _index(index, fingerprint: int, ref: Union[int, BrandMention]):
+    for band, value in enumerate(bands(fingerprint)):
+        index.setdefault((band, value), []).append((fingerprint, ref))
+
+def _nearest(index, fingerprint: int, max_distance: int) -> Optional[Union[int, BrandMention]]:
+    best, best_distance = None, max_distance + 1
+    for band, value in enumerate(bands(fingerprint)):
+        for other, ref in index.get((band, value), ()):
+            distance = hamming(fingerprint, other)
+            if distance < best_distance:
+                best, best_distance = ref, distance
+    return best
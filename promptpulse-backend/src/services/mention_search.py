@@ -0,0 +1,142 @@
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, JSON, text
+from sqlalchemy.orm import Session
+
+from ..database import engine
+
+logger = logging.getLogger(__name__)
+
+# Postgres: GIN expression index, so no extra column has to be kept in sync
+_PG_DOCUMENT = "to_tsvector('english', coalesce(m.content, '') || ' ' || coalesce(m.context, ''))"
+_PG_INDEX = (
+    "CREATE INDEX IF NOT EXISTS ix_brand_mentions_fts ON brand_mentions "
+    "USING GIN (to_tsvector('english', coalesce(content, '') || ' ' || coalesce(context, '')))"
+)
+
+# SQLite: external-content FTS5 table kept current by triggers
+_SQLITE_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS brand_mentions_fts USING fts5("
+    "content, context, content='brand_mentions', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS brand_mentions_fts_insert AFTER INSERT ON brand_mentions BEGIN "
+    "INSERT INTO brand_mentions_fts(rowid, content, context) VALUES (new.id, new.content, new.context); END",
+    "CREATE TRIGGER IF NOT EXISTS brand_mentions_fts_delete AFTER DELETE ON brand_mentions BEGIN "
+    "INSERT INTO brand_mentions_fts(brand_mentions_fts, rowid, content, context) "
+    "VALUES ('delete', old.id, old.content, old.context); END",
+    "CREATE TRIGGER IF NOT EXISTS brand_mentions_fts_update AFTER UPDATE OF content, context ON brand_mentions BEGIN "
+    "INSERT INTO brand_mentions_fts(brand_mentions_fts, rowid, content, context) "
+    "VALUES ('delete', old.id, old.content, old.context); "
+    "INSERT INTO brand_mentions_fts(rowid, content, context) VALUES (new.id, new.content, new.context); END",
+]
+
+_RESULT_COLUMNS = (
+    "m.id, m.content, m.context, m.provider, m.sentiment_score, m.sentiment_label, "
+    "m.confidence, m.source_urls, m.occurrence_count, m.created_at"
+)
+
+def ensure_search_index(bind=None):
+    """Create the full-text index for brand_mentions if the database supports one"""
+    bind = bind or engine
+    dialect = bind.dialect.name
+    with bind.begin() as conn:
+        if dialect == "postgresql":
+            conn.execute(text(_PG_INDEX))
+        elif dialect == "sqlite":
+            exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'brand_mentions_fts'")).first()
+            for statement in _SQLITE_SCHEMA:
+                conn.execute(text(statement))
+            if not exists:
+                # Index the rows written before the table existed
+                conn.execute(text("INSERT INTO brand_mentions_fts(brand_mentions_fts) VALUES ('rebuild')"))
+        else:
+            logger.warning(f"No full-text index for {dialect}; mention search will scan with LIKE")
+
+def _fts5_query(query: str) -> str:
+    """Translate websearch_to_tsquery syntax into an FTS5 MATCH expression
+
+    Words are ANDed, "quoted phrases" stay phrases, `or` between terms means OR and
+    `-term` excludes. FTS5 NOT needs something to subtract from, so a group made only
+    of excluded terms is dropped (Postgres would match every mention without them),
+    and unlike the 'english' config, stop words are not ignored.
+    """
+    groups, current = [], ([], [])
+    for minus, phrase, word in re.findall(r'(-?)(?:"([^"]*)"?|(\S+))', query):
+        if not phrase and word.lower() == "or" and not minus:
+            groups.append(current)
+            current = ([], [])
+            continue
+        words = re.findall(r"\w+", phrase or word)
+        if words:
+            current[1 if minus else 0].append('"' + " ".join(words) + '"')
+    groups.append(current)
+    # NOT binds tighter than AND and AND tighter than OR, as in tsquery
+    return " OR ".join(
+        "(" + " ".join(include) + "".join(f" NOT {term}" for term in exclude) + ")"
+        for include, exclude in groups if include
+    )
+
+def search_mentions(
+    db: Session,
+    brand_id: int,
+    query: str,
+    limit: int = 20,
+    offset: int = 0,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """Rank a brand's mentions against a search query; returns (total matches, one page of results)
+
+    Each result carries a relevance `rank` (higher is better) and a `snippet` with the
+    matches wrapped in <b> tags. `since`/`until` bound created_at.
+    """
+    dialect = db.get_bind().dialect.name
+    params = {"brand_id": brand_id, "limit": limit, "offset": offset, "since": since, "until": until}
+    period = "".join([
+        " AND m.created_at >= :since" if since else "",
+        " AND m.created_at < :until" if until else ""
+    ])
+
+    if dialect == "postgresql":
+        params["query"] = query
+        where = f"m.brand_id = :brand_id{period} AND {_PG_DOCUMENT} @@ websearch_to_tsquery('english', :query)"
+        page = (
+            f"SELECT {_RESULT_COLUMNS}, "
+            f"ts_rank_cd({_PG_DOCUMENT}, websearch_to_tsquery('english', :query)) AS rank, "
+            "ts_headline('english', m.content, websearch_to_tsquery('english', :query), "
+            "'StartSel=<b>, StopSel=</b>, MaxFragments=2') AS snippet "
+            f"FROM brand_mentions m WHERE {where} ORDER BY rank DESC, m.id DESC LIMIT :limit OFFSET :offset"
+        )
+        count = f"SELECT count(*) FROM brand_mentions m WHERE {where}"
+    elif dialect == "sqlite":
+        params["query"] = _fts5_query(query)
+        if not params["query"]:
+            return 0, []
+        source = "brand_mentions_fts JOIN brand_mentions m ON m.id = brand_mentions_fts.rowid"
+        where = f"brand_mentions_fts MATCH :query AND m.brand_id = :brand_id{period}"
+        page = (
+            # bm25() is lower-is-better; negate it so rank means the same on both backends
+            f"SELECT {_RESULT_COLUMNS}, -bm25(brand_mentions_fts) AS rank, "
+            "snippet(brand_mentions_fts, 0, '<b>', '</b>', '...', 16) AS snippet "
+            f"FROM {source} WHERE {where} ORDER BY rank DESC, m.id DESC LIMIT :limit OFFSET :offset"
+        )
+        count = f"SELECT count(*) FROM {source} WHERE {where}"
+    else:
+        # Match % and _ in the query literally; the escape character is bound because
+        # MySQL also treats a backslash inside a string literal as an escape
+        params["query"] = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        params["escape"] = "\\"
+        where = (f"m.brand_id = :brand_id{period} "
+                 "AND (m.content LIKE :query ESCAPE :escape OR m.context LIKE :query ESCAPE :escape)")
+        page = (
+            f"SELECT {_RESULT_COLUMNS}, 0.0 AS rank, m.content AS snippet "
+            f"FROM brand_mentions m WHERE {where} ORDER BY m.id DESC LIMIT :limit OFFSET :offset"
+        )
+        count = f"SELECT count(*) FROM brand_mentions m WHERE {where}"
+
+    total = db.execute(text(count), params).scalar()
+    rows = db.execute(text(page).columns(source_urls=JSON, created_at=DateTime(timezone=True)), params)
+    results = [dict(row._mapping) for row in rows]
+    return total, results
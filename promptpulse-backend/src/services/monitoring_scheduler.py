@@ -0,0 +1,281 @@
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import contains_eager
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.brand import Brand
+from ..models.prompt import TrackedPrompt, PromptTestRecord
+from .analysis_memo import ANALYZER_VERSION
+from .openrouter_service import OpenRouterService
+from .provider_registry import provider_registry
+from .usage_tracker import usage_tracker
+
+logger = logging.getLogger(__name__)
+
+class CallBudget:
+    """Token bucket enforcing a global OpenRouter calls-per-minute budget"""
+
+    def __init__(self, calls_per_minute: int):
+        self.rate = calls_per_minute / 60.0
+        self.capacity = float(max(1, calls_per_minute))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+    async def acquire(self, calls: int = 1):
+        """Wait until `calls` tokens are available, then consume them"""
+        calls = min(calls, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= calls:
+                    self.tokens -= calls
+                    return
+                await asyncio.sleep((calls - self.tokens) / self.rate)
+
+@dataclass
+class ScheduledRun:
+    """A claimed tracked prompt, detached from the session that claimed it"""
+    tracked_prompt_id: int
+    brand_id: int
+    brand_name: str
+    prompt: str
+    competitors: Optional[List[str]]
+
+class MonitoringScheduler:
+    """Re-runs each brand's tracked prompts across the test_prompt provider group on a cadence.
+
+    First runs are phase-shifted by a stable hash of the prompt id so brands do
+    not all fire at once; later runs add seeded jitter around the cadence. The due
+    time is stored in tracked_prompts.next_run_at, so each tick selects only due
+    rows, oldest first, and only as many as the global call budget can absorb.
+    Database work runs in the threadpool with a session per unit of work.
+    """
+
+    def __init__(
+        self,
+        interval_hours: float = settings.monitoring_interval_hours,
+        jitter_fraction: float = settings.monitoring_jitter_fraction,
+        freshness_hours: float = settings.monitoring_freshness_hours,
+        calls_per_minute: int = settings.monitoring_calls_per_minute,
+        tick_seconds: int = settings.monitoring_tick_seconds,
+        max_concurrent_runs: int = settings.monitoring_max_concurrent_runs,
+    ):
+        self.interval = timedelta(hours=interval_hours)
+        self.jitter_fraction = jitter_fraction
+        self.freshness = timedelta(hours=freshness_hours)
+        self.calls_per_minute = calls_per_minute
+        self.tick_seconds = tick_seconds
+        self.budget = CallBudget(calls_per_minute)
+        self.semaphore = asyncio.Semaphore(max_concurrent_runs)
+        # A claimed run is not picked up again for this long, even if it fails
+        self.claim_lease = timedelta(seconds=tick_seconds * 10)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_forever())
+            logger.info("Monitoring scheduler started")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Monitoring scheduler stopped")
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Monitoring tick failed: {e}")
+            await asyncio.sleep(self.tick_seconds)
+
+    def cadence_for(self, tracked: TrackedPrompt) -> timedelta:
+        if tracked.interval_hours:
+            return timedelta(hours=tracked.interval_hours)
+        return self.interval
+
+    def next_run_at(self, tracked: TrackedPrompt) -> datetime:
+        """When a tracked prompt is next due"""
+        cadence = self.cadence_for(tracked)
+
+        if tracked.last_run_at is None:
+            # Stable phase offset inside the first cadence window spreads new prompts evenly
+            digest = hashlib.md5(f"{tracked.brand_id}:{tracked.id}".encode()).hexdigest()
+            phase = int(digest[:8], 16) / 0xFFFFFFFF
+            created = _as_utc(tracked.created_at) or datetime.now(timezone.utc)
+            return created + cadence * phase
+
+        # Seed the jitter with the last run so the due time is stable between ticks
+        last_run = _as_utc(tracked.last_run_at)
+        rng = random.Random(f"{tracked.id}:{last_run.timestamp()}")
+        jitter = rng.uniform(-self.jitter_fraction, self.jitter_fraction)
+        return last_run + cadence * (1 + jitter)
+
+    def _latest_results(self, db, runs: List[TrackedPrompt]) -> Dict[Tuple[int, str], datetime]:
+        """Newest stored result per (brand_id, prompt), in one query"""
+        keys = {(t.brand_id, t.prompt) for t in runs}
+        if not keys:
+            return {}
+        rows = db.query(
+            PromptTestRecord.brand_id, PromptTestRecord.prompt, func.max(PromptTestRecord.created_at)
+        ).filter(
+            PromptTestRecord.brand_id.in_({brand_id for brand_id, _ in keys}),
+            tuple_(PromptTestRecord.brand_id, PromptTestRecord.prompt).in_(keys)
+        ).group_by(PromptTestRecord.brand_id, PromptTestRecord.prompt).all()
+        return {(brand_id, prompt): _as_utc(latest) for brand_id, prompt, latest in rows}
+
+    def schedule_unscheduled(self, db, limit: int = 500) -> int:
+        """Fill next_run_at for new prompts and rows created before the column existed"""
+        pending = db.query(TrackedPrompt).filter(
+            TrackedPrompt.is_active == 1,
+            TrackedPrompt.next_run_at.is_(None)
+        ).limit(limit).all()
+        for tracked in pending:
+            tracked.next_run_at = self.next_run_at(tracked)
+        return len(pending)
+
+    def due_prompts(self, db, now: datetime, limit: int) -> List[TrackedPrompt]:
+        """Active tracked prompts that are due, oldest due time first"""
+        return db.query(TrackedPrompt).join(TrackedPrompt.brand).options(
+            contains_eager(TrackedPrompt.brand)
+        ).filter(
+            TrackedPrompt.is_active == 1,
+            Brand.is_active == 1,
+            TrackedPrompt.next_run_at <= now
+        ).order_by(TrackedPrompt.next_run_at).limit(limit).with_for_update(
+            skip_locked=True, of=TrackedPrompt  # other workers skip rows this tick is claiming
+        ).all()
+
+    def _dispatch_limit(self) -> int:
+        """How many prompt runs fit into one tick of the global call budget"""
+        calls_per_run = len(provider_registry.group("test_prompt"))
+        calls_per_tick = self.calls_per_minute * self.tick_seconds / 60.0
+        return max(1, int(calls_per_tick // calls_per_run))
+
+    def claim_due(self, now: datetime) -> List[ScheduledRun]:
+        """Pick this tick's runs and move their next_run_at past the claim lease"""
+        limit = self._dispatch_limit()
+        db = SessionLocal()
+        try:
+            if self.schedule_unscheduled(db):
+                db.commit()
+            # Deferred and fresh prompts are rescheduled rather than run; read extra so they do not starve the batch
+            due = self.due_prompts(db, now, limit * 4)
+            latest = self._latest_results(db, due)
+            batch = []
+            for tracked in due:
+                if usage_tracker.should_defer(tracked.brand.name):
+                    # Budget spent for today; try again after the daily reset
+                    tracked.next_run_at = _next_local_midnight()
+                    continue
+                fetched = latest.get((tracked.brand_id, tracked.prompt))
+                if fetched is not None and now - fetched < self.freshness:
+                    # Someone already tested this recently; just move the schedule forward
+                    tracked.last_run_at = now
+                    tracked.next_run_at = self.next_run_at(tracked)
+                    continue
+                if len(batch) < limit:
+                    tracked.next_run_at = now + self.claim_lease
+                    batch.append(ScheduledRun(
+                        tracked.id, tracked.brand_id, tracked.brand.name, tracked.prompt, tracked.competitors or None
+                    ))
+            db.commit()
+            return batch
+        finally:
+            db.close()
+
+    def record_run(self, run: ScheduledRun, analysis):
+        """Store a run's results and schedule the prompt's next run"""
+        db = SessionLocal()
+        try:
+            for result in analysis.results:
+                db.add(PromptTestRecord(
+                    brand_id=run.brand_id,
+                    tracked_prompt_id=run.tracked_prompt_id,
+                    prompt=run.prompt,
+                    provider=result.provider,
+                    model=result.model,
+                    response=result.response,
+                    rank_position=result.rank_position,
+                    sentiment_score=result.sentiment_score,
+                    confidence=result.confidence,
+                    response_time=result.response_time,
+                    brand_mentions=result.brand_mentions,
+                    competitor_mentions=result.competitor_mentions,
+                    citations=result.citations,
+                    analyzer_version=ANALYZER_VERSION
+                ))
+            tracked = db.get(TrackedPrompt, run.tracked_prompt_id)
+            if tracked is not None:
+                tracked.last_run_at = datetime.now(timezone.utc)
+                tracked.next_run_at = self.next_run_at(tracked)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def run_once(self) -> int:
+        """Dispatch all due prompts that fit the budget; returns the number of runs"""
+        batch = await run_in_threadpool(self.claim_due, datetime.now(timezone.utc))
+        if not batch:
+            return 0
+
+        async with OpenRouterService() as service:
+            await asyncio.gather(*[self._run_tracked_prompt(service, run) for run in batch])
+        return len(batch)
+
+    async def _run_tracked_prompt(self, service: OpenRouterService, run: ScheduledRun):
+        async with self.semaphore:
+            neutral = settings.monitoring_neutral_mode
+            if not (neutral and service.has_neutral_responses(run.prompt)):
+                await self.budget.acquire(len(provider_registry.group("test_prompt")))
+            try:
+                test = service.test_prompt_neutral if neutral else service.test_prompt_across_providers
+                analysis = await test(
+                    prompt=run.prompt,
+                    brand_name=run.brand_name,
+                    competitors=run.competitors
+                )
+                await run_in_threadpool(self.record_run, run, analysis)
+            except Exception as e:
+                # Retried once the claim lease runs out
+                logger.error(f"Scheduled run failed for tracked prompt {run.tracked_prompt_id}: {e}")
+
+def _next_local_midnight() -> datetime:
+    """When usage_tracker's daily spend (keyed by local date) resets"""
+    return datetime.combine(date.today() + timedelta(days=1), datetime.min.time()).astimezone(timezone.utc)
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+# Global instance
+monitoring_scheduler = MonitoringScheduler()
@@ -1,18 +1,146 @@
 import asyncio
 import aiohttp
 import json
+import logging
+import math
 import os
-from datetime import datetime
-from typing import List, Dict, Optional, Any
-from dataclasses import dataclass
-from enum import Enum
+import random
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Optional, Any, Tuple
+from dataclasses import dataclass, field
 from ..config import settings
 from urllib.parse import urlparse
+from .usage_tracker import usage_tracker
+from .cassette import cassette
+from .deadline import Deadline, client_timeout
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, circuit_breakers
+from .provider_registry import ModelConfig, ModelLimits, provider_registry
+from .analysis_memo import analysis_memo
+from .prompt_canonicalizer import prompt_canonicalizer
+from .request_timing import measure, trace_configs
+from .structured_output import INDUSTRY_OPTIONS, StructuredOutput, brand_info_output, content_grade_output
+from ..metrics import (observe_openrouter_call, observe_analysis_cpu, record_cache_lookup, record_invalid_fields,
+                       record_openrouter_error, record_openrouter_hedge, record_openrouter_retry,
+                       record_openrouter_timeout, record_structured_output)
 
-class AIProvider(Enum):
-    CHATGPT = "openai/gpt-4"
-    CLAUDE = "anthropic/claude-3-sonnet"
-    GEMINI = "google/gemini-pro"
+logger = logging.getLogger(__name__)
+
+# Used when a caller does not name competitors
+DEFAULT_COMPETITORS = ["Ford", "GM", "Rivian", "Mercedes", "BMW"]
+
+# Filled in for grade fields the model still got wrong after the repair attempts
+GRADE_DEFAULTS = {
+    "overall_grade": "B",
+    "numerical_score": 75,
+    "authority_score": 70,
+    "relevance_score": 80,
+    "completeness_score": 75,
+    "strengths": ["Well-structured content"],
+    "weaknesses": ["Could be more comprehensive"],
+    "recommendations": ["Add more specific examples"],
+    "keyword_analysis": {"primary_keywords": [], "missing_keywords": []},
+    "competitive_analysis": "",
+}
+
+# Filled in for brand info fields the model still got wrong after the repair attempts
+BRAND_INFO_DEFAULTS = {
+    "name": "Unknown",
+    "industry": "Other",
+    "description": "Unknown",
+}
+
+class OpenRouterAPIError(Exception):
+    """Non-200 response from the OpenRouter chat completions endpoint"""
+
+    def __init__(self, status: int, body: str = "", retry_after: Optional[float] = None):
+        self.status = status
+        self.body = body
+        self.retry_after = retry_after  # seconds, from the Retry-After header
+        super().__init__(f"OpenRouter API error: {status}")
+
+class LatencyTracker:
+    """Sliding window of successful call latencies per model"""
+
+    def __init__(self, window: int = 200, min_samples: int = settings.openrouter_hedge_min_samples):
+        self.window = window
+        self.min_samples = min_samples
+        self.samples: Dict[str, deque] = {}
+
+    def observe(self, model: str, seconds: float):
+        self.samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, model: str, pct: float) -> Optional[float]:
+        """Nearest-rank percentile, or None until `min_samples` calls have completed"""
+        samples = self.samples.get(model)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+        return ordered[rank - 1]
+
+_UNLIMITED = ModelLimits(0, 0)
+
+_RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+def _retry_reason(error: Exception) -> Optional[str]:
+    """Metric label for a retryable failure, or None if the error is permanent"""
+    if isinstance(error, OpenRouterAPIError):
+        return f"http_{error.status}" if error.status in _RETRYABLE_STATUSES else None
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)):
+        return "connection"
+    return None
+
+def _record_breaker_outcome(breaker: CircuitBreaker, error: Exception, cut_short: bool):
+    """5xx, timeouts and connection failures count against the model's circuit
+    
+    A timeout forced by the caller's own deadline says nothing about the upstream,
+    and a 4xx means the upstream is answering.
+    """
+    if isinstance(error, OpenRouterAPIError):
+        if error.status >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+    elif isinstance(error, asyncio.TimeoutError) and not cut_short:
+        breaker.record_failure()
+    elif isinstance(error, aiohttp.ClientConnectionError) and not isinstance(error, asyncio.TimeoutError):
+        breaker.record_failure()
+    else:
+        breaker.abandon()
+
+def _backoff_delay(attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait before retry number `attempt` + 1, or None to give up
+    
+    Honors Retry-After when the server sends one; otherwise exponential backoff
+    with full jitter so concurrent callers do not retry in lockstep.
+    """
+    base = settings.openrouter_backoff_base_seconds
+    if retry_after is not None:
+        if retry_after > settings.openrouter_max_retry_after_seconds:
+            return None
+        return retry_after + random.uniform(0, base)
+    return random.uniform(0, min(settings.openrouter_backoff_max_seconds, base * 2 ** attempt))
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either delta-seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
 
 @dataclass
 class PromptTestResult:
@@ -27,6 +155,20 @@ class PromptTestResult:
     response_time: float
     timestamp: datetime
     citations: List[str]
+    model: str = ""  # OpenRouter model id that produced the response
+
+@dataclass
+class NeutralResponse:
+    """A model's answer to the raw query, shared by every brand scored against it"""
+    provider: str
+    model: str
+    response: str
+    response_time: float
+    fetched_at: datetime
+
+# (model, normalised query) -> (monotonic fetch time, response), oldest first
+_neutral_cache: "OrderedDict[Tuple[str, str], Tuple[float, NeutralResponse]]" = OrderedDict()
+_neutral_in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
 
 @dataclass
 class CompetitiveAnalysis:
@@ -36,13 +178,15 @@ class CompetitiveAnalysis:
     ranking_summary: Dict[str, int]
     competitive_gaps: List[Dict[str, Any]]
     improvement_opportunities: List[str]
+    partial: bool = False  # True when some providers missed the deadline
+    missing_providers: List[str] = field(default_factory=list)
 
 class OpenRouterService:
     """Service for integrating with OpenRouter API to test prompts across multiple AI providers"""
     
     def __init__(self):
         self.api_key = settings.openrouter_api_key
-        self.base_url = "https://openrouter.ai/api/v1"
+        self.base_url = settings.openrouter_base_url
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "HTTP-Referer": "https://promptpulse.ai",
@@ -50,49 +194,258 @@ class OpenRouterService:
             "Content-Type": "application/json"
         }
         self.session = None
+        self._session_users = 0
+        self.latency_tracker = LatencyTracker()
+        # Shared by every instance so scheduler ticks and API requests reuse each other's answers
+        self.neutral_cache = _neutral_cache
+        self._neutral_in_flight = _neutral_in_flight
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        # The global instance is entered by concurrent requests; share one session
+        # and close it only when the last user leaves
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(trace_configs=trace_configs())
+        self._session_users += 1
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        self._session_users -= 1
+        if self.session and self._session_users <= 0:
+            self._session_users = 0
             await self.session.close()
     
+    async def chat_completion(
+        self,
+        payload: Dict[str, Any],
+        endpoint: str,
+        brand_name: Optional[str] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        deadline: Optional[Deadline] = None,
+        model_config: Optional[ModelConfig] = None,
+        group: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """POST a chat completion, retrying transient failures, and record its usage against brand/model/endpoint
+        
+        `timeout` caps each attempt; `deadline` caps the whole call including retries.
+        `model_config` is the registry entry the payload was built from and `group` its
+        provider group (defaults to the endpoint); its concurrency, rate limit and timeout apply.
+        """
+        
+        requested_model = payload["model"]
+        payload = dict(payload)
+        payload["model"] = await usage_tracker.resolve_model_async(brand_name, requested_model)
+        payload["usage"] = {"include": True}  # Ask OpenRouter to report cost
+        
+        model = payload["model"]
+        if retries is None:
+            retries = settings.openrouter_max_retries
+        limits = _UNLIMITED
+        if model_config is not None:
+            limits = provider_registry.limits(group or endpoint, model_config)
+            timeout = timeout or model_config.timeout_seconds
+        
+        breaker = circuit_breakers.get(model)
+        attempt = 0
+        while True:
+            if deadline is not None:
+                deadline.check()
+            breaker.before_call()
+            attempt_timeout = None
+            try:
+                async with limits.slot():
+                    if deadline is not None:
+                        deadline.check()  # the deadline may have passed while queued for the slot
+                    attempt_timeout = client_timeout(deadline, timeout)
+                    started = time.perf_counter()
+                    data = await self._attempt(payload, endpoint, attempt_timeout)
+                breaker.record_success()
+                break
+            except asyncio.CancelledError:
+                breaker.abandon()
+                raise
+            except Exception as e:
+                # Expiring in the queue, or a timeout shortened by the deadline, says nothing about the model
+                cut_short = deadline is not None and (
+                    attempt_timeout is None or attempt_timeout.total < (timeout or settings.openrouter_timeout_seconds)
+                )
+                _record_breaker_outcome(breaker, e, cut_short)
+                reason = _retry_reason(e)
+                delay = _backoff_delay(attempt, getattr(e, "retry_after", None)) if reason else None
+                if delay is None or attempt >= retries:
+                    raise
+                if deadline is not None and delay >= deadline.remaining():
+                    raise
+                record_openrouter_retry(model, endpoint, reason)
+                attempt += 1
+                await asyncio.sleep(delay)
+        
+        self.latency_tracker.observe(model, time.perf_counter() - started)
+        await asyncio.to_thread(usage_tracker.record, data, payload["model"], endpoint, brand_name)
+        return data
+
+    async def _attempt(self, payload: Dict[str, Any], endpoint: str, timeout: aiohttp.ClientTimeout) -> Dict[str, Any]:
+        """One upstream attempt, with latency and error metrics"""
+        model = payload["model"]
+        try:
+            with observe_openrouter_call(model, endpoint):
+                return await self._send(payload, endpoint, timeout)
+        except OpenRouterAPIError as e:
+            record_openrouter_error(model, endpoint, f"http_{e.status}")
+            raise
+        except asyncio.TimeoutError:
+            record_openrouter_timeout(model, endpoint)
+            raise
+        except Exception:
+            record_openrouter_error(model, endpoint, "exception")
+            raise
+
+    async def hedged_chat_completion(
+        self,
+        payload: Dict[str, Any],
+        endpoint: str,
+        brand_name: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        model_config: Optional[ModelConfig] = None,
+        group: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """chat_completion that sends a second request if the first outlives the model's p95 latency
+        
+        Whichever request succeeds first wins and the other is cancelled. Hedging is
+        skipped until the model has enough latency samples to estimate its p95.
+        """
+        model = payload["model"]
+        hedge_after = self.latency_tracker.percentile(model, 95) if settings.openrouter_hedge_enabled else None
+        if hedge_after is None:
+            return await self.chat_completion(payload, endpoint, brand_name, deadline=deadline, model_config=model_config, group=group)
+        
+        primary = asyncio.create_task(self.chat_completion(payload, endpoint, brand_name, deadline=deadline, model_config=model_config, group=group))
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done:
+            return primary.result()
+        
+        hedge = asyncio.create_task(self.chat_completion(payload, endpoint, brand_name, deadline=deadline, model_config=model_config, group=group))
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        record_openrouter_hedge(model, "hedge" if task is hedge else "primary")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _send(self, payload: Dict[str, Any], endpoint: str, timeout: aiohttp.ClientTimeout) -> Dict[str, Any]:
+        """Serve from the cassette when replaying, otherwise call OpenRouter (recording if enabled)"""
+        if cassette.replaying:
+            interaction = await asyncio.wait_for(cassette.replay_async(payload), timeout.total)
+            if interaction.status != 200:
+                raise OpenRouterAPIError(interaction.status, interaction.body)
+            return interaction.response
+
+        started = time.perf_counter()
+        try:
+            if self.session is None or self.session.closed:
+                # Called outside `async with` (e.g. discovery routes); use a short-lived session
+                async with aiohttp.ClientSession(trace_configs=trace_configs()) as session:
+                    data = await self._post_completion(session, payload, timeout)
+            else:
+                data = await self._post_completion(self.session, payload, timeout)
+        except OpenRouterAPIError as e:
+            await cassette.record_async(payload, endpoint, time.perf_counter() - started, status=e.status, body=e.body)
+            raise
+        await cassette.record_async(payload, endpoint, time.perf_counter() - started, response=data)
+        return data
+
+    async def _post_completion(
+        self,
+        session: aiohttp.ClientSession,
+        payload: Dict[str, Any],
+        timeout: aiohttp.ClientTimeout
+    ) -> Dict[str, Any]:
+        model = payload["model"]
+        async with session.post(
+            f"{self.base_url}/chat/completions",
+            headers=self.headers,
+            json=payload,
+            timeout=timeout,
+            trace_request_ctx={"label": model}
+        ) as response:
+            if response.status != 200:
+                raise OpenRouterAPIError(
+                    response.status,
+                    await response.text(),
+                    retry_after=_parse_retry_after(response.headers.get("Retry-After"))
+                )
+            with measure("body_read", model):
+                body = await response.read()
+        with measure("json_decode", model):
+            return json.loads(body)
+    
     async def test_prompt_across_providers(
         self, 
         prompt: str, 
         brand_name: str = "Tesla",
-        competitors: List[str] = None
+        competitors: List[str] = None,
+        deadline: Optional[Deadline] = None
     ) -> CompetitiveAnalysis:
-        """Test a prompt across ChatGPT, Claude, and Gemini to analyze competitive positioning"""
+        """Test a prompt across ChatGPT, Claude, and Gemini to analyze competitive positioning
         
-        if competitors is None:
-            competitors = ["Ford", "GM", "Rivian", "Mercedes", "BMW"]
+        Providers still outstanding when the deadline passes are cancelled and
+        providers whose circuit is open are skipped; the analysis then covers the
+        providers that answered and is marked partial.
+        """
         
-        tasks = []
-        for provider in AIProvider:
-            task = self._test_single_provider(prompt, provider, brand_name, competitors)
-            tasks.append(task)
+        if competitors is None:
+            competitors = DEFAULT_COMPETITORS
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        tasks = {
+            asyncio.create_task(self._test_single_provider(prompt, config, brand_name, competitors, deadline)): config
+            for config in provider_registry.group("test_prompt")
+        }
         
-        # Filter out exceptions and process results
-        valid_results = [r for r in results if isinstance(r, PromptTestResult)]
+        _, pending = await asyncio.wait(tasks, timeout=deadline.remaining() if deadline else None)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        # Keep provider order; timeouts, open circuits and cancellations count as missing
+        valid_results = []
+        missing_providers = []
+        for task, config in tasks.items():
+            if task.cancelled() or isinstance(task.exception(), (asyncio.TimeoutError, CircuitOpenError)):
+                missing_providers.append(config.name)
+            elif task.exception() is None:
+                valid_results.append(task.result())
         
         analysis = self._analyze_competitive_results(prompt, valid_results, brand_name, competitors)
+        analysis.partial = bool(missing_providers)
+        analysis.missing_providers = missing_providers
         return analysis
     
     async def _test_single_provider(
         self, 
         prompt: str, 
-        provider: AIProvider, 
+        provider: ModelConfig,
         brand_name: str,
-        competitors: List[str]
+        competitors: List[str],
+        deadline: Optional[Deadline] = None
     ) -> PromptTestResult:
-        """Test a single prompt against one AI provider"""
+        """Test a single prompt against one AI provider
+        
+        Raises asyncio.TimeoutError if it runs out of time and CircuitOpenError if
+        the model is failing fast; other errors become a failed result.
+        """
         
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         # Create competitive analysis prompt
         analysis_prompt = f"""
@@ -108,65 +461,200 @@ class OpenRouterService:
         """
         
         try:
-            async with self.session.post(
-                f"{self.base_url}/chat/completions",
-                headers=self.headers,
-                json={
-                    "model": provider.value,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": analysis_prompt
-                        }
-                    ],
-                    "max_tokens": 1000,
-                    "temperature": 0.7
-                }
-            ) as response:
-                
-                response_time = (datetime.now() - start_time).total_seconds()
-                
-                if response.status == 200:
-                    data = await response.json()
-                    ai_response = data['choices'][0]['message']['content']
-                    
-                    # Analyze the response for competitive insights
-                    analysis = await self._analyze_response(
-                        prompt, ai_response, brand_name, competitors, provider.name
-                    )
-                    
-                    return PromptTestResult(
-                        provider=provider.name,
-                        prompt=prompt,
-                        response=ai_response,
-                        rank_position=analysis['rank_position'],
-                        brand_mentions=analysis['brand_mentions'],
-                        competitor_mentions=analysis['competitor_mentions'],
-                        sentiment_score=analysis['sentiment_score'],
-                        confidence=analysis['confidence'],
-                        response_time=response_time,
-                        timestamp=datetime.now(),
-                        citations=analysis['citations']
-                    )
-                else:
-                    raise Exception(f"API error: {response.status}")
-                    
-        except Exception as e:
-            print(f"Error testing {provider.name}: {e}")
-            # Return a failed result
+            data = await self.hedged_chat_completion(
+                provider.build_payload([
+                    {
+                        "role": "user",
+                        "content": analysis_prompt
+                    }
+                ]),
+                endpoint="test_prompt",
+                brand_name=brand_name,
+                deadline=deadline,
+                model_config=provider
+            )
+            
+            response_time = time.perf_counter() - start_time
+            ai_response = data['choices'][0]['message']['content']
+            
+            # Analyze the response for competitive insights
+            with measure("analysis", provider.name):
+                analysis = await self._analyze_response(
+                    prompt, ai_response, brand_name, competitors, provider.name
+                )
+            
             return PromptTestResult(
                 provider=provider.name,
                 prompt=prompt,
-                response=f"Error: {str(e)}",
-                rank_position=None,
-                brand_mentions=[],
-                competitor_mentions=[],
-                sentiment_score=0.0,
-                confidence=0.0,
-                response_time=(datetime.now() - start_time).total_seconds(),
+                response=ai_response,
+                rank_position=analysis['rank_position'],
+                brand_mentions=analysis['brand_mentions'],
+                competitor_mentions=analysis['competitor_mentions'],
+                sentiment_score=analysis['sentiment_score'],
+                confidence=analysis['confidence'],
+                response_time=response_time,
                 timestamp=datetime.now(),
-                citations=[]
+                citations=analysis['citations'],
+                model=data.get("model") or provider.model
             )
+        
+        except (asyncio.TimeoutError, CircuitOpenError):
+            raise
+        except Exception as e:
+            print(f"Error testing {provider.name}: {e}")
+            return self._failed_result(prompt, provider, str(e), time.perf_counter() - start_time)
+    
+    def _failed_result(self, prompt: str, provider: ModelConfig, error: str, response_time: float) -> PromptTestResult:
+        return PromptTestResult(
+            provider=provider.name,
+            prompt=prompt,
+            response=f"Error: {error}",
+            rank_position=None,
+            brand_mentions=[],
+            competitor_mentions=[],
+            sentiment_score=0.0,
+            confidence=0.0,
+            response_time=response_time,
+            timestamp=datetime.now(),
+            citations=[],
+            model=provider.model
+        )
+    
+    def _neutral_key(self, query: str, config: ModelConfig) -> Tuple[str, str]:
+        return (config.model, prompt_canonicalizer.key(query))
+    
+    def _cached_neutral(self, key: Tuple[str, str]) -> Optional[NeutralResponse]:
+        entry = self.neutral_cache.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > settings.neutral_cache_ttl_hours * 3600:
+            del self.neutral_cache[key]
+            return None
+        self.neutral_cache.move_to_end(key)
+        return entry[1]
+    
+    def has_neutral_responses(self, query: str) -> bool:
+        """True if every test_prompt model already has a cached neutral answer to `query`"""
+        return all(self._cached_neutral(self._neutral_key(query, c)) for c in provider_registry.group("test_prompt"))
+    
+    async def _fetch_neutral(self, query: str, config: ModelConfig, key: Tuple[str, str]) -> NeutralResponse:
+        start_time = time.perf_counter()
+        try:
+            data = await self.hedged_chat_completion(
+                config.build_payload([{"role": "user", "content": query}]),
+                endpoint="neutral_query",
+                model_config=config,
+                group="test_prompt"
+            )
+        finally:
+            self._neutral_in_flight.pop(key, None)
+        response = NeutralResponse(
+            provider=config.name,
+            model=data.get("model") or config.model,
+            response=data['choices'][0]['message']['content'],
+            response_time=time.perf_counter() - start_time,
+            fetched_at=datetime.now()
+        )
+        self.neutral_cache[key] = (time.monotonic(), response)
+        while len(self.neutral_cache) > settings.neutral_cache_max_entries:
+            self.neutral_cache.popitem(last=False)
+        return response
+    
+    async def _neutral_response(self, query: str, config: ModelConfig) -> NeutralResponse:
+        """One model's brand-neutral answer to `query`, from cache or a single shared upstream call"""
+        key = self._neutral_key(query, config)
+        cached = self._cached_neutral(key)
+        record_cache_lookup("neutral_query", cached is not None)
+        if cached is not None:
+            return cached
+        task = self._neutral_in_flight.get(key)
+        if task is None:
+            # Concurrent callers share this call; it finishes (and is cached) even if they give up
+            task = self._neutral_in_flight[key] = asyncio.ensure_future(self._fetch_neutral(query, config, key))
+        return await asyncio.shield(task)
+    
+    async def fetch_neutral_responses(
+        self,
+        query: str,
+        deadline: Optional[Deadline] = None
+    ) -> Tuple[List[Tuple[ModelConfig, Any]], List[str]]:
+        """Ask every test_prompt model the raw query once
+        
+        Returns ([(model config, NeutralResponse or the error it raised)], missing providers).
+        """
+        tasks = {
+            asyncio.ensure_future(self._neutral_response(query, config)): config
+            for config in provider_registry.group("test_prompt")
+        }
+        _, pending = await asyncio.wait(tasks, timeout=deadline.remaining() if deadline else None)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        answers = []
+        missing_providers = []
+        for task, config in tasks.items():
+            if task.cancelled() or isinstance(task.exception(), (asyncio.TimeoutError, CircuitOpenError)):
+                missing_providers.append(config.name)
+            else:
+                answers.append((config, task.exception() or task.result()))
+        return answers, missing_providers
+    
+    async def test_query_for_brands(
+        self,
+        query: str,
+        brands: List[Tuple[str, Optional[List[str]]]],
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, CompetitiveAnalysis]:
+        """Brand-neutral mode: one upstream call per model, scored locally for every brand
+        
+        `brands` is a list of (brand_name, competitors). The raw query carries no brand
+        or competitor names, so its answers are cached and shared across brands.
+        """
+        answers, missing_providers = await self.fetch_neutral_responses(query, deadline)
+        
+        analyses = {}
+        for brand_name, competitors in brands:
+            if competitors is None:
+                competitors = DEFAULT_COMPETITORS
+            results = []
+            for config, answer in answers:
+                if isinstance(answer, Exception):
+                    results.append(self._failed_result(query, config, str(answer), 0.0))
+                    continue
+                with measure("analysis", config.name):
+                    analysis = await self._analyze_response(query, answer.response, brand_name, competitors, config.name)
+                results.append(PromptTestResult(
+                    provider=config.name,
+                    prompt=query,
+                    response=answer.response,
+                    rank_position=analysis['rank_position'],
+                    brand_mentions=analysis['brand_mentions'],
+                    competitor_mentions=analysis['competitor_mentions'],
+                    sentiment_score=analysis['sentiment_score'],
+                    confidence=analysis['confidence'],
+                    response_time=answer.response_time,
+                    timestamp=answer.fetched_at,
+                    citations=analysis['citations'],
+                    model=answer.model
+                ))
+            brand_analysis = self._analyze_competitive_results(query, results, brand_name, competitors)
+            brand_analysis.partial = bool(missing_providers)
+            brand_analysis.missing_providers = list(missing_providers)
+            analyses[brand_name] = brand_analysis
+        return analyses
+    
+    async def test_prompt_neutral(
+        self,
+        prompt: str,
+        brand_name: str = "Tesla",
+        competitors: List[str] = None,
+        deadline: Optional[Deadline] = None
+    ) -> CompetitiveAnalysis:
+        """test_prompt_across_providers in brand-neutral mode"""
+        analyses = await self.test_query_for_brands(prompt, [(brand_name, competitors)], deadline)
+        return analyses[brand_name]
     
     async def _analyze_response(
         self, 
@@ -176,8 +664,16 @@ class OpenRouterService:
         competitors: List[str],
         provider: str
     ) -> Dict[str, Any]:
-        """Analyze AI response for competitive insights"""
-        
+        """Analyze AI response for competitive insights, reusing memoized results"""
+        key = analysis_memo.key(response, brand_name, competitors)
+        analysis = analysis_memo.get(key)
+        if analysis is None:
+            analysis = self._compute_analysis(response, brand_name, competitors)
+            analysis_memo.put(key, analysis)
+        return analysis
+    
+    @observe_analysis_cpu("analyze_response")
+    def _compute_analysis(self, response: str, brand_name: str, competitors: List[str]) -> Dict[str, Any]:
         response_lower = response.lower()
         brand_lower = brand_name.lower()
         
@@ -426,11 +922,67 @@ class OpenRouterService:
             improvement_opportunities=improvement_opportunities
         )
     
+    async def structured_completion(
+        self,
+        output: StructuredOutput,
+        config: ModelConfig,
+        messages: List[Dict[str, str]],
+        endpoint: str,
+        brand_name: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        **extra
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Ask for a JSON reply matching `output`, then re-ask for only the fields that failed validation
+        
+        Models flagged `structured_output` get a strict JSON-schema response_format and
+        are routed only to providers that honour it; other models get the schema in the
+        prompt. Returns the valid values and {field: error} for fields still invalid after
+        STRUCTURED_OUTPUT_REPAIR_ATTEMPTS re-asks.
+        """
+        values: Dict[str, Any] = {}
+        fields = output.fields
+        for attempt in range(settings.structured_output_repair_attempts + 1):
+            request_extra = dict(extra)
+            request_messages = list(messages)
+            if config.structured_output:
+                request_extra["response_format"] = output.response_format(fields)
+                request_extra["provider"] = {"require_parameters": True}
+            else:
+                schema = json.dumps(output.json_schema(fields))
+                last = request_messages[-1]
+                request_messages[-1] = {**last, "content": f"{last['content']}\n\nReply with only a JSON object matching this JSON schema:\n{schema}"}
+            
+            data = await self.chat_completion(
+                config.build_payload(request_messages, **request_extra),
+                endpoint=endpoint,
+                brand_name=brand_name,
+                deadline=deadline,
+                model_config=config
+            )
+            reply = data["choices"][0]["message"].get("content") or ""
+            with measure("analysis", f"{endpoint} parsing"):
+                parsed, errors = output.parse(reply, fields)
+            values.update(parsed)
+            if not errors:
+                break
+            record_invalid_fields(endpoint, errors)
+            fields = tuple(errors)
+            problems = "\n".join(f"- {name}: {error}" for name, error in errors.items())
+            messages = messages + [
+                {"role": "assistant", "content": reply},
+                {"role": "user", "content": f"These fields of your JSON were missing or invalid:\n{problems}\n"
+                                            f"Reply with a JSON object containing only these fields, corrected."}
+            ]
+        
+        record_structured_output(endpoint, "invalid" if errors else "repaired" if attempt else "valid")
+        return {name: values[name] for name in output.fields if name in values}, errors
+
     async def grade_content(
         self, 
         prompt: str, 
         content: str,
-        brand_name: str = "Tesla"
+        brand_name: str = "Tesla",
+        deadline: Optional[Deadline] = None
     ) -> Dict[str, Any]:
         """Grade content performance for a specific prompt"""
         
@@ -456,61 +1008,29 @@ class OpenRouterService:
         """
         
         try:
-            async with self.session.post(
-                f"{self.base_url}/chat/completions",
-                headers=self.headers,
-                json={
-                    "model": AIProvider.CLAUDE.value,  # Use Claude for content analysis
-                    "messages": [
-                        {
-                            "role": "user", 
-                            "content": grading_prompt
-                        }
-                    ],
-                    "max_tokens": 1500,
-                    "temperature": 0.3
-                }
-            ) as response:
-                
-                if response.status == 200:
-                    data = await response.json()
-                    ai_response = data['choices'][0]['message']['content']
-                    
-                    # Try to parse JSON response
-                    try:
-                        # Look for JSON in the response
-                        import re
-                        json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-                        if json_match:
-                            grade_data = json.loads(json_match.group())
-                        else:
-                            # Fallback to structured parsing
-                            grade_data = self._parse_grade_response(ai_response)
-                        
-                        # Ensure all required fields exist
-                        grade_data.setdefault('overall_grade', 'B')
-                        grade_data.setdefault('numerical_score', 75)
-                        grade_data.setdefault('authority_score', 70)
-                        grade_data.setdefault('relevance_score', 80)
-                        grade_data.setdefault('completeness_score', 75)
-                        grade_data.setdefault('strengths', ["Well-structured content"])
-                        grade_data.setdefault('weaknesses', ["Could be more comprehensive"])
-                        grade_data.setdefault('recommendations', ["Add more specific examples"])
-                        
-                        return grade_data
-                        
-                    except json.JSONDecodeError:
-                        # Fallback to basic analysis
-                        return self._fallback_content_grade(content, prompt)
-                
-                else:
-                    return self._fallback_content_grade(content, prompt)
-                    
+            grader = provider_registry.primary("grade_content")
+            grade_data, invalid = await self.structured_completion(
+                content_grade_output,
+                grader,
+                [{"role": "user", "content": grading_prompt}],
+                endpoint="grade_content",
+                brand_name=brand_name,
+                deadline=deadline
+            )
         except Exception as e:
             print(f"Error grading content: {e}")
             return self._fallback_content_grade(content, prompt)
+        
+        if not grade_data:
+            # Nothing usable even after re-asking
+            return self._fallback_content_grade(content, prompt)
+        if invalid:
+            for name in invalid:
+                grade_data[name] = GRADE_DEFAULTS[name]
+            grade_data["defaulted_fields"] = sorted(invalid)
+        return grade_data
     
-    async def discover_competitors(self, website_url: str) -> List[str]:
+    async def discover_competitors(self, website_url: str, deadline: Optional[Deadline] = None) -> List[str]:
         """Use OpenRouter/ChatGPT to find direct competitor URLs for a given company website."""
         prompt = f'''
 You are Rival, a focused competitor research AI that finds direct competitor URLs for any given company website.
@@ -566,29 +1086,23 @@ Only include direct competitors
 Exclude marketplace sites, review sites, or news articles
 If no direct competitors found, return "No direct competitors found"
 '''
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.base_url}/chat/completions",
-                headers=self.headers,
-                json={
-                    "model": "openai/gpt-3.5-turbo",  # or gpt-4o if available/cost-effective
-                    "messages": [
-                        {"role": "user", "content": prompt}
-                    ],
-                    "max_tokens": 512,
-                    "temperature": 0.2
-                }
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    ai_response = data['choices'][0]['message']['content']
-                    # Parse URLs from response (one per line)
-                    urls = [line.strip() for line in ai_response.splitlines() if line.strip().startswith("http")]
-                    return urls
-                else:
-                    raise Exception(f"OpenRouter API error: {response.status}")
+        config = provider_registry.primary("discover_competitors")
+        data = await self.chat_completion(
+            config.build_payload([
+                {"role": "user", "content": prompt}
+            ]),
+            endpoint="discover_competitors",
+            deadline=deadline,
+            model_config=config
+        )
+        ai_response = data['choices'][0]['message']['content']
+        # Parse URLs from response (one per line)
+        urls = [line.strip() for line in ai_response.splitlines() if line.strip().startswith("http")]
+        return urls
     
-    async def discover_prompts(self, website_url: str, competitors: List[str]) -> List[str]:
+    async def discover_prompts(
+        self, website_url: str, competitors: List[str], deadline: Optional[Deadline] = None
+    ) -> List[str]:
         """Use OpenRouter/ChatGPT to find 10-15 high-value prompt ideas for a brand and its competitors."""
         prompt = f'''
 You are a world-class AEO content strategist. Your task is to generate a list of 10-15 high-value, high-impact prompt ideas (content opportunities) for the brand at {website_url}.
@@ -607,68 +1121,19 @@ electric vehicle tax incentives 2024
 EV charging station etiquette
 ...
 '''
-        model = "openai/gpt-4o"  # or "openai/gpt-3.5-turbo" for lower cost
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.base_url}/chat/completions",
-                headers=self.headers,
-                json={
-                    "model": model,
-                    "messages": [
-                        {"role": "user", "content": prompt}
-                    ],
-                    "max_tokens": 512,
-                    "temperature": 0.7
-                }
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    content = data['choices'][0]['message']['content']
-                    # Split by lines, filter empty
-                    prompts = [line.strip() for line in content.split('\n') if line.strip()]
-                    return prompts
-                else:
-                    raise Exception(f"OpenRouter API error: {response.status}")
-    
-    def _parse_grade_response(self, response: str) -> Dict[str, Any]:
-        """Parse non-JSON grade response into structured data"""
-        
-        # Basic parsing logic for when JSON parsing fails
-        lines = response.split('\n')
-        
-        grade_data = {
-            'overall_grade': 'B',
-            'numerical_score': 75,
-            'authority_score': 70,
-            'relevance_score': 80,
-            'completeness_score': 75,
-            'strengths': [],
-            'weaknesses': [],
-            'recommendations': []
-        }
-        
-        current_section = None
-        
-        for line in lines:
-            line = line.strip()
-            if 'grade' in line.lower() and any(g in line for g in ['A', 'B', 'C', 'D', 'F']):
-                # Extract grade
-                for grade in ['A', 'B', 'C', 'D', 'F']:
-                    if grade in line:
-                        grade_data['overall_grade'] = grade
-                        break
-            
-            elif 'strength' in line.lower():
-                current_section = 'strengths'
-            elif 'weakness' in line.lower() or 'improvement' in line.lower():
-                current_section = 'weaknesses'
-            elif 'recommend' in line.lower():
-                current_section = 'recommendations'
-            elif line.startswith('-') or line.startswith('•'):
-                if current_section and current_section in grade_data:
-                    grade_data[current_section].append(line[1:].strip())
-        
-        return grade_data
+        config = provider_registry.primary("discover_prompts")
+        data = await self.chat_completion(
+            config.build_payload([
+                {"role": "user", "content": prompt}
+            ]),
+            endpoint="discover_prompts",
+            deadline=deadline,
+            model_config=config
+        )
+        content = data['choices'][0]['message']['content']
+        # Split by lines, filter empty
+        prompts = [line.strip() for line in content.split('\n') if line.strip()]
+        return prompts
     
     def _fallback_content_grade(
         self, 
@@ -693,12 +1158,9 @@ EV charging station etiquette
             "error": "AI_GRADING_FAILED"
         }
 
-    async def extract_brand_info(self, website_url: str) -> dict:
+    async def extract_brand_info(self, website_url: str, deadline: Optional[Deadline] = None) -> dict:
         """Use OpenRouter/ChatGPT to extract brand name, industry, and description from a website URL, using web search and strict dropdown matching."""
-        industry_options = [
-            "Automotive", "Technology", "Healthcare", "Finance", "Retail",
-            "Real Estate", "Education", "Manufacturing", "Energy", "Other"
-        ]
+        industry_options = list(INDUSTRY_OPTIONS)
         prompt = f'''
 You are Iris, an expert AI brand analyst. Your job is to extract structured brand information from a company's homepage URL.
 
@@ -723,55 +1185,39 @@ Example output:
 
 The company homepage URL is: {website_url}
 '''
-        payload = {
-            "model": "openai/gpt-4o",
-            "messages": [
-                {"role": "system", "content": "You are Iris, an expert AI brand analyst."},
-                {"role": "user", "content": prompt}
-            ],
-            "plugins": [{"id": "web"}]
-        }
-        async with self.session.post(
-            f"{self.base_url}/chat/completions",
-            headers=self.headers,
-            json=payload,
-            timeout=60
-        ) as resp:
-            if resp.status != 200:
-                text = await resp.text()
-                print(f"OpenRouter API Error: {resp.status} - {text}")
-                raise Exception(f"OpenRouter API error: {resp.status}")
-            data = await resp.json()
-            content = data["choices"][0]["message"]["content"]
-            # Try to extract JSON from the response
-            try:
-                import json as pyjson
-                start = content.find('{')
-                end = content.rfind('}') + 1
-                json_str = content[start:end]
-                info = pyjson.loads(json_str)
-                # Ensure all required fields are present
-                for key in ["name", "industry", "description"]:
-                    if key not in info:
-                        info[key] = "Unknown"
-                # After parsing info from AI:
-                if info.get("name", "").lower() == "unknown":
-                    netloc = urlparse(website_url).netloc
-                    if netloc:
-                        # Remove www. and TLD, get the main domain
-                        parts = netloc.split('.')
-                        # e.g. www.mezi.com.au → mezi, shop.mezi.com → mezi
-                        if len(parts) >= 2:
-                            name = parts[-3] if parts[-2] in ["com", "co"] and len(parts) >= 3 else parts[-2]
-                        else:
-                            name = parts[0]
-                        info["name"] = name.upper() if name else "Unknown"
-                    else:
-                        info["name"] = "Unknown"
-                return info
-            except Exception as e:
-                print(f"Failed to parse JSON from AI response: {content}")
-                return {"name": "Unknown", "industry": "Other", "description": content.strip()}
+        config = provider_registry.primary("extract_brand_info")
+        try:
+            info, invalid = await self.structured_completion(
+                brand_info_output,
+                config,
+                [
+                    {"role": "system", "content": "You are Iris, an expert AI brand analyst."},
+                    {"role": "user", "content": prompt}
+                ],
+                endpoint="extract_brand_info",
+                deadline=deadline,
+                plugins=[{"id": "web"}]
+            )
+        except OpenRouterAPIError as e:
+            print(f"OpenRouter API Error: {e.status} - {e.body}")
+            raise
+        if invalid:
+            logger.warning(f"Brand info fields still invalid for {website_url}: {invalid}")
+            for name in invalid:
+                info[name] = BRAND_INFO_DEFAULTS[name]
+            info["defaulted_fields"] = sorted(invalid)
+        if info["name"].lower() == "unknown":
+            netloc = urlparse(website_url).netloc
+            if netloc:
+                # Remove www. and TLD, get the main domain
+                parts = netloc.split('.')
+                # e.g. www.mezi.com.au → mezi, shop.mezi.com → mezi
+                if len(parts) >= 2:
+                    name = parts[-3] if parts[-2] in ["com", "co"] and len(parts) >= 3 else parts[-2]
+                else:
+                    name = parts[0]
+                info["name"] = name.upper() if name else "Unknown"
+        return info
 
 # Global service instance
 openrouter_service = OpenRouterService()
\ No newline at end of file
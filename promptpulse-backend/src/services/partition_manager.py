@@ -0,0 +1,224 @@
+import logging
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import inspect, text
+
+from ..config import settings
+from ..database import Base, engine
+from .mention_search import ensure_search_index
+
+logger = logging.getLogger(__name__)
+
+# High-volume history tables, range-partitioned by month on created_at (Postgres only)
+PARTITIONED_TABLES = ("brand_mentions", "prompt_test_results")
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+class PartitionManager:
+    """Monthly range partitions on created_at for the tables in PARTITIONED_TABLES.
+
+    `convert` turns an existing table into a partitioned one. The old table is kept
+    as a single partition for everything before the current month, so no rows are
+    copied. `ensure_partitions` creates upcoming months ahead of time. Time-bounded
+    queries on created_at then prune to the months they cover, and
+    `detach_expired` hands whole old months to the retention job.
+    """
+
+    def __init__(self, bind=None, months_ahead: int = settings.partition_months_ahead):
+        self.bind = bind or engine
+        self.months_ahead = months_ahead
+
+    @property
+    def supported(self) -> bool:
+        return self.bind.dialect.name == "postgresql"
+
+    def is_partitioned(self, conn, table: str) -> bool:
+        return conn.execute(
+            text("SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table"),
+            {"table": table}
+        ).first() is not None
+
+    def partitions(self, conn, table: str) -> List[Tuple[str, Optional[datetime], Optional[datetime]]]:
+        """(name, lower bound, upper bound) of each partition; None for MINVALUE/MAXVALUE"""
+        rows = conn.execute(text(
+            "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+            "FROM pg_inherits i JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid WHERE parent.relname = :table"
+        ), {"table": table})
+        return [(name, *self._parse_bound(bound)) for name, bound in rows]
+
+    @staticmethod
+    def _parse_bound(bound: str) -> Tuple[Optional[datetime], Optional[datetime]]:
+        # e.g. FOR VALUES FROM ('2026-10-01 00:00:00+00') TO ('2026-11-01 00:00:00+00'), or DEFAULT
+        if bound.strip().upper() == "DEFAULT":
+            return None, None
+
+        def value(part: str) -> Optional[datetime]:
+            part = part.strip().strip("()")
+            if part.upper() in ("MINVALUE", "MAXVALUE"):
+                return None
+            return datetime.fromisoformat(part.strip("'"))
+        lower, upper = bound.split(" FROM ", 1)[1].split(" TO ")
+        return value(lower), value(upper)
+
+    def ensure_partitions(self, today: Optional[date] = None) -> List[str]:
+        """Create this month's and the next `months_ahead` months' partitions where missing"""
+        if not self.supported:
+            return []
+        today = today or datetime.now(timezone.utc).date()
+        created = []
+        with self.bind.begin() as conn:
+            for table in PARTITIONED_TABLES:
+                if not self.is_partitioned(conn, table):
+                    continue
+                existing = {name for name, _, _ in self.partitions(conn, table)}
+                for offset in range(self.months_ahead + 1):
+                    month = _add_months(_month_start(today), offset)
+                    name = partition_name(table, month)
+                    if name in existing or self._covered(conn, table, month):
+                        continue
+                    conn.execute(text(
+                        f"CREATE TABLE {name} PARTITION OF {table} "
+                        f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{_add_months(month, 1)} 00:00:00+00')"
+                    ))
+                    created.append(name)
+        if created:
+            logger.info(f"Created partitions: {created}")
+        return created
+
+    def ensure_default(self, conn, table: str) -> str:
+        """Create the DEFAULT partition of `table` if missing; it holds rows whose month has no partition"""
+        name = f"{table}_default"
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} DEFAULT"))
+        return name
+
+    def _covered(self, conn, table: str, month: date) -> bool:
+        # The converted legacy partition already holds everything before its upper bound
+        start = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+        return any(
+            (lower is None or lower <= start) and upper is not None and start < upper
+            for _, lower, upper in self.partitions(conn, table)
+        )
+
+    @staticmethod
+    def missing_foreign_keys(conn, table: str) -> List[str]:
+        """Foreign keys the model declares that `table` does not have in the database"""
+        present = {
+            (tuple(fk["constrained_columns"]), fk["referred_table"], tuple(fk["referred_columns"]))
+            for fk in inspect(conn).get_foreign_keys(table)
+        }
+        missing = []
+        for constraint in Base.metadata.tables[table].foreign_key_constraints:
+            columns = tuple(constraint.column_keys)
+            target = (columns, constraint.referred_table.name, tuple(fk.column.name for fk in constraint.elements))
+            if target not in present:
+                missing.append(f"{', '.join(columns)} -> {target[1]}")
+        return missing
+
+    def convert(self, table: str) -> bool:
+        """Turn a plain table into a monthly-partitioned one; returns False if it already is
+
+        Runs in one transaction and holds an exclusive lock on the table while it
+        builds the (id, created_at) primary key index on the old rows, so run it in a
+        maintenance window (python -m src.jobs.partitions --convert).
+        """
+        if not self.supported:
+            raise RuntimeError("Partitioning needs PostgreSQL")
+        boundary = _month_start(datetime.now(timezone.utc).date())
+        legacy = f"{table}_legacy"
+        with self.bind.begin() as conn:
+            if self.is_partitioned(conn, table):
+                return False
+            conn.execute(text(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE"))
+            # Keep every row before this month in the old table, attached as one partition
+            conn.execute(text(f"UPDATE {table} SET created_at = now() WHERE created_at IS NULL"))
+            conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+            for (index,) in conn.execute(text("SELECT indexname FROM pg_indexes WHERE tablename = :t"), {"t": legacy}):
+                # Free the names for the partitioned indexes; equivalent ones are attached, not rebuilt
+                conn.execute(text(f'ALTER INDEX "{index}" RENAME TO "{index[:50]}_legacy"'))
+            conn.execute(text(
+                f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING STORAGE) "
+                "PARTITION BY RANGE (created_at)"
+            ))
+            conn.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY (id, created_at)"))
+            # LIKE does not copy foreign keys; ATTACH adopts the legacy table's matching ones without rechecking rows
+            for constraint in Base.metadata.tables[table].foreign_key_constraints:
+                conn.execute(text(
+                    f"ALTER TABLE {table} ADD FOREIGN KEY ({', '.join(constraint.column_keys)}) "
+                    f"REFERENCES {constraint.referred_table.name} ({', '.join(fk.column.name for fk in constraint.elements)})"
+                ))
+            # A validated CHECK lets SET NOT NULL and ATTACH skip their full-table scans
+            conn.execute(text(
+                f"ALTER TABLE {legacy} ADD CONSTRAINT {legacy}_bound "
+                f"CHECK (created_at IS NOT NULL AND created_at < '{boundary} 00:00:00+00')"
+            ))
+            conn.execute(text(f"ALTER TABLE {legacy} ALTER COLUMN created_at SET NOT NULL"))
+            conn.execute(text(
+                f"ALTER TABLE {table} ATTACH PARTITION {legacy} "
+                f"FOR VALUES FROM (MINVALUE) TO ('{boundary} 00:00:00+00')"
+            ))
+            # The id sequence belongs to the legacy column; keep it alive if that partition is dropped
+            conn.execute(text(f"ALTER SEQUENCE IF EXISTS {table}_id_seq OWNED BY NONE"))
+            for index in Base.metadata.tables[table].indexes:
+                index.create(conn)
+            missing = self.missing_foreign_keys(conn, table)
+            if missing:
+                raise RuntimeError(f"{table} would lose foreign keys {missing}; conversion rolled back")
+        if table == "brand_mentions":
+            ensure_search_index(self.bind)
+        logger.info(f"Partitioned {table}; rows before {boundary} live in {legacy}")
+        self.ensure_partitions()
+        return True
+
+    def detach_expired(self, table: str, cutoff: datetime) -> List[str]:
+        """Detach every partition that ends on or before `cutoff`; returns their names
+
+        The detached tables keep their rows. The retention job archives and drops them.
+        """
+        if not self.supported:
+            return []
+        detached = []
+        with self.bind.connect() as conn:
+            if not self.is_partitioned(conn, table):
+                return []
+            expired = [name for name, _, upper in self.partitions(conn, table) if upper is not None and upper <= cutoff]
+            conn.commit()
+            # DETACH ... CONCURRENTLY cannot run inside a transaction block
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            concurrently = " CONCURRENTLY" if conn.dialect.server_version_info >= (14,) else ""
+            for name in expired:
+                conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}{concurrently}"))
+                detached.append(name)
+        if detached:
+            logger.info(f"Detached expired partitions of {table}: {detached}")
+        return detached
+
+    def detached(self, conn, table: str) -> List[str]:
+        """Partition tables of `table` that are no longer attached, e.g. after an interrupted retention run"""
+        rows = conn.execute(text(
+            "SELECT c.relname FROM pg_class c WHERE c.relkind = 'r' "
+            "AND (c.relname LIKE :monthly OR c.relname = :legacy) "
+            "AND NOT EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid)"
+        ), {"monthly": table.replace("_", r"\_") + r"\_p______", "legacy": f"{table}_legacy"})
+        return sorted(name for (name,) in rows)
+
+    def describe(self) -> Dict[str, List[str]]:
+        if not self.supported:
+            return {}
+        with self.bind.connect() as conn:
+            return {
+                table: sorted(name for name, _, _ in self.partitions(conn, table))
+                for table in PARTITIONED_TABLES if self.is_partitioned(conn, table)
+            }
+
+# Global instance
+partition_manager = PartitionManager()
@@ -0,0 +1,138 @@
+import hashlib
+import random
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from ..config import settings
+
+# Spellings of the same words mapped to one form: plurals, abbreviations and
+# British/US variants. Only true equivalences belong here, since prompts that share
+# a key share one cached answer; "top" is not "best" and "budget" is not "cheap".
+# Applied after lower-casing and stripping punctuation; longer phrases win.
+SYNONYMS: Dict[str, str] = {
+    "electric vehicles": "ev",
+    "electric vehicle": "ev",
+    "evs": "ev",
+    "automobiles": "automobile",
+    "cars": "car",
+    "vehicles": "vehicle",
+    "versus": "vs",
+    "alternatives": "alternative",
+    "companies": "company",
+    "brands": "brand",
+    "products": "product",
+    "tools": "tool",
+    "colour": "color",
+    "favourite": "favorite",
+    "tyres": "tire",
+    "tyre": "tire",
+    "tires": "tire",
+}
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+_SYNONYM_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(phrase) for phrase in sorted(SYNONYMS, key=len, reverse=True)) + r")\b"
+)
+
+def normalize_text(text: str) -> str:
+    """Unicode-fold, lower-case, drop punctuation and collapse whitespace"""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+def canonicalize(text: str) -> str:
+    """normalize_text plus the synonym map, so equivalent phrasings share one key"""
+    return _SYNONYM_PATTERN.sub(lambda match: SYNONYMS[match.group(1)], normalize_text(text))
+
+class PromptCanonicalizer:
+    """Canonical cache keys for user-entered prompts.
+
+    Every prompt is canonicalized. When near-duplicate merging is on, a MinHash
+    signature of its word unigrams and bigrams is also compared, via LSH bands,
+    against recently seen canonical prompts. A prompt whose estimated Jaccard
+    similarity to one of them reaches `threshold` reuses that prompt's key.
+    """
+
+    def __init__(
+        self,
+        merge_near_duplicates: bool = settings.prompt_minhash_enabled,
+        threshold: float = settings.prompt_minhash_threshold,
+        num_perm: int = 128,
+        bands: int = 32,
+        max_entries: int = settings.prompt_minhash_max_entries
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.merge_near_duplicates = merge_near_duplicates
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        rng = random.Random(0x5EED)  # fixed so keys are stable across processes
+        self._masks = [rng.getrandbits(64) for _ in range(num_perm)]
+        self._signatures: "OrderedDict[str, Tuple[int, ...]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[str]] = {}
+        self._lock = threading.Lock()
+
+    def key(self, prompt: str) -> str:
+        canonical = canonicalize(prompt)
+        if not self.merge_near_duplicates or not canonical:
+            return canonical
+        with self._lock:
+            if canonical in self._signatures:
+                self._signatures.move_to_end(canonical)
+                return canonical
+            signature = self._signature(canonical)
+            match = self._nearest(signature)
+            if match is not None:
+                self._signatures.move_to_end(match)
+                return match
+            self._remember(canonical, signature)
+            return canonical
+
+    @staticmethod
+    def _shingles(canonical: str) -> set:
+        words = canonical.split()
+        return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+    def _signature(self, canonical: str) -> Tuple[int, ...]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+            for shingle in self._shingles(canonical)
+        ]
+        # XOR with a random mask stands in for a permutation; cheap enough in pure Python
+        return tuple(min(h ^ mask for h in hashes) for mask in self._masks)
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield (band, signature[band * self.rows:(band + 1) * self.rows])
+
+    def _nearest(self, signature: Tuple[int, ...]) -> Optional[str]:
+        best, best_similarity = None, self.threshold
+        candidates = {c for band_key in self._band_keys(signature) for c in self._buckets.get(band_key, ())}
+        for candidate in candidates:
+            other = self._signatures[candidate]
+            similarity = sum(x == y for x, y in zip(signature, other)) / self.num_perm
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+        return best
+
+    def _remember(self, canonical: str, signature: Tuple[int, ...]):
+        self._signatures[canonical] = signature
+        for band_key in self._band_keys(signature):
+            self._buckets.setdefault(band_key, []).append(canonical)
+        while len(self._signatures) > self.max_entries:
+            evicted, evicted_signature = self._signatures.popitem(last=False)
+            for band_key in self._band_keys(evicted_signature):
+                bucket = self._buckets[band_key]
+                bucket.remove(evicted)
+                if not bucket:
+                    del self._buckets[band_key]
+
+# Global instance
+prompt_canonicalizer = PromptCanonicalizer()
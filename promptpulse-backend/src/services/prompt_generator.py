@@ -1,6 +1,7 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from enum import Enum
 from datetime import datetime
+from functools import lru_cache
 
 class PromptType(Enum):
     GENERAL_SEARCH = "general_search"
@@ -11,112 +12,186 @@ class PromptType(Enum):
     NEWS_MONITORING = "news_monitoring"
     SOCIAL_SENTIMENT = "social_sentiment"
 
-class AIProvider(Enum):
-    OPENAI = "openai"
-    ANTHROPIC = "anthropic"
-    GOOGLE = "google"
+BASE_PROMPTS: Dict[PromptType, Dict[str, Any]] = {
+    PromptType.GENERAL_SEARCH: {
+        "system": "You are a brand intelligence analyst. Search your knowledge base for information about brands and provide structured, factual responses with source attribution when possible.",
+        "templates": [
+            "Search for recent mentions and discussions about {brand_name}. Focus on content related to: {keywords}. Provide specific examples with context, sentiment, and any referenced sources.",
+            "What information do you have about {brand_name} in relation to {keywords}? Include recent developments, public perception, and notable discussions.",
+            "Find content about {brand_name} that mentions {keywords}. Look for news articles, reviews, discussions, and expert opinions with source context."
+        ]
+    },
+    PromptType.SENTIMENT_ANALYSIS: {
+        "system": "You are a sentiment analysis expert. Analyze brand mentions and provide detailed sentiment breakdowns with confidence scores.",
+        "templates": [
+            "Analyze public sentiment about {brand_name} particularly focusing on {keywords}. Provide specific examples of positive, negative, and neutral mentions with sentiment scores.",
+            "What are people saying about {brand_name} in relation to {keywords}? Include both praise and criticism with detailed sentiment analysis.",
+            "Evaluate the emotional tone and public perception of {brand_name} regarding {keywords}. Provide sentiment classification and confidence levels."
+        ]
+    },
+    PromptType.REPUTATION_ANALYSIS: {
+        "system": "You are a brand reputation analyst. Assess brand reputation and provide comprehensive analysis of brand perception.",
+        "templates": [
+            "Analyze the brand reputation of {brand_name} focusing on {keywords}. Include reputation factors, trust indicators, and public perception trends.",
+            "What is the current reputation status of {brand_name} regarding {keywords}? Include both strengths and areas of concern.",
+            "Evaluate {brand_name}'s reputation in relation to {keywords}. Provide reputation scoring and key reputation drivers."
+        ]
+    },
+    PromptType.COMPETITIVE_ANALYSIS: {
+        "system": "You are a competitive intelligence analyst. Compare brands and analyze market positioning.",
+        "templates": [
+            "Compare {brand_name} with its competitors in relation to {keywords}. Analyze market positioning, competitive advantages, and market perception.",
+            "How does {brand_name} compare to competitors regarding {keywords}? Include market share insights and competitive differentiation.",
+            "Analyze the competitive landscape for {brand_name} focusing on {keywords}. Provide competitive positioning and market dynamics."
+        ]
+    },
+    PromptType.PRODUCT_FEEDBACK: {
+        "system": "You are a product feedback analyst. Analyze customer feedback and product-related discussions.",
+        "templates": [
+            "Analyze customer feedback and reviews for {brand_name} products related to {keywords}. Include specific feedback examples and satisfaction trends.",
+            "What are customers saying about {brand_name} products in relation to {keywords}? Include both positive and negative feedback with details.",
+            "Evaluate product-related discussions about {brand_name} focusing on {keywords}. Provide feedback analysis and improvement suggestions."
+        ]
+    },
+    PromptType.NEWS_MONITORING: {
+        "system": "You are a news monitoring analyst. Track news coverage and media mentions of brands.",
+        "templates": [
+            "Find recent news coverage and media mentions of {brand_name} related to {keywords}. Include news sources, headlines, and article summaries.",
+            "What news stories mention {brand_name} in connection with {keywords}? Provide news analysis and media coverage trends.",
+            "Monitor media coverage of {brand_name} focusing on {keywords}. Include press releases, news articles, and media sentiment."
+        ]
+    },
+    PromptType.SOCIAL_SENTIMENT: {
+        "system": "You are a social media analyst. Analyze social media discussions and sentiment trends.",
+        "templates": [
+            "Analyze social media discussions about {brand_name} related to {keywords}. Include platform-specific insights and trending topics.",
+            "What are people saying about {brand_name} on social media regarding {keywords}? Include viral content and engagement patterns.",
+            "Evaluate social media sentiment for {brand_name} focusing on {keywords}. Provide platform analysis and engagement metrics."
+        ]
+    }
+}
+
+class CompiledTemplate:
+    """A template bound to its provider wrapping, so rendering is one str.format and a concatenation"""
+    
+    def __init__(self, template: str, prefix: str = "", suffix: str = ""):
+        self.prefix = prefix
+        self.suffix = suffix
+        self._format = template.format
+    
+    def render(self, **values: str) -> str:
+        return self.prefix + self._format(**values) + self.suffix
+
+def _provider_wrapping(ai_provider: str, system_message: str) -> Tuple[str, str]:
+    """Text placed before and after a prompt for vendors that want the system message inline"""
+    if ai_provider == "anthropic":
+        return (f"Human: {system_message}\n\n",
+                "\n\nPlease provide detailed, structured responses with specific examples and clear analysis. "
+                "Format your response with clear sections and bullet points where appropriate.")
+    if ai_provider == "google":
+        return (f"{system_message}\n\n",
+                "\n\nPlease provide comprehensive, well-structured responses with specific examples and actionable insights. "
+                "Use clear formatting and organize information logically.")
+    return ("", "")
+
+@lru_cache(maxsize=None)
+def _compiled_templates(
+    prompt_types: Tuple[PromptType, ...],
+    ai_provider: str
+) -> Tuple[Tuple[CompiledTemplate, str, str], ...]:
+    """(template, system, type) for every template of the given types, compiled once per provider"""
+    compiled = []
+    for prompt_type in prompt_types:
+        config = BASE_PROMPTS[prompt_type]
+        prefix, suffix = _provider_wrapping(ai_provider, config["system"])
+        for template in config["templates"]:
+            compiled.append((CompiledTemplate(template, prefix, suffix), config["system"], prompt_type.value))
+    return tuple(compiled)
+
+@lru_cache(maxsize=4096)
+def _render_prompts(
+    brand_name: str,
+    keywords: Tuple[str, ...],
+    prompt_types: Tuple[PromptType, ...],
+    ai_provider: str
+) -> Tuple[Tuple[str, str, str], ...]:
+    """(prompt, system, type) for every template of the given types, memoized"""
+    keyword_str = ", ".join(keywords)
+    return tuple(
+        (template.render(brand_name=brand_name, keywords=keyword_str), system, prompt_type)
+        for template, system, prompt_type in _compiled_templates(prompt_types, ai_provider)
+    )
 
 class BrandPromptGenerator:
     """Generate optimized prompts for different AI platforms and search types"""
     
     def __init__(self):
-        self.base_prompts = {
-            PromptType.GENERAL_SEARCH: {
-                "system": "You are a brand intelligence analyst. Search your knowledge base for information about brands and provide structured, factual responses with source attribution when possible.",
-                "templates": [
-                    "Search for recent mentions and discussions about {brand_name}. Focus on content related to: {keywords}. Provide specific examples with context, sentiment, and any referenced sources.",
-                    "What information do you have about {brand_name} in relation to {keywords}? Include recent developments, public perception, and notable discussions.",
-                    "Find content about {brand_name} that mentions {keywords}. Look for news articles, reviews, discussions, and expert opinions with source context."
-                ]
-            },
-            PromptType.SENTIMENT_ANALYSIS: {
-                "system": "You are a sentiment analysis expert. Analyze brand mentions and provide detailed sentiment breakdowns with confidence scores.",
-                "templates": [
-                    "Analyze public sentiment about {brand_name} particularly focusing on {keywords}. Provide specific examples of positive, negative, and neutral mentions with sentiment scores.",
-                    "What are people saying about {brand_name} in relation to {keywords}? Include both praise and criticism with detailed sentiment analysis.",
-                    "Evaluate the emotional tone and public perception of {brand_name} regarding {keywords}. Provide sentiment classification and confidence levels."
-                ]
-            },
-            PromptType.REPUTATION_ANALYSIS: {
-                "system": "You are a brand reputation analyst. Assess brand reputation and provide comprehensive analysis of brand perception.",
-                "templates": [
-                    "Analyze the brand reputation of {brand_name} focusing on {keywords}. Include reputation factors, trust indicators, and public perception trends.",
-                    "What is the current reputation status of {brand_name} regarding {keywords}? Include both strengths and areas of concern.",
-                    "Evaluate {brand_name}'s reputation in relation to {keywords}. Provide reputation scoring and key reputation drivers."
-                ]
-            },
-            PromptType.COMPETITIVE_ANALYSIS: {
-                "system": "You are a competitive intelligence analyst. Compare brands and analyze market positioning.",
-                "templates": [
-                    "Compare {brand_name} with its competitors in relation to {keywords}. Analyze market positioning, competitive advantages, and market perception.",
-                    "How does {brand_name} compare to competitors regarding {keywords}? Include market share insights and competitive differentiation.",
-                    "Analyze the competitive landscape for {brand_name} focusing on {keywords}. Provide competitive positioning and market dynamics."
-                ]
-            },
-            PromptType.PRODUCT_FEEDBACK: {
-                "system": "You are a product feedback analyst. Analyze customer feedback and product-related discussions.",
-                "templates": [
-                    "Analyze customer feedback and reviews for {brand_name} products related to {keywords}. Include specific feedback examples and satisfaction trends.",
-                    "What are customers saying about {brand_name} products in relation to {keywords}? Include both positive and negative feedback with details.",
-                    "Evaluate product-related discussions about {brand_name} focusing on {keywords}. Provide feedback analysis and improvement suggestions."
-                ]
-            },
-            PromptType.NEWS_MONITORING: {
-                "system": "You are a news monitoring analyst. Track news coverage and media mentions of brands.",
-                "templates": [
-                    "Find recent news coverage and media mentions of {brand_name} related to {keywords}. Include news sources, headlines, and article summaries.",
-                    "What news stories mention {brand_name} in connection with {keywords}? Provide news analysis and media coverage trends.",
-                    "Monitor media coverage of {brand_name} focusing on {keywords}. Include press releases, news articles, and media sentiment."
-                ]
-            },
-            PromptType.SOCIAL_SENTIMENT: {
-                "system": "You are a social media analyst. Analyze social media discussions and sentiment trends.",
-                "templates": [
-                    "Analyze social media discussions about {brand_name} related to {keywords}. Include platform-specific insights and trending topics.",
-                    "What are people saying about {brand_name} on social media regarding {keywords}? Include viral content and engagement patterns.",
-                    "Evaluate social media sentiment for {brand_name} focusing on {keywords}. Provide platform analysis and engagement metrics."
-                ]
-            }
-        }
+        self.base_prompts = BASE_PROMPTS
     
     def generate_search_prompts(self, 
                               brand_name: str, 
                               keywords: List[str], 
                               prompt_types: List[PromptType] = None,
-                              ai_provider: AIProvider = AIProvider.OPENAI) -> List[Dict[str, Any]]:
-        """Generate search prompts for brand intelligence analysis"""
+                              ai_provider: str = "openai") -> List[Dict[str, Any]]:
+        """Generate search prompts for brand intelligence analysis
+        
+        `ai_provider` is the model vendor (ModelConfig.provider), which decides the prompt format
+        """
         
         if prompt_types is None:
             prompt_types = [PromptType.GENERAL_SEARCH, PromptType.SENTIMENT_ANALYSIS, PromptType.REPUTATION_ANALYSIS]
         
-        prompts = []
-        keyword_str = ", ".join(keywords)
+        return [
+            {
+                "prompt": prompt,
+                "system": system,
+                "type": prompt_type,
+                "provider": ai_provider,
+                "brand_name": brand_name,
+                "keywords": keywords
+            }
+            for prompt, system, prompt_type in _render_prompts(brand_name, tuple(keywords), tuple(prompt_types), ai_provider)
+        ]
+    
+    def generate_prompt_matrix(
+        self,
+        brands: List[Dict[str, Any]],
+        prompt_types: List[PromptType] = None,
+        ai_providers: List[str] = None
+    ) -> Dict[str, Any]:
+        """Generate search prompts for many brands and providers in one call
+        
+        `brands` are {"brand_name", "keywords"} dicts. Prompts that come out identical
+        (for example across vendors without a custom format, or repeated brands) are
+        returned once in "prompts" and referenced by index from each "matrix" cell.
+        """
+        if prompt_types is None:
+            prompt_types = [PromptType.GENERAL_SEARCH, PromptType.SENTIMENT_ANALYSIS, PromptType.REPUTATION_ANALYSIS]
+        if ai_providers is None:
+            ai_providers = ["openai", "anthropic", "google"]
         
-        for prompt_type in prompt_types:
-            prompt_config = self.base_prompts[prompt_type]
-            
-            for template in prompt_config["templates"]:
-                formatted_prompt = template.format(
-                    brand_name=brand_name,
-                    keywords=keyword_str
-                )
-                
-                # Customize for AI provider
-                if ai_provider == AIProvider.ANTHROPIC:
-                    formatted_prompt = self._customize_for_anthropic(formatted_prompt, prompt_config["system"])
-                elif ai_provider == AIProvider.GOOGLE:
-                    formatted_prompt = self._customize_for_google(formatted_prompt, prompt_config["system"])
-                
-                prompts.append({
-                    "prompt": formatted_prompt,
-                    "system": prompt_config["system"],
-                    "type": prompt_type.value,
-                    "provider": ai_provider.value,
-                    "brand_name": brand_name,
-                    "keywords": keywords
+        types = tuple(prompt_types)
+        prompts = []
+        index_of: Dict[Tuple[str, str], int] = {}
+        matrix = []
+        for brand in brands:
+            keywords = tuple(brand["keywords"])
+            for ai_provider in ai_providers:
+                prompt_ids = []
+                for prompt, system, prompt_type in _render_prompts(brand["brand_name"], keywords, types, ai_provider):
+                    key = (system, prompt)
+                    if key not in index_of:
+                        index_of[key] = len(prompts)
+                        prompts.append({"prompt": prompt, "system": system, "type": prompt_type})
+                    prompt_ids.append(index_of[key])
+                matrix.append({
+                    "brand_name": brand["brand_name"],
+                    "keywords": list(keywords),
+                    "provider": ai_provider,
+                    "prompt_ids": prompt_ids
                 })
         
-        return prompts
+        return {"prompts": prompts, "matrix": matrix}
     
     def generate_sentiment_analysis_prompt(self, content: str, brand_name: str) -> str:
         """Generate a prompt for sentiment analysis of specific content"""
@@ -175,16 +250,10 @@ class BrandPromptGenerator:
     
     def _customize_for_anthropic(self, prompt: str, system_message: str) -> str:
         """Customize prompts for Anthropic Claude"""
-        return f"""Human: {system_message}
-
-{prompt}
-
-Please provide detailed, structured responses with specific examples and clear analysis. Format your response with clear sections and bullet points where appropriate."""
+        prefix, suffix = _provider_wrapping("anthropic", system_message)
+        return prefix + prompt + suffix
     
     def _customize_for_google(self, prompt: str, system_message: str) -> str:
         """Customize prompts for Google Gemini"""
-        return f"""{system_message}
-
-{prompt}
-
-Please provide comprehensive, well-structured responses with specific examples and actionable insights. Use clear formatting and organize information logically."""
\ No newline at end of file
+        prefix, suffix = _provider_wrapping("google", system_message)
+        return prefix + prompt + suffix
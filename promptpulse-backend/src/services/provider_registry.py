@@ -0,0 +1,208 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, asdict, fields
+from typing import Dict, List, Optional, Any
+
+from ..config import settings
+from ..metrics import provider_of
+from .circuit_breaker import CircuitState, circuit_breakers
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ModelConfig:
+    """One model in a provider group, with its request defaults and limits"""
+    name: str  # label reported in results, e.g. CHATGPT
+    model: str  # OpenRouter model id
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    max_concurrency: int = 0  # simultaneous upstream calls; 0 is unlimited
+    timeout_seconds: Optional[float] = None  # per attempt; defaults to OPENROUTER_TIMEOUT_SECONDS
+    calls_per_minute: int = 0  # 0 is unlimited
+    priority: int = 100  # lower runs first and is preferred for single-model tasks
+    structured_output: bool = False  # supports response_format json_schema; otherwise the schema goes in the prompt
+    enabled: bool = True
+
+    @property
+    def provider(self) -> str:
+        return provider_of(self.model)
+
+    def build_payload(self, messages: List[Dict[str, str]], **extra) -> Dict[str, Any]:
+        payload = {"model": self.model, "messages": messages}
+        if self.max_tokens is not None:
+            payload["max_tokens"] = self.max_tokens
+        if self.temperature is not None:
+            payload["temperature"] = self.temperature
+        payload.update(extra)
+        return payload
+
+# Used for any group the config file does not override
+DEFAULT_GROUPS: Dict[str, List[Dict[str, Any]]] = {
+    "test_prompt": [
+        {"name": "CHATGPT", "model": "openai/gpt-4", "max_tokens": 1000, "temperature": 0.7, "priority": 1},
+        {"name": "CLAUDE", "model": "anthropic/claude-3-sonnet", "max_tokens": 1000, "temperature": 0.7, "priority": 2},
+        {"name": "GEMINI", "model": "google/gemini-pro", "max_tokens": 1000, "temperature": 0.7, "priority": 3},
+    ],
+    "grade_content": [
+        {"name": "CLAUDE", "model": "anthropic/claude-3-sonnet", "max_tokens": 1500, "temperature": 0.3},
+    ],
+    "brand_search": [
+        {"name": "openai", "model": "openai/gpt-4o-mini", "priority": 1},
+        {"name": "anthropic", "model": "anthropic/claude-3-haiku", "priority": 2},
+        {"name": "google", "model": "google/gemini-flash-1.5", "priority": 3},
+    ],
+    "discover_competitors": [
+        {"name": "CHATGPT", "model": "openai/gpt-3.5-turbo", "max_tokens": 512, "temperature": 0.2},
+    ],
+    "discover_prompts": [
+        {"name": "CHATGPT", "model": "openai/gpt-4o", "max_tokens": 512, "temperature": 0.7},
+    ],
+    "extract_brand_info": [
+        {"name": "CHATGPT", "model": "openai/gpt-4o", "timeout_seconds": 60, "structured_output": True},
+    ],
+}
+
+class ModelLimits:
+    """Concurrency and calls-per-minute limits for one configured model"""
+
+    def __init__(self, max_concurrency: int, calls_per_minute: int):
+        self.max_concurrency = max_concurrency
+        self.calls_per_minute = calls_per_minute
+        self._async_semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        # call_openrouter runs in worker threads and needs a blocking semaphore of its own
+        self._thread_semaphore = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._next_call_at = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Claim the next rate-limited start time; returns seconds to wait"""
+        if not self.calls_per_minute:
+            return 0.0
+        interval = 60.0 / self.calls_per_minute
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_call_at)
+            self._next_call_at = start + interval
+            return start - now
+
+    @asynccontextmanager
+    async def slot(self):
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+        if self._async_semaphore is None:
+            yield
+            return
+        async with self._async_semaphore:
+            yield
+
+    @contextmanager
+    def sync_slot(self):
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+        if self._thread_semaphore is None:
+            yield
+            return
+        with self._thread_semaphore:
+            yield
+
+class ProviderRegistry:
+    """Named groups of models loaded from a JSON file and reloadable at runtime.
+
+    The file maps group names to model entries (see providers.example.json); a
+    group in the file replaces the built-in default for that group entirely.
+    """
+
+    def __init__(self, path: str = settings.provider_registry_path):
+        self.path = path
+        self.groups: Dict[str, List[ModelConfig]] = {}
+        self.loaded_from: Optional[str] = None
+        self._limits: Dict[tuple, ModelLimits] = {}
+        self._lock = threading.Lock()
+        try:
+            self.reload()
+        except ValueError as e:
+            # Keep the service up on a bad file; the defaults are always valid
+            logger.error(f"{e}; using built-in provider defaults")
+            self._apply(self._parse(DEFAULT_GROUPS), None)
+
+    @staticmethod
+    def _parse(raw_groups: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[ModelConfig]]:
+        known = {f.name for f in fields(ModelConfig)}
+        groups = {}
+        for group, entries in raw_groups.items():
+            configs = []
+            for entry in entries:
+                unknown = set(entry) - known
+                if unknown:
+                    raise ValueError(f"Unknown provider settings in group '{group}': {sorted(unknown)}")
+                configs.append(ModelConfig(**entry))
+            groups[group] = configs
+        return groups
+
+    def reload(self) -> Dict[str, Any]:
+        """Re-read the config file; raises ValueError and keeps the current config if it is invalid"""
+        raw_groups = dict(DEFAULT_GROUPS)
+        loaded_from = None
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    raw_groups.update(json.load(f).get("groups", {}))
+            except (OSError, json.JSONDecodeError) as e:
+                raise ValueError(f"Could not read provider registry {self.path}: {e}")
+            loaded_from = self.path
+        self._apply(self._parse(raw_groups), loaded_from)
+        logger.info(f"Provider registry loaded from {loaded_from or 'built-in defaults'}")
+        return self.describe()
+
+    def _apply(self, groups: Dict[str, List[ModelConfig]], loaded_from: Optional[str]):
+        limits = {}
+        for group, configs in groups.items():
+            for config in configs:
+                key = (group, config.name)
+                current = self._limits.get(key)
+                if current and (current.max_concurrency, current.calls_per_minute) == (config.max_concurrency, config.calls_per_minute):
+                    limits[key] = current  # keep in-flight accounting across reloads
+                else:
+                    limits[key] = ModelLimits(config.max_concurrency, config.calls_per_minute)
+        with self._lock:
+            self.groups = groups
+            self._limits = limits
+            self.loaded_from = loaded_from
+
+    def group(self, name: str) -> List[ModelConfig]:
+        """Enabled models of a group, highest priority first"""
+        configs = [c for c in self.groups.get(name, []) if c.enabled]
+        if not configs:
+            raise KeyError(f"No enabled models in provider group '{name}'")
+        return sorted(configs, key=lambda c: c.priority)
+
+    def primary(self, name: str) -> ModelConfig:
+        """Preferred model of a group, skipping models whose circuit is open"""
+        configs = self.group(name)
+        for config in configs:
+            if circuit_breakers.get(config.model).state is not CircuitState.OPEN:
+                return config
+        return configs[0]
+
+    def limits(self, group: str, config: ModelConfig) -> ModelLimits:
+        with self._lock:
+            limits = self._limits.get((group, config.name))
+            if limits is None:
+                limits = self._limits[(group, config.name)] = ModelLimits(config.max_concurrency, config.calls_per_minute)
+            return limits
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "loaded_from": self.loaded_from or "built-in defaults",
+            "groups": {name: [asdict(c) for c in configs] for name, configs in self.groups.items()}
+        }
+
+# Global instance
+provider_registry = ProviderRegistry()
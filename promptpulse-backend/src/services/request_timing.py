@@ -0,0 +1,104 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import SimpleNamespace
+from typing import List, Optional, Tuple
+
+import aiohttp
+
+from ..config import settings
+
+_current_timings: ContextVar[Optional["RequestTimings"]] = ContextVar("request_timings", default=None)
+
+class RequestTimings:
+    """Per-request phase durations rendered as a Server-Timing header.
+
+    Concurrent provider calls each add their own entries, so a phase name can
+    appear several times with a different description (usually the model).
+    """
+
+    def __init__(self):
+        self.entries: List[Tuple[str, float, Optional[str]]] = []  # (phase, ms, description)
+
+    def add(self, phase: str, seconds: float, description: Optional[str] = None):
+        self.entries.append((phase, seconds * 1000.0, description))
+
+    def header_value(self) -> str:
+        parts = []
+        for phase, duration_ms, description in self.entries:
+            part = phase
+            if description:
+                part += f';desc="{description}"'
+            parts.append(f"{part};dur={duration_ms:.1f}")
+        return ", ".join(parts)
+
+@contextmanager
+def timing_scope(enabled: bool = None):
+    """Collect timings for the enclosed request; yields None when timing is off"""
+    if enabled is None:
+        enabled = settings.server_timing_enabled
+    if not enabled:
+        yield None
+        return
+    timings = RequestTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+def record_phase(phase: str, seconds: float, description: Optional[str] = None):
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(phase, seconds, description)
+
+@contextmanager
+def measure(phase: str, description: Optional[str] = None):
+    """Time a block into the active request, if any"""
+    if _current_timings.get() is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - start, description)
+
+def apply_server_timing(response, timings: Optional[RequestTimings]):
+    if timings is not None and timings.entries:
+        response.headers["Server-Timing"] = timings.header_value()
+
+def _label(trace_config_ctx: SimpleNamespace) -> Optional[str]:
+    request_ctx = trace_config_ctx.trace_request_ctx or {}
+    return request_ctx.get("label")
+
+def create_trace_config() -> aiohttp.TraceConfig:
+    """aiohttp hooks for connection acquire, DNS, TCP/TLS connect and time to first byte"""
+    trace_config = aiohttp.TraceConfig()
+
+    def _start(key):
+        async def on_start(session, trace_config_ctx, params):
+            setattr(trace_config_ctx, key, time.perf_counter())
+        return on_start
+
+    def _end(key, phase):
+        async def on_end(session, trace_config_ctx, params):
+            started = getattr(trace_config_ctx, key, None)
+            if started is not None:
+                record_phase(phase, time.perf_counter() - started, _label(trace_config_ctx))
+        return on_end
+
+    trace_config.on_connection_queued_start.append(_start("queued_at"))
+    trace_config.on_connection_queued_end.append(_end("queued_at", "conn_wait"))
+    trace_config.on_dns_resolvehost_start.append(_start("dns_at"))
+    trace_config.on_dns_resolvehost_end.append(_end("dns_at", "dns"))
+    # aiohttp reports TCP connect and TLS handshake as one step
+    trace_config.on_connection_create_start.append(_start("connect_at"))
+    trace_config.on_connection_create_end.append(_end("connect_at", "tcp_tls"))
+    trace_config.on_request_headers_sent.append(_start("sent_at"))
+    trace_config.on_request_end.append(_end("sent_at", "ttfb"))
+    return trace_config
+
+def trace_configs() -> List[aiohttp.TraceConfig]:
+    """Trace configs to attach to new client sessions (none unless timing is enabled)"""
+    return [create_trace_config()] if settings.server_timing_enabled else []
@@ -0,0 +1,115 @@
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Literal, Optional, Tuple, Type
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, create_model
+
+INDUSTRY_OPTIONS = (
+    "Automotive", "Technology", "Healthcare", "Finance", "Retail",
+    "Real Estate", "Education", "Manufacturing", "Energy", "Other"
+)
+
+class KeywordAnalysis(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    primary_keywords: List[str]
+    missing_keywords: List[str]
+
+class ContentGrade(BaseModel):
+    """What grade_content asks the model for"""
+    model_config = ConfigDict(extra="forbid")
+
+    overall_grade: Literal["A", "B", "C", "D", "F"]
+    numerical_score: int = Field(ge=0, le=100)
+    authority_score: int = Field(ge=0, le=100, description="How authoritative and expert the content appears")
+    relevance_score: int = Field(ge=0, le=100, description="How well it matches the prompt")
+    completeness_score: int = Field(ge=0, le=100, description="How comprehensive the coverage is")
+    strengths: List[str] = Field(min_length=1, max_length=5)
+    weaknesses: List[str] = Field(min_length=1, max_length=5)
+    recommendations: List[str] = Field(min_length=1, max_length=5)
+    keyword_analysis: KeywordAnalysis
+    competitive_analysis: str = Field(description="How well it positions against competitors")
+
+class BrandInfo(BaseModel):
+    """What extract_brand_info asks the model for"""
+    model_config = ConfigDict(extra="forbid")
+
+    name: str = Field(min_length=1)
+    industry: Literal[INDUSTRY_OPTIONS]
+    description: str = Field(min_length=1)
+
+def _extract_object(text: str) -> Optional[Dict[str, Any]]:
+    """The first JSON object in a reply, allowing for prose or a code fence around it"""
+    decoder = json.JSONDecoder()
+    start = text.find("{")
+    while start != -1:
+        try:
+            value, _ = decoder.raw_decode(text, start)
+        except json.JSONDecodeError:
+            start = text.find("{", start + 1)
+            continue
+        if isinstance(value, dict):
+            return value
+        start = text.find("{", start + 1)
+    return None
+
+class StructuredOutput:
+    """A pydantic model used both as the JSON schema sent to OpenRouter and as the validator for the reply.
+
+    Validation is per field: a reply with one bad field keeps the others, and only
+    the bad ones need asking for again. Validators for field subsets are built once
+    and cached.
+    """
+
+    def __init__(self, model: Type[BaseModel], name: str):
+        self.model = model
+        self.name = name
+        self.fields: Tuple[str, ...] = tuple(model.model_fields)
+        self._subsets: Dict[Tuple[str, ...], Type[BaseModel]] = {self.fields: model}
+        self._lock = threading.Lock()
+
+    def _subset(self, fields: Iterable[str]) -> Type[BaseModel]:
+        key = tuple(name for name in self.fields if name in set(fields))
+        with self._lock:
+            model = self._subsets.get(key)
+            if model is None:
+                model = self._subsets[key] = create_model(
+                    f"{self.model.__name__}Fields",
+                    __config__=self.model.model_config,
+                    **{name: (self.model.model_fields[name].annotation, self.model.model_fields[name]) for name in key}
+                )
+            return model
+
+    def json_schema(self, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        return self._subset(fields or self.fields).model_json_schema()
+
+    def response_format(self, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """OpenRouter/OpenAI `response_format` for strict JSON-schema output"""
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": self.name, "strict": True, "schema": self.json_schema(fields)}
+        }
+
+    def parse(self, text: str, fields: Optional[Iterable[str]] = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Validate a reply; returns (valid field values, {invalid field: error}) for the requested fields"""
+        wanted = self._subset(fields or self.fields)
+        names = list(wanted.model_fields)
+        data = _extract_object(text)
+        if data is None:
+            return {}, {name: "no JSON object in the reply" for name in names}
+
+        data = {name: data[name] for name in names if name in data}
+        try:
+            return wanted.model_validate(data).model_dump(), {}
+        except ValidationError as e:
+            errors = {}
+            for error in e.errors():
+                if error["loc"] and error["loc"][0] in names:
+                    errors.setdefault(error["loc"][0], error["msg"])
+        valid = [name for name in names if name not in errors]
+        values = self._subset(valid).model_validate({name: data[name] for name in valid}).model_dump() if valid else {}
+        return values, errors
+
+# Global instances
+content_grade_output = StructuredOutput(ContentGrade, "content_grade")
+brand_info_output = StructuredOutput(BrandInfo, "brand_info")
@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, asdict
+from datetime import date
+from typing import Dict, Optional, Any, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.usage import UsageDaily
+
+logger = logging.getLogger(__name__)
+
+# USD per 1M tokens (prompt, completion); used when OpenRouter does not report cost
+MODEL_PRICING = {
+    "openai/gpt-4": (30.0, 60.0),
+    "openai/gpt-4o": (2.5, 10.0),
+    "openai/gpt-4o-mini": (0.15, 0.6),
+    "openai/gpt-3.5-turbo": (0.5, 1.5),
+    "anthropic/claude-3-sonnet": (3.0, 15.0),
+    "anthropic/claude-3-haiku": (0.25, 1.25),
+    "google/gemini-pro": (0.5, 1.5),
+    "google/gemini-flash-1.5": (0.075, 0.3),
+}
+
+# Cheaper stand-ins used once a brand's daily budget is spent (budget_mode="downgrade")
+DOWNGRADE_MODELS = {
+    "openai/gpt-4": "openai/gpt-4o-mini",
+    "openai/gpt-4o": "openai/gpt-4o-mini",
+    "openai/gpt-3.5-turbo": "openai/gpt-4o-mini",
+    "anthropic/claude-3-sonnet": "anthropic/claude-3-haiku",
+    "google/gemini-pro": "google/gemini-flash-1.5",
+}
+
+UNATTRIBUTED = "_unattributed"
+
+class BudgetExceeded(Exception):
+    """Raised when a brand's daily budget is spent and calls are being deferred"""
+
+    def __init__(self, brand_name: str, spent: float, budget: float):
+        self.brand_name = brand_name
+        self.spent = spent
+        self.budget = budget
+        super().__init__(f"Daily budget exhausted for {brand_name}: ${spent:.4f} of ${budget:.2f}")
+
+@dataclass
+class UsageTotals:
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+
+    def add(self, prompt_tokens: int, completion_tokens: int, cost: float):
+        self.calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost += cost
+
+class UsageTracker:
+    """Token and cost totals per (brand, model, endpoint), plus daily brand budgets
+
+    Totals are stored per day in usage_daily, so they survive restarts and every
+    worker checks budgets against the same spend. A brand's spend is re-read at most
+    every BUDGET_CACHE_SECONDS; calls this process records in between are added to
+    the cached value.
+    """
+
+    def __init__(
+        self,
+        daily_budget_usd: float = settings.brand_daily_budget_usd,
+        budget_mode: str = settings.budget_mode,
+        cache_seconds: float = settings.budget_cache_seconds
+    ):
+        self.daily_budget_usd = daily_budget_usd  # 0 disables budgeting
+        self.budget_mode = budget_mode  # off, downgrade or defer
+        self.cache_seconds = cache_seconds
+        self._spend_cache: Dict[str, Tuple[date, float, float]] = {}  # brand -> (day, monotonic read time, spend)
+        self._lock = threading.Lock()  # call_openrouter records from worker threads
+
+    def record(self, data: Dict[str, Any], model: str, endpoint: str, brand_name: Optional[str] = None) -> UsageTotals:
+        """Record the `usage` block of an OpenRouter response and return this call's usage"""
+        usage = data.get("usage") or {}
+        prompt_tokens = int(usage.get("prompt_tokens") or 0)
+        completion_tokens = int(usage.get("completion_tokens") or 0)
+        cost = usage.get("cost")
+        if cost is None:
+            cost = self.estimate_cost(data.get("model") or model, prompt_tokens, completion_tokens)
+
+        call = UsageTotals()
+        call.add(prompt_tokens, completion_tokens, float(cost))
+
+        brand_key = brand_name or UNATTRIBUTED
+        today = date.today()
+        try:
+            self._store(today, brand_key, model, endpoint, call)
+        except SQLAlchemyError as e:
+            # Losing one call's accounting is better than failing the request that made it
+            logger.error(f"Could not record usage for {brand_key} {model} {endpoint}: {e}")
+        with self._lock:
+            cached = self._spend_cache.get(brand_key)
+            if cached and cached[0] == today:
+                self._spend_cache[brand_key] = (today, cached[1], cached[2] + call.cost)
+        return call
+
+    @staticmethod
+    def _store(day: date, brand: str, model: str, endpoint: str, call: UsageTotals):
+        """Add one call to its usage_daily row, creating the row on the first call of the day"""
+        row = (UsageDaily.day == day, UsageDaily.brand == brand, UsageDaily.model == model, UsageDaily.endpoint == endpoint)
+        increments = {
+            UsageDaily.calls: UsageDaily.calls + call.calls,
+            UsageDaily.prompt_tokens: UsageDaily.prompt_tokens + call.prompt_tokens,
+            UsageDaily.completion_tokens: UsageDaily.completion_tokens + call.completion_tokens,
+            UsageDaily.cost: UsageDaily.cost + call.cost,
+        }
+        db = SessionLocal()
+        try:
+            for _ in range(2):
+                if db.query(UsageDaily).filter(*row).update(increments, synchronize_session=False):
+                    db.commit()
+                    return
+                db.add(UsageDaily(day=day, brand=brand, model=model, endpoint=endpoint, **asdict(call)))
+                try:
+                    db.commit()
+                    return
+                except IntegrityError:
+                    db.rollback()  # another worker created the row first; increment it instead
+        finally:
+            db.close()
+
+    @staticmethod
+    def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        prompt_price, completion_price = MODEL_PRICING.get(model, (0.0, 0.0))
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+    def _fresh_spend(self, brand_key: str, today: date) -> Optional[float]:
+        with self._lock:
+            cached = self._spend_cache.get(brand_key)
+        if cached and cached[0] == today and time.monotonic() - cached[1] < self.cache_seconds:
+            return cached[2]
+        return None
+
+    def spent_today(self, brand_name: Optional[str]) -> float:
+        """Today's spend for a brand; reads the database on a cache miss, so async callers use spent_today_async"""
+        brand_key = brand_name or UNATTRIBUTED
+        today = date.today()
+        fresh = self._fresh_spend(brand_key, today)
+        if fresh is not None:
+            return fresh
+        with self._lock:
+            cached = self._spend_cache.get(brand_key)
+
+        db = SessionLocal()
+        try:
+            spent = db.query(func.coalesce(func.sum(UsageDaily.cost), 0.0)).filter(
+                UsageDaily.day == today, UsageDaily.brand == brand_key
+            ).scalar()
+        except SQLAlchemyError as e:
+            logger.error(f"Could not read today's spend for {brand_key}: {e}")
+            return cached[2] if cached and cached[0] == today else 0.0
+        finally:
+            db.close()
+        with self._lock:
+            self._spend_cache[brand_key] = (today, time.monotonic(), float(spent))
+        return float(spent)
+
+    async def spent_today_async(self, brand_name: Optional[str]) -> float:
+        """spent_today that answers a cache hit on the loop and reads the database in a worker thread"""
+        fresh = self._fresh_spend(brand_name or UNATTRIBUTED, date.today())
+        if fresh is not None:
+            return fresh
+        return await asyncio.to_thread(self.spent_today, brand_name)
+
+    def _budget_applies(self, brand_name: Optional[str]) -> bool:
+        return bool(brand_name) and self.budget_mode != "off" and self.daily_budget_usd > 0
+
+    def is_over_budget(self, brand_name: Optional[str]) -> bool:
+        return self._budget_applies(brand_name) and self.spent_today(brand_name) >= self.daily_budget_usd
+
+    async def is_over_budget_async(self, brand_name: Optional[str]) -> bool:
+        return self._budget_applies(brand_name) and await self.spent_today_async(brand_name) >= self.daily_budget_usd
+
+    def should_defer(self, brand_name: Optional[str]) -> bool:
+        return self.budget_mode == "defer" and self.is_over_budget(brand_name)
+
+    async def should_defer_async(self, brand_name: Optional[str]) -> bool:
+        return self.budget_mode == "defer" and await self.is_over_budget_async(brand_name)
+
+    def resolve_model(self, brand_name: Optional[str], model: str) -> str:
+        """Model to actually call for this brand, honouring the budget mode"""
+        return self._budgeted_model(brand_name, model, self.is_over_budget(brand_name))
+
+    async def resolve_model_async(self, brand_name: Optional[str], model: str) -> str:
+        """resolve_model for code running on the event loop"""
+        return self._budgeted_model(brand_name, model, await self.is_over_budget_async(brand_name))
+
+    def _budgeted_model(self, brand_name: Optional[str], model: str, over_budget: bool) -> str:
+        if not over_budget:
+            return model
+        if self.budget_mode == "defer":
+            # Just read by the caller, so this is a cache hit
+            raise BudgetExceeded(brand_name, self.spent_today(brand_name), self.daily_budget_usd)
+        downgraded = DOWNGRADE_MODELS.get(model, model)
+        if downgraded != model:
+            logger.info(f"Budget exhausted for {brand_name}, downgrading {model} to {downgraded}")
+        return downgraded
+
+    def summary(self, brand_name: Optional[str] = None) -> Dict[str, Any]:
+        """Totals to date broken down by brand, model and endpoint"""
+        db = SessionLocal()
+        try:
+            query = db.query(
+                UsageDaily.brand, UsageDaily.model, UsageDaily.endpoint,
+                func.sum(UsageDaily.calls), func.sum(UsageDaily.prompt_tokens),
+                func.sum(UsageDaily.completion_tokens), func.sum(UsageDaily.cost)
+            ).group_by(UsageDaily.brand, UsageDaily.model, UsageDaily.endpoint)
+            if brand_name:
+                query = query.filter(UsageDaily.brand == brand_name)
+            rows = query.all()
+        finally:
+            db.close()
+
+        overall = UsageTotals()
+        breakdown = []
+        for brand_key, model, endpoint, calls, prompt_tokens, completion_tokens, cost in rows:
+            totals = UsageTotals(int(calls or 0), int(prompt_tokens or 0), int(completion_tokens or 0), float(cost or 0.0))
+            overall.calls += totals.calls
+            overall.prompt_tokens += totals.prompt_tokens
+            overall.completion_tokens += totals.completion_tokens
+            overall.cost += totals.cost
+            breakdown.append({"brand": brand_key, "model": model, "endpoint": endpoint, **asdict(totals)})
+
+        breakdown.sort(key=lambda row: row["cost"], reverse=True)
+        return {
+            "totals": asdict(overall),
+            "breakdown": breakdown,
+            "budget": {
+                "mode": self.budget_mode,
+                "daily_budget_usd": self.daily_budget_usd,
+                "spent_today": self.spent_today(brand_name) if brand_name else None
+            }
+        }
+
+# Global instance
+usage_tracker = UsageTracker()
@@ -14,6 +14,7 @@ from datetime import datetime
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from services.openrouter_service import openrouter_service
+from services.provider_registry import provider_registry
 
 async def test_prompt_analysis():
     """Test real-time prompt analysis across AI providers"""
@@ -161,7 +162,7 @@ async def test_api_connectivity():
             
             test_result = await service._test_single_provider(
                 prompt="test connectivity",
-                provider=service.ORProvider.CHATGPT,
+                provider=provider_registry.group("test_prompt")[0],
                 brand_name="Test",
                 competitors=["Competitor1"]
             )
@@ -0,0 +1,7 @@
+"""Tests for the legacy FastAPI app; run with `make legacy-test`."""
+import os
+import tempfile
+
+# Settings are read when src is first imported; point them at a throwaway SQLite database
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='promptpulse-tests-')}/test.db"
+os.environ.setdefault("CASSETTE_MODE", "off")
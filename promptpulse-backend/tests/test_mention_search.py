@@ -0,0 +1,89 @@
+"""Mention search reads the same query syntax on SQLite FTS5 and Postgres websearch_to_tsquery."""
+import os
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from src.database import Base, engine, upgrade_schema
+from src.models.brand import Brand
+from src.models.mention import BrandMention
+from src.models.user import User
+from src.services.mention_search import _fts5_query, ensure_search_index, search_mentions
+
+MENTIONS = [
+    "Tesla charging network expands",
+    "Ford recall affects trucks",
+    "Tesla recall on Model 3",
+    "Rivian trucks charging",
+]
+
+# query -> indexes into MENTIONS that websearch_to_tsquery('english', query) matches
+CASES = {
+    "tesla charging": {0},
+    "tesla or ford": {0, 1, 2},
+    "tesla -recall": {0},
+    '"model 3"': {2},
+    "charging or recall -ford": {0, 2, 3},
+    "truck OR network": {0, 1, 3},
+}
+
+
+class MentionSearchSyntaxTests(unittest.TestCase):
+    def _search(self, bind):
+        """Run every case against `bind` inside a transaction that is rolled back"""
+        ensure_search_index(bind)
+        with bind.connect() as conn:
+            transaction = conn.begin()
+            try:
+                db = Session(bind=conn)
+                user = User(email="search-syntax@example.com", hashed_password="x")
+                db.add(user)
+                db.flush()
+                brand = Brand(name="Search syntax brand", keywords=[], user_id=user.id)
+                db.add(brand)
+                db.flush()
+                ids = []
+                for content in MENTIONS:
+                    mention = BrandMention(
+                        brand_id=brand.id, content=content, context="", provider="test",
+                        sentiment_score=3.0, sentiment_label="neutral", confidence=0.5
+                    )
+                    db.add(mention)
+                    db.flush()
+                    ids.append(mention.id)
+                found = {}
+                for query in CASES:
+                    total, results = search_mentions(db, brand.id, query, limit=len(MENTIONS))
+                    self.assertEqual(total, len(results))
+                    found[query] = {ids.index(result["id"]) for result in results}
+                return found
+            finally:
+                transaction.rollback()
+
+    def test_sqlite_matches_websearch_semantics(self):
+        upgrade_schema()
+        self.assertEqual(self._search(engine), CASES)
+
+    def test_postgres_matches_the_same_cases(self):
+        url = os.environ.get("TEST_POSTGRES_URL")
+        if not url:
+            self.skipTest("TEST_POSTGRES_URL is not set")
+        postgres = create_engine(url)
+        try:
+            Base.metadata.create_all(postgres)
+        except OperationalError as exc:
+            self.skipTest(f"Database connection failed: {exc}")
+        self.assertEqual(self._search(postgres), CASES)
+
+    def test_fts5_query_translation(self):
+        self.assertEqual(_fts5_query('tesla "model 3"'), '("tesla" "model 3")')
+        self.assertEqual(_fts5_query("a b or c -d"), '("a" "b") OR ("c" NOT "d")')
+        # Nothing to subtract from, and a dangling `or` is ignored
+        self.assertEqual(_fts5_query("-recall"), "")
+        self.assertEqual(_fts5_query("or tesla or"), '("tesla")')
+
+
+if __name__ == "__main__":
+    unittest.main()
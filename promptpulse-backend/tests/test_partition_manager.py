@@ -0,0 +1,61 @@
+"""Foreign keys survive converting a table to monthly partitions."""
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine
+
+from src.database import Base, upgrade_schema
+from src.services import partition_manager as partition_module
+from src.services.partition_manager import PARTITIONED_TABLES, PartitionManager
+
+
+class ConvertForeignKeyTests(unittest.TestCase):
+    def setUp(self):
+        upgrade_schema()
+
+    def _converted_statements(self, table):
+        bind = mock.MagicMock()
+        bind.dialect.name = "postgresql"
+        conn = bind.begin.return_value.__enter__.return_value
+        conn.execute.return_value = []
+        manager = PartitionManager(bind=bind)
+        with mock.patch.object(manager, "is_partitioned", return_value=False), \
+                mock.patch.object(manager, "missing_foreign_keys", return_value=[]) as check, \
+                mock.patch.object(manager, "ensure_partitions"), \
+                mock.patch.object(partition_module, "ensure_search_index"):
+            self.assertTrue(manager.convert(table))
+        check.assert_called_once_with(conn, table)
+        return [str(call.args[0]) for call in conn.execute.call_args_list]
+
+    def test_convert_adds_the_model_foreign_keys_to_the_parent(self):
+        for table in PARTITIONED_TABLES:
+            with self.subTest(table=table):
+                statements = self._converted_statements(table)
+                added = [i for i, sql in enumerate(statements) if "ADD FOREIGN KEY" in sql]
+                expected = {f"ALTER TABLE {table} ADD FOREIGN KEY (brand_id) REFERENCES brands (id)"}
+                if table == "prompt_test_results":
+                    expected.add(f"ALTER TABLE {table} ADD FOREIGN KEY (tracked_prompt_id) REFERENCES tracked_prompts (id)")
+                self.assertEqual({statements[i] for i in added}, expected)
+                # Added before ATTACH, so the legacy partition's existing constraints are reused
+                attach = next(i for i, sql in enumerate(statements) if "ATTACH PARTITION" in sql)
+                self.assertTrue(all(i < attach for i in added))
+
+    def test_missing_foreign_keys_compares_the_table_to_the_model(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine, tables=[
+            Base.metadata.tables[name] for name in ("users", "brands", "tracked_prompts", "prompt_test_results")
+        ])
+        with engine.connect() as conn:
+            self.assertEqual(PartitionManager.missing_foreign_keys(conn, "prompt_test_results"), [])
+
+        # What CREATE TABLE ... (LIKE ...) leaves behind: the columns without their foreign keys
+        bare = create_engine("sqlite://")
+        columns = ", ".join(column.name for column in Base.metadata.tables["brand_mentions"].columns)
+        with bare.begin() as conn:
+            conn.exec_driver_sql(f"CREATE TABLE brand_mentions ({columns})")
+        with bare.connect() as conn:
+            self.assertEqual(PartitionManager.missing_foreign_keys(conn, "brand_mentions"), ["brand_id -> brands"])
+
+
+if __name__ == "__main__":
+    unittest.main()
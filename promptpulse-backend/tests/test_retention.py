@@ -0,0 +1,87 @@
+"""Retiring a detached brand_mentions partition keeps mentions seen since the cutoff."""
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from sqlalchemy import inspect, text
+
+from src.database import SessionLocal, engine, upgrade_schema
+from src.jobs import retention
+from src.models.brand import Brand
+from src.models.mention import BrandMention, BrandMentionDailyAggregate
+from src.models.user import User
+
+PARTITION = "brand_mentions_p202001"
+
+
+class RetirePartitionTests(unittest.TestCase):
+    def setUp(self):
+        upgrade_schema()
+        self.cutoff = datetime.now(timezone.utc) - timedelta(days=90)
+        self.archive = os.path.join(tempfile.mkdtemp(prefix="retention-"), "archive.jsonl.gz")
+        db = SessionLocal()
+        try:
+            user = User(email="retention@example.com", hashed_password="x")
+            db.add(user)
+            db.flush()
+            brand = Brand(name="Retention brand", keywords=[], user_id=user.id)
+            db.add(brand)
+            db.flush()
+            self.brand_id = brand.id
+            created = datetime(2020, 1, 15, tzinfo=timezone.utc)
+            stale = BrandMention(
+                brand_id=brand.id, content="quiet mention", provider="openai", sentiment_score=4,
+                sentiment_label="positive", confidence=0.8, created_at=created, last_seen_at=created
+            )
+            recent = BrandMention(
+                brand_id=brand.id, content="mention merged into last week", provider="openai", sentiment_score=3,
+                sentiment_label="neutral", confidence=0.5, created_at=created,
+                last_seen_at=datetime.now(timezone.utc) - timedelta(days=7), occurrence_count=4
+            )
+            db.add_all([stale, recent])
+            db.flush()
+            self.stale_id, self.recent_id = stale.id, recent.id
+            # Stand-in for a monthly partition that detach_expired has just detached
+            db.execute(text(f"CREATE TABLE {PARTITION} AS SELECT * FROM brand_mentions WHERE brand_id = :b"),
+                       {"b": brand.id})
+            db.execute(text("DELETE FROM brand_mentions WHERE brand_id = :b"), {"b": brand.id})
+            db.commit()
+        finally:
+            db.close()
+
+        manager = mock.patch.object(retention, "partition_manager")
+        self.partition_manager = manager.start()
+        self.addCleanup(manager.stop)
+        self.partition_manager.detached.return_value = [PARTITION]
+
+    def tearDown(self):
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {PARTITION}"))
+
+    def test_recently_seen_rows_move_back_before_the_drop(self):
+        db = SessionLocal()
+        try:
+            removed = retention._retire_partitions(db, self.cutoff, self.archive, batch_size=10)
+
+            self.assertEqual(removed, 1)
+            self.assertNotIn(PARTITION, inspect(engine).get_table_names())
+            kept = db.query(BrandMention).filter_by(brand_id=self.brand_id).all()
+            self.assertEqual([(m.id, m.occurrence_count) for m in kept], [(self.recent_id, 4)])
+            self.partition_manager.ensure_default.assert_called_with(mock.ANY, "brand_mentions")
+
+            aggregate = db.query(BrandMentionDailyAggregate).filter_by(brand_id=self.brand_id).one()
+            self.assertEqual((aggregate.mention_count, aggregate.row_count), (1, 1))
+        finally:
+            db.close()
+
+        with gzip.open(self.archive, "rt") as f:
+            archived = [json.loads(line)["id"] for line in f]
+        self.assertEqual(archived, [self.stale_id])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""Budget checks against the shared usage_daily table."""
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+from src.models import user  # noqa: F401  register every mapper
+from src.database import upgrade_schema
+from src.services import usage_tracker as usage_module
+from src.services.openrouter_service import OpenRouterService
+from src.services.usage_tracker import UsageTracker
+
+
+class ChatCompletionBudgetTests(unittest.TestCase):
+    """With budgets on, chat_completion must not query the database on the event loop thread."""
+
+    def setUp(self):
+        upgrade_schema()
+        self.tracker = UsageTracker(daily_budget_usd=1.0, budget_mode="downgrade", cache_seconds=0)
+        self.session_threads = []
+        real_session = usage_module.SessionLocal
+
+        def recording_session():
+            self.session_threads.append(threading.get_ident())
+            return real_session()
+
+        patches = [
+            mock.patch.object(usage_module, "SessionLocal", recording_session),
+            mock.patch("src.services.openrouter_service.usage_tracker", self.tracker),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_budget_lookup_and_usage_write_run_off_the_loop(self):
+        service = OpenRouterService()
+        upstream = {"model": "openai/gpt-4o", "choices": [{"message": {"content": "ok"}}],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 5, "cost": 2.0}}
+
+        async def run():
+            loop_thread = threading.get_ident()
+            with mock.patch.object(service, "_attempt", mock.AsyncMock(return_value=upstream)):
+                await service.chat_completion({"model": "openai/gpt-4o", "messages": []}, "grade_content", "Tesla")
+                second = mock.AsyncMock(return_value=upstream)
+                with mock.patch.object(service, "_attempt", second):
+                    await service.chat_completion({"model": "openai/gpt-4o", "messages": []}, "grade_content", "Tesla")
+                return loop_thread, second.await_args.args[0]["model"]
+
+        loop_thread, second_model = asyncio.run(run())
+        self.assertTrue(self.session_threads, "the budget and usage should have touched the database")
+        self.assertNotIn(loop_thread, self.session_threads)
+        # The first call spent $2 of a $1 budget, so the second is downgraded
+        self.assertEqual(second_model, "openai/gpt-4o-mini")
+
+
+if __name__ == "__main__":
+    unittest.main()